@@ -1,3 +1,5 @@
+import json
+import socket
 from typing import Callable
 
 
@@ -43,3 +45,64 @@ class REST_Interface(IO_Interface):
 
     def __init__(self) -> None:
         pass
+
+
+class Socket_Interface(IO_Interface):
+    """
+    A class that provides input/output functionality over a connected socket.
+
+    Every message is sent as one JSON line, {"out": message} for output and
+    {"inp": prompt} to request input. The other end answers an input request with one
+    line of text.
+    """
+
+    def __init__(self, connection: socket.socket) -> None:
+        """
+        Wraps a connected socket.
+
+        Args:
+            connection (socket.socket): Socket connected to the client.
+        """
+        self._connection = connection
+        self._file = connection.makefile("rw", encoding="utf-8", newline="\n")
+
+    def _send(self, message: dict) -> None:
+        self._file.write(json.dumps(message) + "\n")
+        self._file.flush()
+
+    def out(self, message: str):
+        """
+        Sends the given message to the client.
+
+        Args:
+            message (str): The message to be sent.
+        """
+        self._send({"out": message})
+
+    def inp(self, message: str | None = None, filter: Callable = None):
+        """
+        Requests input from the client and waits for the answer.
+
+        Args:
+            message: The prompt message to be sent.
+            filter (Callable, optional): A function to filter the input. Defaults to None.
+
+        Returns:
+            str: The input of the client.
+
+        Raises:
+            ConnectionError: If the client closed the connection.
+        """
+        self._send({"inp": message})
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Connection closed by the client")
+        answer = line.rstrip("\n")
+        return filter(answer) if filter else answer
+
+    def close(self) -> None:
+        """
+        Closes the connection, the client reads the end of the stream.
+        """
+        self._file.close()
+        self._connection.close()
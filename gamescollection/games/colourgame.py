@@ -2,13 +2,17 @@
 Implementation of MasterCode
 """
 
+from collections import Counter
 from enum import Enum
 from random import choice, shuffle
-from copy import deepcopy
-from typing import Optional
+from typing import Optional, Sequence, TYPE_CHECKING
 
 from custom_io.classes import CL_Interface, IO_Interface
 
+if TYPE_CHECKING:
+    # Only needed for annotations, keeps numpy out of the import of this module
+    from games.gamerecords import GameRecordLog
+
 
 def string_filter(
     string: str,
@@ -34,6 +38,24 @@ def string_filter(
     return string_list
 
 
+def score_guess(guess: Sequence, solution: Sequence) -> tuple[int, int]:
+    """Evaluate a guess against the solution.
+
+    Every field of the solution is matched at most once, fields on the correct position
+    first.
+
+    Args:
+        guess (Sequence): Guessed colours
+        solution (Sequence): Colours of the solution
+
+    Returns:
+        tuple[int, int]: Number of colours on the correct position, and number of further correct colours on a wrong position
+    """
+    correct_position = sum(a == b for a, b in zip(guess, solution))
+    common = sum((Counter(guess) & Counter(solution)).values())
+    return correct_position, common - correct_position
+
+
 class Colour(Enum):
     """Colour Implementation"""
 
@@ -66,6 +88,7 @@ class ColorGame:
         out_interface: IO_Interface,
         *,
         unique_colours: bool = False,
+        record_log: "GameRecordLog | None" = None,
     ) -> None:
         """_summary_
 
@@ -76,7 +99,13 @@ class ColorGame:
             in_interface (_type_): Interface to get input from the user
             out_interface (_type_): Interface to output the game state to the user
             unique_colours (bool, optional): Game Setting, if colours should be unique. Defaults to False.
+            record_log (GameRecordLog, optional): Log to which the finished game is appended. Defaults to None.
+
+        Raises:
+            ValueError: If the record log can't store games of this configuration
         """
+        if record_log is not None:
+            record_log.check_colour(fields, number_colours, tries)
         self._colours = list(Colour)[0:number_colours]
         self._number_colours = fields
         self._tries = tries
@@ -84,6 +113,7 @@ class ColorGame:
         self._out_interface = out_interface
         self._guesses = []
         self._evaluations = []
+        self._record_log = record_log
         self._solution = self._generate_solution(unique_colours)
         self._game_loop()
 
@@ -146,8 +176,44 @@ class ColorGame:
                 "Invalid colour. Please try again. (Colours should be separated by ,), Key Error: {e}"
             )
             return self._get_guess()
+        if any(colour not in self._colours for colour in guess):
+            self._out_interface.out(
+                "Colour is not part of this game. Please try again. (Colours should be separated by ,)"
+            )
+            return self._get_guess()
         return guess
 
+    def _encode_guess(self, guess: list[Colour]) -> int:
+        """Encode a guess as a single number in base of the number of colours.
+
+        Args:
+            guess (list[Colour]): Guess which should be encoded
+
+        Returns:
+            int: Encoded guess, first field is the least significant digit
+
+        Raises:
+            ValueError: If the guess contains a colour which is not part of the game
+        """
+        return sum(
+            self._colours.index(colour) * len(self._colours) ** index
+            for index, colour in enumerate(guess)
+        )
+
+    def _record_game(self, solved: bool) -> None:
+        """Append the finished game to the record log if one is set.
+
+        Args:
+            solved (bool): True if the user found the solution
+        """
+        if self._record_log is not None:
+            self._record_log.append_colour(
+                self._number_colours,
+                len(self._colours),
+                [self._encode_guess(guess) for guess in self._guesses],
+                solved,
+            )
+
     def check_winner(self) -> bool:
         """Check if the user won the game"""
         return False
@@ -170,43 +236,34 @@ class ColorGame:
                 f"Colours: {','.join(colour.name for colour in self._colours)}"
             )
 
-            for guess in self._guesses:
-                self._out_interface.out(
-                    f"Guess: {','.join(colour.value for colour in guess)}"
-                )
+            for guess, evaluation in zip(self._guesses, self._evaluations):
                 self._out_interface.out(
-                    f"Evaluation: {','.join(result for result in self._evaluations)}"
+                    f"Guess: {','.join(colour.name for colour in guess)}"
                 )
+                self._out_interface.out(f"Evaluation: {','.join(evaluation)}")
             # Get Guess
             guess = self._get_guess()
             self._guesses.append(guess)
 
-            evaluation = []
-            temp_solution = deepcopy(self._solution)
             assert len(guess) == self._number_colours
 
             # Evaluate Guess
-            for index, colour in enumerate(guess):
-                # Check if correct position:
-                if colour == self._solution[index]:
-                    evaluation.append("Correct Position")
-                elif colour in self._solution:
-                    evaluation.append("Correct Colour")
-                    temp_solution.remove(colour)
-                else:
-                    continue
+            correct_position, correct_colour = score_guess(guess, self._solution)
+            evaluation = ["Correct Position"] * correct_position + [
+                "Correct Colour"
+            ] * correct_colour
 
             shuffle(evaluation)
             self._evaluations.append(evaluation)
-            if evaluation and all(
-                result == "Correct Position" for result in evaluation
-            ):
+            if correct_position == self._number_colours:
                 self._out_interface.out("You won!")
+                self._record_game(True)
                 return True
             else:
                 self._out_interface.out("Try again!")
 
         self._out_interface.out("You lost!")
         self._out_interface.out(f"The solution was: \n {self._solution}")
+        self._record_game(False)
 
         return False
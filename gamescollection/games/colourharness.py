@@ -0,0 +1,401 @@
+"""
+Headless evaluation of MasterCode solver strategies.
+
+A strategy plays against every possible secret code of a configuration, or a random
+sample of them, without any IO interface. The secrets are split over worker processes
+and the report contains the distribution of the number of guesses and the time the
+strategy needed per guess, so regressions in strength and speed show up together.
+
+Codes are rows of colour indices, the feedback of a guess is encoded as
+`correct_position * (fields + 1) + correct_colour` and matches `colourgame.score_guess`.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import numpy as np
+
+from games.colourgame import Colour
+from games.tablecache import load_table
+
+# Largest number of entries of a stored feedback table, 7776 codes of 5 fields and 6
+# colours need 60 MB, larger configurations compute the feedback on demand
+FEEDBACK_TABLE_LIMIT = 2**26
+
+
+class CodeSpace:
+    """All codes of a game configuration and their feedback
+
+    Attributes:
+        fields (int): Number of fields of a code
+        number_colours (int): Number of colours
+        codes (np.ndarray): All codes, shape (number_colours ** fields, fields)
+        solved (int): Encoded feedback of a correct guess
+        table (np.ndarray | None): Feedback of every pair of codes from the table cache, None above FEEDBACK_TABLE_LIMIT
+    """
+
+    def __init__(self, fields: int, number_colours: int) -> None:
+        """Enumerate all codes of a configuration.
+
+        Args:
+            fields (int): Number of fields of a code
+            number_colours (int): Number of colours
+
+        Raises:
+            ValueError: If there are more colours than the game has
+        """
+        if not 1 <= number_colours <= len(Colour):
+            raise ValueError(f"Number of colours must be between 1 and {len(Colour)}")
+        self.fields = fields
+        self.number_colours = number_colours
+        self.codes = np.array(
+            list(itertools.product(range(number_colours), repeat=fields)),
+            dtype=np.int8,
+        ).reshape(-1, fields)
+        self._counts = (
+            self.codes[:, :, None] == np.arange(number_colours, dtype=np.int8)
+        ).sum(axis=1, dtype=np.int8)
+        self.solved = fields * (fields + 1)
+        self.table: np.ndarray | None = None
+        if len(self.codes) ** 2 <= FEEDBACK_TABLE_LIMIT:
+            self.table = load_table(
+                f"colour-feedback-{fields}-{number_colours}", self._build_table
+            )
+
+    def _build_table(self) -> np.ndarray:
+        """Compute the feedback of all pairs of codes, block by block."""
+        table = np.empty((len(self), len(self)), dtype=np.uint8)
+        targets = np.arange(len(self))
+        for start in range(0, len(self), 256):
+            guesses = np.arange(start, min(start + 256, len(self)))
+            table[guesses] = self._compute(guesses, targets)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def feedback(self, guesses: np.ndarray | int, targets: np.ndarray) -> np.ndarray:
+        """Encoded feedback of guesses against target codes.
+
+        Args:
+            guesses (np.ndarray | int): Index or indices of the guessed codes
+            targets (np.ndarray): Indices of the codes the guesses are compared with
+
+        Returns:
+            np.ndarray: Feedback of shape (len(targets),) for a single guess, otherwise (len(guesses), len(targets))
+        """
+        if self.table is not None:
+            return self.table[guesses][..., targets].astype(np.int16)
+        return self._compute(guesses, targets)
+
+    def _compute(self, guesses: np.ndarray | int, targets: np.ndarray) -> np.ndarray:
+        """Feedback of guesses against targets from the codes themselves."""
+        guess_codes = self.codes[guesses][..., None, :]
+        exact = (guess_codes == self.codes[targets]).sum(axis=-1)
+        common = np.minimum(
+            self._counts[guesses][..., None, :], self._counts[targets]
+        ).sum(axis=-1)
+        return (exact * (self.fields + 1) + common - exact).astype(np.int16)
+
+
+class Strategy:
+    """Base class of solver strategies
+
+    A strategy gets the indices of all codes which are still consistent with the
+    feedback so far and returns the index of its next guess.
+    """
+
+    def next_guess(self, space: CodeSpace, candidates: np.ndarray) -> int:
+        """Choose the next guess.
+
+        Args:
+            space (CodeSpace): Codes of the game
+            candidates (np.ndarray): Indices of the codes which can still be the secret
+
+        Returns:
+            int: Index of the guessed code
+        """
+        raise NotImplementedError
+
+
+class FirstConsistent(Strategy):
+    """Guess the first code which is consistent with all feedback"""
+
+    def next_guess(self, space: CodeSpace, candidates: np.ndarray) -> int:
+        return int(candidates[0])
+
+
+class RandomConsistent(Strategy):
+    """Guess a random code which is consistent with all feedback"""
+
+    def __init__(self, seed: int | None = None) -> None:
+        self._rng = np.random.default_rng(seed)
+
+    def next_guess(self, space: CodeSpace, candidates: np.ndarray) -> int:
+        return int(self._rng.choice(candidates))
+
+
+class PartitionStrategy(Strategy):
+    """Base class of strategies which look at how a guess splits the candidates
+
+    Every code is scored by the sizes of the groups of candidates which would give the
+    same feedback. Consistent codes win ties, since they might be the secret. The first
+    guess only depends on the configuration and is computed once.
+    """
+
+    BLOCK = 256
+
+    def __init__(self) -> None:
+        self._first_guess: dict[tuple[int, int], int] = {}
+
+    def score(self, sizes: np.ndarray) -> np.ndarray:
+        """Score guesses by their partition sizes, lower is better.
+
+        Args:
+            sizes (np.ndarray): Number of candidates per feedback, shape (guesses, feedbacks)
+
+        Returns:
+            np.ndarray: Score per guess
+        """
+        raise NotImplementedError
+
+    def next_guess(self, space: CodeSpace, candidates: np.ndarray) -> int:
+        if len(candidates) <= 2:
+            return int(candidates[0])
+
+        first = len(candidates) == len(space)
+        key = (space.fields, space.number_colours)
+        if first and key in self._first_guess:
+            return self._first_guess[key]
+
+        consistent = np.zeros(len(space), dtype=bool)
+        consistent[candidates] = True
+        best_score, best_guess = None, 0
+        for start in range(0, len(space), self.BLOCK):
+            guesses = np.arange(start, min(start + self.BLOCK, len(space)))
+            feedback = space.feedback(guesses, candidates)
+            offsets = np.arange(len(guesses))[:, None] * (space.solved + 1)
+            sizes = np.bincount(
+                (feedback + offsets).ravel(),
+                minlength=len(guesses) * (space.solved + 1),
+            ).reshape(len(guesses), space.solved + 1)
+            # Prefer consistent codes by a half point
+            scores = self.score(sizes) - 0.5 * consistent[guesses]
+            index = int(np.argmin(scores))
+            if best_score is None or scores[index] < best_score:
+                best_score, best_guess = scores[index], int(guesses[index])
+
+        if first:
+            self._first_guess[key] = best_guess
+        return best_guess
+
+
+class Knuth(PartitionStrategy):
+    """Minimise the size of the largest group of remaining candidates"""
+
+    def score(self, sizes: np.ndarray) -> np.ndarray:
+        return sizes.max(axis=1).astype(np.float64)
+
+
+class MostParts(PartitionStrategy):
+    """Maximise the number of different feedbacks"""
+
+    def score(self, sizes: np.ndarray) -> np.ndarray:
+        return -(sizes > 0).sum(axis=1).astype(np.float64)
+
+
+STRATEGIES: dict[str, type[Strategy]] = {
+    "first": FirstConsistent,
+    "random": RandomConsistent,
+    "knuth": Knuth,
+    "mostparts": MostParts,
+}
+
+
+def play(
+    strategy: Strategy, space: CodeSpace, secret: int, max_guesses: int
+) -> tuple[int, list[float]]:
+    """Let a strategy find a single secret.
+
+    Args:
+        strategy (Strategy): Strategy which guesses
+        space (CodeSpace): Codes of the game
+        secret (int): Index of the secret code
+        max_guesses (int): Number of guesses after which the game is lost
+
+    Returns:
+        tuple[int, list[float]]: Number of guesses, 0 if the secret was not found, and
+            the seconds spent on every guess including filtering the candidates
+    """
+    candidates = np.arange(len(space))
+    secret_index = np.array([secret])
+    times: list[float] = []
+    for guess_number in range(1, max_guesses + 1):
+        start = time.perf_counter()
+        guess = strategy.next_guess(space, candidates)
+        times.append(time.perf_counter() - start)
+
+        feedback = space.feedback(guess, secret_index)[0]
+        if feedback == space.solved:
+            return guess_number, times
+
+        start = time.perf_counter()
+        candidates = candidates[space.feedback(guess, candidates) == feedback]
+        times[-1] += time.perf_counter() - start
+    return 0, times
+
+
+def _play_chunk(
+    strategy: str,
+    options: dict[str, Any],
+    fields: int,
+    number_colours: int,
+    secrets: np.ndarray,
+    max_guesses: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Play a chunk of secrets, runs in the worker processes.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Guesses per secret and seconds of every single guess
+    """
+    space = CodeSpace(fields, number_colours)
+    solver = STRATEGIES[strategy](**options)
+    guesses = np.zeros(len(secrets), dtype=np.int16)
+    times: list[float] = []
+    for index, secret in enumerate(secrets):
+        guesses[index], secret_times = play(solver, space, int(secret), max_guesses)
+        times.extend(secret_times)
+    return guesses, np.array(times)
+
+
+@dataclass
+class EvaluationReport:
+    """Result of the evaluation of a strategy
+
+    Attributes:
+        strategy (str): Name of the strategy
+        fields (int): Number of fields of a code
+        number_colours (int): Number of colours
+        games (int): Number of secrets played
+        unsolved (int): Number of secrets not found within the maximum number of guesses
+        mean_guesses (float): Average number of guesses of the solved secrets
+        max_guesses (int): Largest number of guesses of a solved secret
+        histogram (dict[int, int]): Number of solved secrets per number of guesses
+        mean_guess_time (float): Average seconds per guess
+        max_guess_time (float): Largest seconds of a single guess
+        wall_time (float): Seconds of the whole evaluation
+    """
+
+    strategy: str
+    fields: int
+    number_colours: int
+    games: int
+    unsolved: int
+    mean_guesses: float
+    max_guesses: int
+    histogram: dict[int, int] = field(default_factory=dict)
+    mean_guess_time: float = 0.0
+    max_guess_time: float = 0.0
+    wall_time: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Report as dictionary, e.g. to write it as JSON."""
+        return asdict(self)
+
+
+def evaluate(
+    strategy: str,
+    fields: int,
+    number_colours: int,
+    sample: int | None = None,
+    workers: int | None = None,
+    max_guesses: int = 20,
+    seed: int | None = None,
+    chunk_size: int = 64,
+    **options: Any,
+) -> EvaluationReport:
+    """Play a strategy against all secrets of a configuration, or a sample of them.
+
+    Args:
+        strategy (str): Name of the strategy in STRATEGIES
+        fields (int): Number of fields of a code
+        number_colours (int): Number of colours
+        sample (int, optional): Number of random secrets. Defaults to None, which plays all secrets.
+        workers (int, optional): Number of worker processes, 1 plays in this process. Defaults to None, which uses one per CPU.
+        max_guesses (int, optional): Number of guesses after which a game is lost. Defaults to 20.
+        seed (int, optional): Seed of the sample. Defaults to None.
+        chunk_size (int, optional): Number of secrets per task of a worker. Defaults to 64.
+        **options: Passed to the constructor of the strategy
+
+    Returns:
+        EvaluationReport: Distribution of guesses and guess times
+
+    Raises:
+        ValueError: If the strategy is unknown
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+    start = time.perf_counter()
+    # Stores the feedback table before the workers map it, instead of each building it
+    CodeSpace(fields, number_colours)
+    total = number_colours**fields
+    if sample is None or sample >= total:
+        secrets = np.arange(total)
+    else:
+        secrets = np.sort(
+            np.random.default_rng(seed).choice(total, sample, replace=False)
+        )
+    chunks = [secrets[i : i + chunk_size] for i in range(0, len(secrets), chunk_size)]
+    arguments = [
+        (strategy, options, fields, number_colours, chunk, max_guesses)
+        for chunk in chunks
+    ]
+
+    if workers == 1:
+        results = [_play_chunk(*argument) for argument in arguments]
+    else:
+        with ProcessPoolExecutor(workers or os.cpu_count() or 1) as pool:
+            results = list(pool.map(_play_chunk, *zip(*arguments)))
+
+    guesses = np.concatenate([result[0] for result in results])
+    times = np.concatenate([result[1] for result in results])
+    solved = guesses[guesses > 0]
+    counts = np.bincount(solved)
+    return EvaluationReport(
+        strategy=strategy,
+        fields=fields,
+        number_colours=number_colours,
+        games=len(guesses),
+        unsolved=int((guesses == 0).sum()),
+        mean_guesses=float(solved.mean()) if len(solved) else 0.0,
+        max_guesses=int(solved.max()) if len(solved) else 0,
+        histogram={int(n): int(counts[n]) for n in np.flatnonzero(counts)},
+        mean_guess_time=float(times.mean()) if len(times) else 0.0,
+        max_guess_time=float(times.max()) if len(times) else 0.0,
+        wall_time=time.perf_counter() - start,
+    )
+
+
+def command(args: argparse.Namespace) -> None:
+    """Evaluate a strategy with the arguments of the evaluate command and print the report."""
+    try:
+        report = evaluate(
+            args.strategy,
+            args.fields,
+            args.colours,
+            sample=args.sample,
+            workers=args.workers,
+            max_guesses=args.max_guesses,
+            seed=args.seed,
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+    print(json.dumps(report.to_dict(), indent=2))
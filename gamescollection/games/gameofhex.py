@@ -1,12 +1,24 @@
 import random
 import numpy as np
 import itertools as it
+import threading
+import time
 from enum import Enum
 from typing import TYPE_CHECKING
-from copy import deepcopy
 
 
 from custom_io.classes import CL_Interface, IO_Interface
+from games.gamerecords import GameRecordLog
+from games.hexai.board import edge_masks, neighbour_table, random_rollout
+from games.hexai.evaluation import EVALUATORS, AlphaBetaSearch
+from games.hexai.policy import PatternPolicy
+from games.hexai.scheduler import Job, SearchScheduler
+from games.hexai.ponder import Ponderer, TreePonderer
+from games.hexai.search import FlatMonteCarlo, SequentialHalving
+from games.hexai.settings import SearchSettings
+from games.hexai.symmetry import OpeningBook
+from games.hexai.tree import TreeSearch
+from games.tablecache import load_table
 
 if TYPE_CHECKING:
     pass
@@ -65,6 +77,35 @@ class Tile:
         return hash(f"{self.x}, {self.y}")
 
 
+def graph_table(size: int) -> np.ndarray:
+    """Table of the Graph of a board as indices, shared by all games of a size.
+
+    Every row lists the neighbouring cells of a cell, then the edges it touches, then
+    the virtual tile. Cells are numbered `x * size + y`, the edges north, south, west
+    and east and the virtual tile follow as `size * size` to `size * size + 4`.
+
+    Args:
+        size (int): Size of the board
+
+    Returns:
+        np.ndarray: Array of shape (size * size, 6) with the tile indices
+    """
+    return load_table(f"hex-graph-{size}", lambda: _build_graph_table(size))
+
+
+def _build_graph_table(size: int) -> np.ndarray:
+    """Build the table of graph_table from the neighbour table and the edge masks."""
+    n = size * size
+    neighbours = neighbour_table(size)
+    masks = edge_masks(size)
+    table = np.full((n, 6), n + 4, dtype=np.intp)
+    for cell in range(n):
+        entries = [int(other) for other in neighbours[cell] if other < n]
+        entries += [n + edge for edge in range(4) if masks[edge, cell]]
+        table[cell, : len(entries)] = entries
+    return table
+
+
 class Hex:
     """A Game of Hex in python
 
@@ -83,6 +124,12 @@ class Hex:
         virtual_tile (Tile): Virtual Tile to make the array homogenous
         board (np.ndarray): Game board representation as a 2D array
         graph (np.ndarray): Graph representation of the board
+        moves (list[int]): Moves made so far, encoded as x * size + y
+        record_log (GameRecordLog | None): Log to which the finished game is appended
+        settings (SearchSettings): How the AI searches its moves
+        rollout (Rollout): Policy the AI uses to play out simulations
+        opening_book (OpeningBook | None): Book of known moves which are played without search
+        scheduler (SearchScheduler | None): Scheduler which runs the AI searches, None runs them on the game thread
     """
 
     def __init__(
@@ -91,6 +138,11 @@ class Hex:
         in_interface: IO_Interface,
         out_interface: IO_Interface,
         simulations: int = 200,
+        record_log: GameRecordLog | None = None,
+        search: SearchSettings | None = None,
+        rollout_policy: PatternPolicy | None = None,
+        opening_book: OpeningBook | None = None,
+        scheduler: SearchScheduler | None = None,
     ) -> None:
         """Initialize the Hex game based on the size of the board and the interfaces for input and output.
 
@@ -98,12 +150,33 @@ class Hex:
             size (int): Size of the hex board
             in_interface (IO_Interface): Interface to get User Input
             out_interface (IO_Interface): Interface to display output to the User
+            simulations (int, optional): Number of simulations per move for the AI. Defaults to 200.
+            record_log (GameRecordLog, optional): Log to which the finished game is appended. Defaults to None.
+            search (SearchSettings, optional): How the AI searches its moves. Defaults to None, which uses the default SearchSettings.
+            rollout_policy (PatternPolicy, optional): Trained policy for the AI playouts. Defaults to None, which plays uniformly random.
+            opening_book (OpeningBook, optional): Book of known moves which are played without search. Defaults to None.
+            scheduler (SearchScheduler, optional): Scheduler shared with other games which runs the AI searches. Defaults to None, which searches on the game thread.
+
+        Raises:
+            ValueError: If the record log can't store the game, or the search can't search a board of the size
         """
+        if record_log is not None:
+            record_log.check_hex(size)
+        if search is not None:
+            search.check_size(size)
+
         # General attributes
         self._size = size
         self._in_interface = in_interface
         self._out_interface = out_interface
         self._simulations = simulations
+        self._record_log = record_log
+        self._settings = search if search is not None else SearchSettings()
+        self._opening_book = opening_book
+        self._scheduler = scheduler
+        # Search which can be continued by the next AI move
+        self._search: FlatMonteCarlo | TreeSearch | None = None
+        self._rollout = rollout_policy if rollout_policy is not None else random_rollout
 
         # Game state related attributes
         self._round = 0
@@ -111,6 +184,7 @@ class Hex:
         self._ai: Player
         self._current_player: Player
         self._winner: Player = Player.EMPTY
+        self._moves: list[int] = []
 
         # Special Tiles for the edges of the board
         self._north = Tile(-1, -2, Player.WHITE)
@@ -134,7 +208,8 @@ class Hex:
 
     def _create_graph(self, size: int) -> np.ndarray:
         """Create the Graph tha represents the Hex game based on size
-        First create list of lists and then convert to numpy array is faster than creating ndarray directly and populating it
+        The structure comes from graph_table, which is only built once per size, the Tiles
+        of this game are filled in.
 
         Since Arrays need to be homogenous to perform best, some Tiles have connections to "virtual" nodes which are just existent to make the array homogenous.
         The will be filtered out when requesting neighbors of a Tile.
@@ -145,125 +220,13 @@ class Hex:
         Returns:
             np.ndarray: Graph representing the board
         """
-
-        array = []
-        for index in range(size * size):
-            x = index // size
-            y = index % size
-
-            # Upper left corner
-            if x == 0 and y == 0:
-                array.append(
-                    [
-                        self._board[0, 1],
-                        self._board[1, 0],
-                        self._north,
-                        self._west,
-                        self._virtual_tile,
-                        self._virtual_tile,
-                    ]
-                )
-            # Upper right corner
-            elif x == 0 and y == size - 1:
-                array.append(
-                    [
-                        self._board[0, size - 2],
-                        self._board[1, size - 2],
-                        self._board[1][size - 2],
-                        self._north,
-                        self._east,
-                        self._virtual_tile,
-                    ]
-                )
-            # Lower left corner
-            elif x == size - 1 and y == 0:
-                array.append(
-                    [
-                        self._board[size - 1, 1],
-                        self._board[size - 2, 0],
-                        self._board[size - 2, 1],
-                        self._south,
-                        self._west,
-                        self._virtual_tile,
-                    ]
-                )
-            # Lower right corner
-            elif x == size - 1 and y == size - 1:
-                array.append(
-                    [
-                        self._board[size - 1, size - 2],
-                        self._board[size - 2, size - 1],
-                        self._south,
-                        self._east,
-                        self._virtual_tile,
-                        self._virtual_tile,
-                    ]
-                )
-
-            # Upper edge Nodes
-            elif x == 0:
-                array.append(
-                    [
-                        self._board[0, y - 1],
-                        self._board[0, y + 1],
-                        self._board[1, y - 1],
-                        self._board[1, y],
-                        self._north,
-                        self._virtual_tile,
-                    ]
-                )
-            # Lower edge Nodes
-            elif x == size - 1:
-                array.append(
-                    [
-                        self._board[size - 1, y - 1],
-                        self._board[size - 1, y + 1],
-                        self._board[size - 2, y],
-                        self._board[size - 2, y + 1],
-                        self._south,
-                        self._virtual_tile,
-                    ]
-                )
-            # Left edge Nodes
-            elif y == 0:
-                array.append(
-                    [
-                        self._board[x - 1, 0],
-                        self._board[x + 1, 0],
-                        self._board[x - 1, 1],
-                        self._board[x, 1],
-                        self._west,
-                        self._virtual_tile,
-                    ]
-                )
-            # Right edge Nodes
-            elif y == size - 1:
-                array.append(
-                    [
-                        self._board[x - 1, size - 1],
-                        self._board[x + 1, size - 1],
-                        self._board[x - 1, size - 2],
-                        self._board[x, size - 2],
-                        self._east,
-                        self._virtual_tile,
-                    ]
-                )
-            # Center Node
-            else:
-                array.append(
-                    [
-                        self._board[x, y - 1],
-                        self._board[x, y + 1],
-                        self._board[x - 1, y],
-                        self._board[x - 1, y + 1],
-                        self._board[x + 1, y],
-                        self._board[x + 1, y - 1],
-                    ]
-                )
-
-        assert len(array) == size * size
-
-        return np.array(array)
+        tiles = np.empty(size * size + 5, dtype=object)
+        tiles[: size * size] = self._board.ravel()
+        for index, tile in enumerate(
+            [self._north, self._south, self._west, self._east, self._virtual_tile]
+        ):
+            tiles[size * size + index] = tile
+        return tiles[graph_table(size)]
 
     def _get_neighbors(self, tile: Tile, player: Player | None = None) -> np.array:
         """Method to get the neighbors of a Tile
@@ -351,6 +314,7 @@ class Hex:
         elif self._board[x, y].player == Player.EMPTY and player != Player.EMPTY:
             self._board[x, y].player = player
             self._round += 1
+            self._moves.append(x * self._size + y)
             # Update the current player
             self._current_player = (
                 self._ai if self._current_player == self._player else self._player
@@ -393,21 +357,49 @@ class Hex:
         The move is then checked and only accepted if it is valid.
 
         If the move is invalid, the user is prompted to make another move.
+        If pondering is enabled the AI searches its replies in the background meanwhile,
+        on the scheduler if the game has one. The alpha-beta search has no work which
+        could be reused and does not ponder.
         """
-        while True:
-            self._out_interface.out("Please make a move: x y")
-            try:
-                x, y = self._in_interface.inp().split(" ")
-                x, y = int(x), int(y)
+        ponderer: Ponderer | TreePonderer | None = None
+        if self._settings.ponder and self._settings.mode == "uct":
+            tree = self._tree_search(self._cells(), self._player.value)
+            ponderer = TreePonderer(
+                tree, 10 * self._tree_budget(), scheduler=self._scheduler
+            )
+            ponderer.start()
+        elif self._settings.ponder and self._settings.mode == "flat":
+            ponderer = Ponderer(
+                self._cells(),
+                self._size,
+                self._player.value,
+                self._simulations,
+                rollout=self._rollout,
+                scheduler=self._scheduler,
+            )
+            ponderer.start()
 
-            except ValueError:
-                continue
-            else:
+        try:
+            while True:
+                self._out_interface.out("Please make a move: x y")
+                try:
+                    x, y = self._in_interface.inp().split(" ")
+                    x, y = int(x), int(y)
 
-                if self._make_move(x, y, self._player):
-                    break
+                except ValueError:
+                    continue
                 else:
-                    self._out_interface.out("Invalid Move.")
+
+                    if self._make_move(x, y, self._player):
+                        break
+                    else:
+                        self._out_interface.out("Invalid Move.")
+        finally:
+            if ponderer is not None:
+                ponderer.stop()
+
+        if ponderer is not None:
+            self._search = ponderer.take(x * self._size + y)
 
     def _game_loop(self):
         """Game loop to play the game of Hex"""
@@ -425,6 +417,11 @@ class Hex:
 
         print(f"Player {self._winner} won!")
 
+        if self._record_log is not None:
+            self._record_log.append_hex(
+                self._size, self._moves, self._winner.value, self._player.value
+            )
+
     def _get_legal_moves(self) -> list[Tile]:
         """Get Legal Moves on the board
 
@@ -435,39 +432,151 @@ class Hex:
         moves = [tile for tile in flattened_board if tile.player == Player.EMPTY]
         return moves
 
+    def _cells(self) -> np.ndarray:
+        """Get the board as flat array of Player values, as used by the hexai module.
+
+        Returns:
+            np.ndarray: Array with the value of the owner of Tile (x, y) at index x * size + y
+        """
+        return np.array([tile.player.value for tile in self._board.flat], dtype=np.int8)
+
+    def _tree_budget(self) -> int:
+        """Playouts of a tree search move, the same as a flat search spends on the board."""
+        return self._simulations * len(self._get_legal_moves())
+
+    def _tree_search(self, cells: np.ndarray, player: int) -> TreeSearch:
+        """Get the tree search for a position, reusing the tree of earlier moves if possible.
+
+        Args:
+            cells (np.ndarray): Current position
+            player (int): Player to move
+
+        Returns:
+            TreeSearch: Search rooted at the position
+        """
+        tree = self._search if isinstance(self._search, TreeSearch) else None
+        if tree is not None and tree.to_move != player:
+            # The opponent moved since the tree was last used
+            changed = np.flatnonzero(tree.cells != cells)
+            if len(changed) == 1:
+                tree.advance(int(changed[0]))
+
+        if (
+            tree is None
+            or tree.to_move != player
+            or not np.array_equal(tree.cells, cells)
+        ):
+            tree = TreeSearch(
+                cells,
+                self._size,
+                player,
+                capacity=self._settings.node_capacity,
+                rollout=self._rollout,
+            )
+        self._search = tree
+        return tree
+
+    def _run_search(self, job: Job) -> None:
+        """Run a search job on the scheduler of the game, or directly without one.
+
+        The move time is the deadline on the scheduler, without one a timer stops the job.
+        """
+        move_time = self._settings.move_time
+        if self._scheduler is None:
+            stop = threading.Event()
+            timer = (
+                threading.Timer(move_time, stop.set) if move_time is not None else None
+            )
+            if timer is not None:
+                timer.start()
+            try:
+                job(stop)
+            finally:
+                if timer is not None:
+                    timer.cancel()
+            return
+        deadline = time.monotonic() + move_time if move_time is not None else None
+        self._scheduler.run(id(self), job, deadline=deadline)
+
     def _ai_move(self):
-        # Run Monte carlo simulations to find the best move
-        best_score: int = -1 * int(1e9)
-        best_move: Tile | None = None
-
-        legal_moves: list[Tile] = self._get_legal_moves()
-
-        for move in legal_moves:
-            move_score: int = 0
-            for _ in range(self._simulations):
-                # Create Copy of the current game-state
-                temp_game = deepcopy(self)
-                temp_game._make_move(move.x, move.y, temp_game._current_player)
-
-                while not temp_game._check_winner():
-                    legal_moves = temp_game._get_legal_moves()
-                    if not legal_moves:
-                        break
-                    random_move = random.choice(legal_moves)
-                    temp_game._make_move(
-                        random_move.x, random_move.y, temp_game._current_player
-                    )
-
-                if temp_game._winner == temp_game._ai:
-                    move_score += 1
-                elif temp_game._winner == temp_game._player:
-                    move_score -= 1
-                else:
-                    pass
-            if move_score > best_score:
-                best_score = move_score
-                best_move = move
-        self._make_move(best_move.x, best_move.y, self._current_player)
+        """Find the best move with the selected search and make it.
+
+        A search which was pondered or kept for the current position is continued
+        instead of started from zero. With a scheduler the search shares the AI workers
+        with the other games. Positions in the opening book, or symmetric to one in it,
+        are not searched.
+        """
+        cells = self._cells()
+        player = self._current_player.value
+        move = (
+            self._opening_book.lookup(cells, self._size, player)
+            if self._opening_book is not None
+            else None
+        )
+
+        if move is None:
+            if self._settings.mode in EVALUATORS:
+                move = self._alpha_beta_move(cells, player)
+            elif self._settings.mode == "uct":
+                move = self._tree_move(cells, player)
+            else:
+                move = self._flat_move(cells, player)
+
+        x, y = divmod(move, self._size)
+        self._make_move(x, y, self._current_player)
+
+    def _alpha_beta_move(self, cells: np.ndarray, player: int) -> int:
+        """Best move of the alpha-beta search, which is limited by its depth.
+
+        An interrupted search continues with the depth it did not complete, the move time
+        keeps the best move of the deepest completed depth.
+        """
+        alpha_beta = AlphaBetaSearch(
+            cells,
+            self._size,
+            player,
+            evaluator=self._settings.mode,
+            depth=self._settings.depth,
+        )
+
+        def job(stop: threading.Event) -> bool:
+            alpha_beta.run(stop=stop)
+            return alpha_beta.searched_depth == alpha_beta.depth
+
+        self._run_search(job)
+        return alpha_beta.best_move()
+
+    def _tree_move(self, cells: np.ndarray, player: int) -> int:
+        """Best move of the tree search, which spends as many playouts as a flat search."""
+        tree = self._tree_search(cells, player)
+        budget = self._tree_budget()
+        self._run_search(lambda stop: tree.run(budget, stop=stop))
+        move = tree.best_move()
+        tree.advance(move)
+        return move
+
+    def _flat_move(self, cells: np.ndarray, player: int) -> int:
+        """Best move of the flat search.
+
+        Every legal move gets self._simulations playouts. With sequential halving only
+        half of them are spent, but they are concentrated on the promising moves.
+        """
+        search = self._search
+        self._search = None
+        if (
+            not isinstance(search, FlatMonteCarlo)
+            or search.to_move != player
+            or not np.array_equal(search.cells, cells)
+        ):
+            search = FlatMonteCarlo(cells, self._size, player, rollout=self._rollout)
+
+        if self._settings.allocator == "halving":
+            allocation = SequentialHalving(search)
+            budget = self._simulations * len(search.moves) // 2
+            self._run_search(lambda stop: allocation.run(budget, stop=stop))
+            return allocation.best_move()
+        self._run_search(lambda stop: search.run(self._simulations, stop=stop))
+        return search.best_move()
 
     def _pi_rule(self) -> None:
         """Implementation of the PI rule in the game to make it fair for both players."""
@@ -501,6 +610,7 @@ class Hex:
         """
         self._board[x, y].player = Player.EMPTY
         self._round -= 1
+        self._moves.remove(x * self._size + y)
 
     def _dfs(
         self, current_node: Tile, end_node: Tile, visited: set[Tile], player: Player
@@ -0,0 +1,485 @@
+"""
+# Game Records
+Append-only binary log of finished games and a memory-mapped reader for it.
+
+Every record has the same size, so the log can be mapped as one numpy structured
+array and scanned column-wise without parsing anything. A log file starts with a
+small header which stores the number of move slots per record, followed by the
+records themselves.
+
+Moves are stored as integers:
+- Hex: `x * size + y`
+- ColorGame: the guess as a number in base `number_colours`, first field is the least
+  significant digit
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from enum import Enum
+from os import path as ospath
+from typing import Iterator
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, the log file is not locked there
+    fcntl = None
+
+MAGIC = b"GCRLOG"
+VERSION = 1
+DEFAULT_MAX_MOVES = 169  # Full 13x13 Hex board
+
+NO_PLAYER = 255
+
+# Largest values of the record columns
+MAX_SIZE = 255
+MAX_MOVE = 2**32 - 1
+MAX_SLOTS = 2**16 - 1
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S6"),
+        ("version", "<u2"),
+        ("max_moves", "<u2"),
+        ("reserved", "<u2", (3,)),
+    ]
+)
+
+
+class GameKind(Enum):
+    """Enum for the games which can be recorded"""
+
+    HEX = 0
+    COLOUR = 1
+
+
+class RecordFormatError(Exception):
+    """Raised if a file is not a valid game record log"""
+
+    pass
+
+
+class RecordCapacityError(ValueError):
+    """Raised if games of a configuration can't be stored in a log"""
+
+    pass
+
+
+def record_dtype(max_moves: int) -> np.dtype:
+    """Create the fixed size record type for a log.
+
+    Args:
+        max_moves (int): Number of move slots in every record
+
+    Returns:
+        np.dtype: Structured dtype of a single record
+    """
+    return np.dtype(
+        [
+            ("game", "u1"),
+            ("size", "u1"),
+            ("colours", "u1"),
+            ("outcome", "u1"),
+            ("n_moves", "<u2"),
+            ("human", "u1"),
+            ("reserved", "u1"),
+            ("timestamp", "<u4"),
+            ("moves", "<u4", (max_moves,)),
+        ]
+    )
+
+
+def _read_header(file_path: str) -> np.ndarray:
+    """Read and validate the header of a log file.
+
+    Args:
+        file_path (str): Path to the log file
+
+    Returns:
+        np.ndarray: Header as structured scalar array
+
+    Raises:
+        RecordFormatError: If the file does not start with a valid header
+    """
+    header = np.fromfile(file_path, dtype=HEADER_DTYPE, count=1)
+    if len(header) != 1 or header["magic"][0] != MAGIC:
+        raise RecordFormatError(f"{file_path} is not a game record log")
+    if header["version"][0] != VERSION:
+        raise RecordFormatError(
+            f"Unsupported record version {header['version'][0]} in {file_path}"
+        )
+    return header[0]
+
+
+class GameRecordLog:
+    """Buffered writer which appends finished games to a record log.
+
+    Records are handed to a background thread, so appending a game only costs
+    building a single numpy record. The thread writes all records which are waiting
+    at once.
+
+    Games check their configuration with check_hex or check_colour before they start,
+    so a game which the log can't store is rejected before it is played.
+
+    Attributes:
+        path (str): Path of the log file
+        max_moves (int): Number of move slots per record
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        max_moves: int = DEFAULT_MAX_MOVES,
+    ) -> None:
+        """Open a log for appending, the file is created if it does not exist.
+
+        A partial record at the end of an existing file, left by a writer which was
+        killed, is cut off, so new records start at the right offset. Writers hold an
+        exclusive lock on the file while they write, so the record of another writer
+        which is still being written is never cut off.
+
+        Args:
+            file_path (str): Path to the log file
+            max_moves (int, optional): Move slots per record for new files. Existing files keep their own. Defaults to DEFAULT_MAX_MOVES.
+
+        Raises:
+            ValueError: If max_moves is not between 1 and MAX_SLOTS
+            RecordFormatError: If an existing file is not a valid log, or ends with a partial record which can't be cut off without a file lock
+        """
+        if not 1 <= max_moves <= MAX_SLOTS:
+            raise ValueError(f"Log can store between 1 and {MAX_SLOTS} moves per game")
+        self.path = file_path
+        if ospath.exists(file_path) and ospath.getsize(file_path) > 0:
+            max_moves = int(_read_header(file_path)["max_moves"])
+            self._file = open(file_path, "ab")
+            try:
+                self._cut_partial_record(record_dtype(max_moves).itemsize)
+            except RecordFormatError:
+                self._file.close()
+                raise
+        else:
+            self._file = open(file_path, "wb")
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header["magic"] = MAGIC
+            header["version"] = VERSION
+            header["max_moves"] = max_moves
+            self._file.write(header.tobytes())
+            self._file.flush()
+
+        self.max_moves = max_moves
+        self._dtype = record_dtype(max_moves)
+        self._queue: queue.Queue[bytes | None] = queue.Queue()
+        self._closed = False
+        # Error of a failed write, raised by the next call of the game
+        self._error: Exception | None = None
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def __enter__(self) -> "GameRecordLog":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold an exclusive lock on the log file, other writers wait until it is released."""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _cut_partial_record(self, itemsize: int) -> None:
+        """Cut off a partial record at the end of the file, left by a writer which was killed.
+
+        Args:
+            itemsize (int): Size of a record in bytes
+
+        Raises:
+            RecordFormatError: If there is a partial record and the file can't be locked
+        """
+        with self._locked():
+            size = os.fstat(self._file.fileno()).st_size
+            partial = (size - HEADER_DTYPE.itemsize) % itemsize
+            if partial and fcntl is None:
+                raise RecordFormatError(
+                    f"{self.path} ends with a partial record, "
+                    "which can't be cut off safely without a file lock"
+                )
+            if partial:
+                self._file.truncate(size - partial)
+
+    def _write_loop(self) -> None:
+        """Background loop which writes buffered records in batches.
+
+        A failed write is stored and raised by the next append, flush or close. The
+        records after it are dropped, they would not start at a record boundary.
+        """
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [record for record in batch if record is not None]
+            if records and self._error is None:
+                try:
+                    with self._locked():
+                        self._file.write(b"".join(records))
+                        self._file.flush()
+                except Exception as e:
+                    self._error = e
+
+            for _ in batch:
+                self._queue.task_done()
+
+            if None in batch:
+                return
+
+    def check_hex(self, size: int) -> None:
+        """Check that every game of Hex on a board of this size can be stored.
+
+        Args:
+            size (int): Size of the board
+
+        Raises:
+            RecordCapacityError: If the size or the moves of a full board do not fit
+        """
+        if size > MAX_SIZE:
+            raise RecordCapacityError(f"Log only stores boards up to size {MAX_SIZE}")
+        if size * size > self.max_moves:
+            raise RecordCapacityError(
+                f"A game of size {size} can have {size * size} moves, "
+                f"log only stores {self.max_moves}"
+            )
+
+    def check_colour(self, fields: int, number_colours: int, tries: int) -> None:
+        """Check that every ColorGame of this configuration can be stored.
+
+        Args:
+            fields (int): Number of fields of the code
+            number_colours (int): Number of colours in the game
+            tries (int): Number of guesses of a game
+
+        Raises:
+            RecordCapacityError: If the configuration or its encoded guesses do not fit
+        """
+        if fields > MAX_SIZE or number_colours > MAX_SIZE:
+            raise RecordCapacityError(
+                f"Log only stores up to {MAX_SIZE} fields and colours"
+            )
+        if number_colours**fields - 1 > MAX_MOVE:
+            raise RecordCapacityError(
+                f"Guesses of {fields} fields with {number_colours} colours "
+                "are too large for the log"
+            )
+        if tries > self.max_moves:
+            raise RecordCapacityError(
+                f"A game with {tries} tries can have {tries} moves, "
+                f"log only stores {self.max_moves}"
+            )
+
+    def _append(
+        self,
+        game: GameKind,
+        size: int,
+        colours: int,
+        outcome: int,
+        moves: list[int],
+        human: int = NO_PLAYER,
+    ) -> None:
+        """Build a record and hand it to the writer thread.
+
+        Raises:
+            ValueError: If the game has more moves than the log has slots
+            RuntimeError: If the log was already closed
+            OSError: If writing an earlier record failed
+        """
+        if self._closed:
+            raise RuntimeError("Game record log is closed")
+        self._raise_write_error()
+        if len(moves) > self.max_moves:
+            raise ValueError(
+                f"Game has {len(moves)} moves, log only stores {self.max_moves}"
+            )
+
+        record = np.zeros((), dtype=self._dtype)
+        record["game"] = game.value
+        record["size"] = size
+        record["colours"] = colours
+        record["outcome"] = outcome
+        record["n_moves"] = len(moves)
+        record["human"] = human
+        record["timestamp"] = int(time.time())
+        record["moves"][: len(moves)] = moves
+        self._queue.put(record.tobytes())
+
+    def append_hex(
+        self, size: int, moves: list[int], winner: int, human: int = NO_PLAYER
+    ) -> None:
+        """Append a finished game of Hex.
+
+        Args:
+            size (int): Size of the board
+            moves (list[int]): Moves in the order they were played, encoded as x * size + y
+            winner (int): Value of the winning Player
+            human (int, optional): Value of the Player the human played. Defaults to NO_PLAYER.
+        """
+        self._append(GameKind.HEX, size, 0, winner, moves, human)
+
+    def append_colour(
+        self, fields: int, number_colours: int, guesses: list[int], solved: bool
+    ) -> None:
+        """Append a finished ColorGame.
+
+        Args:
+            fields (int): Number of fields of the code
+            number_colours (int): Number of colours in the game
+            guesses (list[int]): Encoded guesses in the order they were made
+            solved (bool): True if the code was found
+        """
+        self._append(GameKind.COLOUR, fields, number_colours, int(solved), guesses)
+
+    def _raise_write_error(self) -> None:
+        """Raise the error of a failed write in the thread of the caller."""
+        if self._error is not None:
+            raise self._error
+
+    def flush(self) -> None:
+        """Block until all appended records are written to disk.
+
+        Raises:
+            OSError: If writing a record failed
+        """
+        self._queue.join()
+        self._raise_write_error()
+
+    def close(self) -> None:
+        """Write all pending records and close the file.
+
+        Raises:
+            OSError: If writing a record failed
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+        atexit.unregister(self.close)
+        self._raise_write_error()
+
+
+class GameRecordReader:
+    """Read-only memory-mapped view on a game record log.
+
+    Attributes:
+        path (str): Path of the log file
+        max_moves (int): Number of move slots per record
+        records (np.ndarray): Memory-mapped structured array of all complete records
+    """
+
+    def __init__(self, file_path: str) -> None:
+        """Map a log file into memory.
+
+        Args:
+            file_path (str): Path to the log file
+        """
+        self.path = file_path
+        self.max_moves = int(_read_header(file_path)["max_moves"])
+        dtype = record_dtype(self.max_moves)
+
+        # A record which is currently being written is ignored
+        count = (ospath.getsize(file_path) - HEADER_DTYPE.itemsize) // dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(
+                file_path,
+                dtype=dtype,
+                mode="r",
+                offset=HEADER_DTYPE.itemsize,
+                shape=(count,),
+            )
+        else:
+            self.records = np.zeros(0, dtype=dtype)
+        self._index: dict[tuple[int, int, int], np.ndarray] | None = None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index: int) -> np.void:
+        return self.records[index]
+
+    def moves(self, index: int) -> np.ndarray:
+        """Get the moves of a single game.
+
+        Args:
+            index (int): Index of the game in the log
+
+        Returns:
+            np.ndarray: Moves of the game without unused slots
+        """
+        record = self.records[index]
+        return record["moves"][: record["n_moves"]]
+
+    def index(self) -> dict[tuple[int, int, int], np.ndarray]:
+        """Index of all games by kind, board size and outcome.
+
+        The index is built once per reader with vectorised numpy operations.
+
+        Returns:
+            dict[tuple[int, int, int], np.ndarray]: Record indices for every (game, size, outcome) key
+        """
+        if self._index is None:
+            keys = (
+                self.records["game"].astype(np.uint32) << 16
+                | self.records["size"].astype(np.uint32) << 8
+                | self.records["outcome"].astype(np.uint32)
+            )
+            order = np.argsort(keys, kind="stable")
+            unique, starts = np.unique(keys[order], return_index=True)
+            groups = np.split(order, starts[1:])
+            self._index = {
+                (int(key >> 16), int(key >> 8 & 0xFF), int(key & 0xFF)): group
+                for key, group in zip(unique, groups)
+            }
+        return self._index
+
+    def select(
+        self,
+        game: GameKind | None = None,
+        size: int | None = None,
+        outcome: int | None = None,
+    ) -> np.ndarray:
+        """Get the indices of all games matching the given filters.
+
+        Args:
+            game (GameKind, optional): Kind of game. Defaults to None, which matches all.
+            size (int, optional): Board size or number of fields. Defaults to None, which matches all.
+            outcome (int, optional): Outcome of the game. Defaults to None, which matches all.
+
+        Returns:
+            np.ndarray: Sorted record indices
+        """
+        groups = [
+            group
+            for (key_game, key_size, key_outcome), group in self.index().items()
+            if (game is None or key_game == game.value)
+            and (size is None or key_size == size)
+            and (outcome is None or key_outcome == outcome)
+        ]
+        if not groups:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(groups))
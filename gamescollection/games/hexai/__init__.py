@@ -0,0 +1,22 @@
+"""
+
+# Hex AI
+Fast building blocks for the AI of the Game of Hex. Positions are stored as flat numpy
+arrays instead of Tile objects, so many playouts can be run at once.
+
+Following modules are available:
+- [board]() Array board, neighbour tables and vectorised playouts
+- [search]() Resumable flat Monte Carlo search
+- [ponder]() Searching during the turn of the human
+- [policy]() Trainable pattern based rollout policy
+- [nodepool]() Memory bounded structure of arrays storage for search nodes
+- [tree]() Monte Carlo tree search on top of the node pool
+- [evaluation]() Resistance and two-distance evaluation with alpha-beta search
+- [symmetry]() Canonical forms of positions and an opening book
+- [notation]() Text and binary notation of positions
+- [analysis]() Parallel bulk analysis of positions
+- [scheduler]() Fair sharing of the AI workers between many concurrent games
+- [tactics]() Tactical test positions and time-to-solution of AI configurations
+- [settings]() Settings of the AI search of a game
+
+"""
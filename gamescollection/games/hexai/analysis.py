@@ -0,0 +1,217 @@
+"""
+Batch analysis of Hex positions.
+
+Positions are read lazily from any iterable, evaluated by a pool of worker processes
+with a fixed playout budget per position and returned as dictionaries in input order.
+Only a bounded window of positions is in flight at any time, so the input can be much
+larger than the memory.
+
+Every result contains the index of the position in the input, the position in text
+notation, the best move as [x, y], the estimated winning chance of the player to move,
+the proven winner if the position is already decided within one move and the number of
+playouts spent. Positions which can't be parsed give a result with an error instead.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, BinaryIO, Iterable, Iterator, TextIO
+
+import numpy as np
+
+from games.hexai.board import connected, opponent
+from games.hexai.notation import (
+    SYMBOLS,
+    NotationError,
+    from_binary,
+    from_text,
+    read_binary,
+    to_text,
+)
+from games.hexai.search import FlatMonteCarlo
+from games.hexai.symmetry import unique_moves
+
+DEFAULT_BUDGET = 2000
+
+
+def analyse_position(
+    position: str | bytes,
+    budget: int = DEFAULT_BUDGET,
+    time_limit: float | None = None,
+) -> dict[str, Any]:
+    """Analyse a single position.
+
+    Args:
+        position (str | bytes): Position in text or binary notation
+        budget (int, optional): Number of playouts for the position. Defaults to DEFAULT_BUDGET.
+        time_limit (float, optional): Seconds after which the search is stopped, the moves keep an even sample. Defaults to None.
+
+    Returns:
+        dict[str, Any]: Result of the analysis
+
+    Raises:
+        NotationError: If the position can't be parsed
+    """
+    cells, size, to_move = (
+        from_binary(position) if isinstance(position, bytes) else from_text(position)
+    )
+    result: dict[str, Any] = {
+        "position": to_text(cells, size, to_move),
+        "best_move": None,
+        "win_estimate": None,
+        "proven": None,
+        "playouts": 0,
+    }
+
+    for player in (to_move, opponent(to_move)):
+        if connected(cells, size, player)[0]:
+            result["proven"] = SYMBOLS[player]
+            result["win_estimate"] = 1.0 if player == to_move else 0.0
+            return result
+
+    moves = unique_moves(cells, size, to_move)
+    if len(moves) == 0:
+        return result
+
+    children = np.repeat(cells[None, :], len(moves), axis=0)
+    children[np.arange(len(moves)), moves] = to_move
+    winning = np.flatnonzero(connected(children, size, to_move))
+    if len(winning):
+        result["best_move"] = list(divmod(int(moves[winning[0]]), size))
+        result["proven"] = SYMBOLS[to_move]
+        result["win_estimate"] = 1.0
+        return result
+
+    # Every move gets a playout, so even a short time limit gives an estimate
+    search = FlatMonteCarlo(cells, size, to_move, moves=moves)
+    search.run(1)
+    stop = threading.Event()
+    timer = threading.Timer(time_limit, stop.set) if time_limit is not None else None
+    if timer is not None:
+        timer.start()
+    try:
+        search.run(max(1, budget // len(moves)), stop=stop)
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+    best = int(np.argmax(search.win_rates()))
+    result["best_move"] = list(divmod(int(search.moves[best]), size))
+    result["win_estimate"] = round(float(search.win_rates()[best]), 4)
+    result["playouts"] = search.playouts
+    return result
+
+
+def _analyse_chunk(
+    chunk: list[tuple[int, str | bytes]], budget: int, time_limit: float | None
+) -> list[dict[str, Any]]:
+    """Analyse a chunk of numbered positions, runs in the worker processes."""
+    results = []
+    for index, position in chunk:
+        try:
+            result = analyse_position(position, budget, time_limit)
+        except NotationError as e:
+            result = {"error": str(e)}
+        results.append({"index": index, **result})
+    return results
+
+
+def analyse_stream(
+    positions: Iterable[str | bytes],
+    workers: int | None = None,
+    budget: int = DEFAULT_BUDGET,
+    time_limit: float | None = None,
+    chunk_size: int = 16,
+) -> Iterator[dict[str, Any]]:
+    """Analyse a stream of positions in parallel and yield the results in input order.
+
+    The input is consumed lazily, at most a few chunks per worker are read ahead.
+
+    Args:
+        positions (Iterable[str | bytes]): Positions in text or binary notation
+        workers (int, optional): Number of worker processes, 1 analyses in this process. Defaults to None, which uses one per CPU.
+        budget (int, optional): Number of playouts per position. Defaults to DEFAULT_BUDGET.
+        time_limit (float, optional): Seconds per position after which its search is stopped early. Defaults to None.
+        chunk_size (int, optional): Number of positions sent to a worker at once. Defaults to 16.
+
+    Yields:
+        dict[str, Any]: Result of every position
+    """
+    numbered = enumerate(positions)
+    chunks = iter(lambda: list(islice(numbered, chunk_size)), [])
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from _analyse_chunk(chunk, budget, time_limit)
+        return
+
+    workers = workers if workers is not None else os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as pool:
+        window = 4 * workers
+        pending: deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_analyse_chunk, chunk, budget, time_limit))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def analyse_file(
+    source: TextIO | BinaryIO,
+    target: TextIO,
+    binary: bool = False,
+    **kwargs: Any,
+) -> int:
+    """Analyse all positions of a file and write the results as JSON lines.
+
+    Args:
+        source (TextIO | BinaryIO): Positions, one per line in text notation or concatenated in binary notation
+        target (TextIO): Stream the JSON lines are written to
+        binary (bool, optional): True if source is in binary notation. Defaults to False.
+        **kwargs: Passed to analyse_stream
+
+    Returns:
+        int: Number of analysed positions
+    """
+    if binary:
+        positions: Iterable[str | bytes] = read_binary(source)
+    else:
+        positions = (line for line in source if line.strip())
+
+    count = 0
+    for result in analyse_stream(positions, **kwargs):
+        target.write(json.dumps(result) + "\n")
+        count += 1
+    target.flush()
+    return count
+
+
+def command(args: argparse.Namespace) -> None:
+    """Analyse the positions given to the analyse command, - stands for stdin and stdout."""
+    mode = "rb" if args.binary else "r"
+    if args.positions == "-":
+        source = sys.stdin.buffer if args.binary else sys.stdin
+    else:
+        source = open(args.positions, mode)
+    target = sys.stdout if args.output == "-" else open(args.output, "w")
+
+    try:
+        analyse_file(
+            source,
+            target,
+            binary=args.binary,
+            workers=args.workers,
+            budget=args.budget,
+            time_limit=args.time_limit,
+        )
+    finally:
+        if source not in (sys.stdin, sys.stdin.buffer):
+            source.close()
+        if target is not sys.stdout:
+            target.close()
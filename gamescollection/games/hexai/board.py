@@ -0,0 +1,152 @@
+"""
+Array representation of a Hex board for fast simulations.
+
+A position is a flat `np.int8` array with one entry per cell, cell `(x, y)` is stored at
+index `x * size + y`. The values are the values of `Player` in `games.gameofhex`.
+WHITE connects north (x == 0) and south (x == size - 1), BLACK connects west (y == 0)
+and east (y == size - 1).
+"""
+
+import numpy as np
+
+from games.tablecache import load_table
+
+# Same values as the Player enum of the game
+WHITE = 0
+BLACK = 1
+EMPTY = 2
+
+# Offsets of the six neighbours of a cell (x, y)
+NEIGHBOUR_OFFSETS = ((0, -1), (0, 1), (-1, 0), (-1, 1), (1, 0), (1, -1))
+
+
+def opponent(player: int) -> int:
+    """Get the opponent of a player."""
+    return BLACK if player == WHITE else WHITE
+
+
+def neighbour_table(size: int) -> np.ndarray:
+    """Table with the neighbours of every cell of a board.
+
+    Missing neighbours at the border of the board are marked with `size * size`, so the
+    table can index an array which has one additional padding entry.
+
+    Args:
+        size (int): Size of the board
+
+    Returns:
+        np.ndarray: Array of shape (size * size, 6) with the neighbour indices
+    """
+    return load_table(f"hex-neighbours-{size}", lambda: _build_neighbour_table(size))
+
+
+def _build_neighbour_table(size: int) -> np.ndarray:
+    """Build the neighbour table of neighbour_table."""
+    table = np.full((size * size, 6), size * size, dtype=np.intp)
+    for x in range(size):
+        for y in range(size):
+            for slot, (dx, dy) in enumerate(NEIGHBOUR_OFFSETS):
+                if 0 <= x + dx < size and 0 <= y + dy < size:
+                    table[x * size + y, slot] = (x + dx) * size + y + dy
+    return table
+
+
+def edge_masks(size: int) -> np.ndarray:
+    """Masks of the cells touching the four edges of the board.
+
+    Args:
+        size (int): Size of the board
+
+    Returns:
+        np.ndarray: Bool array of shape (4, size * size) for north, south, west and east
+    """
+    return load_table(f"hex-edges-{size}", lambda: _build_edge_masks(size))
+
+
+def _build_edge_masks(size: int) -> np.ndarray:
+    """Build the masks of edge_masks."""
+    x, y = np.divmod(np.arange(size * size), size)
+    return np.stack([x == 0, x == size - 1, y == 0, y == size - 1])
+
+
+def connected(boards: np.ndarray, size: int, player: int) -> np.ndarray:
+    """Check for a batch of boards if player connects their two edges.
+
+    The stones touching the first edge are flooded through the board with vectorised
+    numpy operations until the flood does not grow anymore.
+
+    Args:
+        boards (np.ndarray): Boards of shape (batch, size * size)
+        size (int): Size of the board
+        player (int): Player whose connection is checked
+
+    Returns:
+        np.ndarray: Bool array of shape (batch,)
+    """
+    boards = np.atleast_2d(boards)
+    table = neighbour_table(size)
+    masks = edge_masks(size)
+    start, end = (masks[0], masks[1]) if player == WHITE else (masks[2], masks[3])
+
+    own = boards == player
+    reached = np.zeros((len(boards), size * size + 1), dtype=bool)
+    reached[:, :-1] = own & start
+    while True:
+        grown = own & reached[:, table].any(axis=2)
+        grown |= reached[:, :-1]
+        if np.array_equal(grown, reached[:, :-1]):
+            break
+        reached[:, :-1] = grown
+
+    return (reached[:, :-1] & end).any(axis=1)
+
+
+def winners(boards: np.ndarray, size: int) -> np.ndarray:
+    """Get the winner of a batch of boards.
+
+    Args:
+        boards (np.ndarray): Boards of shape (batch, size * size)
+        size (int): Size of the board
+
+    Returns:
+        np.ndarray: Winner of every board, EMPTY if there is none yet
+    """
+    result = np.full(len(np.atleast_2d(boards)), EMPTY, dtype=np.int8)
+    result[connected(boards, size, BLACK)] = BLACK
+    result[connected(boards, size, WHITE)] = WHITE
+    return result
+
+
+def random_rollout(
+    boards: np.ndarray, size: int, to_move: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Play a batch of boards to the end with uniformly random moves.
+
+    In Hex a full board always has exactly one winner and a player who has connected
+    can't be disconnected again. Playing random moves until somebody connects is
+    therefore the same as filling all empty cells in a random order, which is done
+    for the whole batch at once.
+
+    Args:
+        boards (np.ndarray): Boards of shape (batch, size * size), all with the same number of empty cells. Modified in place.
+        size (int): Size of the board
+        to_move (int): Player who makes the next move on every board
+        rng (np.random.Generator): Random generator for the playouts
+
+    Returns:
+        np.ndarray: Winner of every board
+    """
+    rows, cells = np.nonzero(boards == EMPTY)
+    n_empty = len(cells) // len(boards)
+    if n_empty:
+        cells = cells.reshape(len(boards), n_empty)
+        order = np.argsort(rng.random(cells.shape), axis=1)
+        stones = np.resize(
+            np.array([to_move, opponent(to_move)], dtype=boards.dtype), n_empty
+        )
+        np.put_along_axis(
+            boards, np.take_along_axis(cells, order, axis=1), stones[None, :], axis=1
+        )
+
+    full_white = connected(boards, size, WHITE)
+    return np.where(full_white, WHITE, BLACK).astype(np.int8)
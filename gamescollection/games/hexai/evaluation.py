@@ -0,0 +1,399 @@
+"""
+Deterministic evaluation of Hex positions and an alpha-beta search on top of it.
+
+Two evaluators score a position without playouts:
+- resistance: the board is an electrical circuit between the two edges of a player.
+  Empty cells are resistors, own stones conduct almost perfectly and opponent stones
+  block. The position is scored by how much better the own circuit conducts.
+- two-distance: the Queenbee distance to both edges, where a cell is only as close as
+  its second best neighbour, because the opponent can always block the best one.
+
+Both work on batches of boards, so all children of a node are scored at once.
+"""
+
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+
+from games.hexai.board import (
+    EMPTY,
+    WHITE,
+    connected,
+    edge_masks,
+    neighbour_table,
+    opponent,
+)
+from games.hexai.symmetry import canonical, transform_move, unique_moves
+
+Evaluator = Callable[[np.ndarray, int, int], np.ndarray]
+
+WIN = 1e6
+OWN_RESISTANCE = 1e-3
+MAX_RESISTANCE = 1e6
+# Number of boards solved together, limits the memory of the batched linear systems
+RESISTANCE_BATCH = 32
+
+# Kind of value stored in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class _Interrupted(Exception):
+    """Raised inside the search when its stop event is set."""
+
+
+def _edges(player: int, size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Masks of the two edges a player has to connect."""
+    masks = edge_masks(size)
+    return (masks[0], masks[1]) if player == WHITE else (masks[2], masks[3])
+
+
+def resistance(boards: np.ndarray, size: int, player: int) -> np.ndarray:
+    """Resistance between the two edges of player for a batch of boards.
+
+    Args:
+        boards (np.ndarray): Boards of shape (batch, size * size)
+        size (int): Size of the board
+        player (int): Player whose circuit is solved
+
+    Returns:
+        np.ndarray: Resistance per board, MAX_RESISTANCE if the edges are cut off
+    """
+    boards = np.atleast_2d(boards)
+    n = size * size
+    table = neighbour_table(size)
+    source, sink = _edges(player, size)
+    cells, slots = np.nonzero(table < n)
+    others = table[cells, slots]
+
+    result = np.empty(len(boards))
+    for start in range(0, len(boards), RESISTANCE_BATCH):
+        batch = boards[start : start + RESISTANCE_BATCH]
+        cell_resistance = np.where(batch == player, OWN_RESISTANCE, 1.0)
+        open_cell = batch != opponent(player)
+
+        # Conductance between neighbours and from the edge cells to the terminals
+        conductance = np.where(
+            open_cell[:, cells] & open_cell[:, others],
+            1 / (cell_resistance[:, cells] + cell_resistance[:, others]),
+            0.0,
+        )
+        to_terminal = np.where(open_cell, 1 / cell_resistance, 0.0)
+        to_source = to_terminal * source
+        to_sink = to_terminal * sink
+
+        laplacian = np.zeros((len(batch), n, n))
+        laplacian[:, cells, others] = -conductance
+        diagonal = np.bincount(
+            np.repeat(np.arange(len(batch)), len(cells)) * n
+            + np.tile(cells, len(batch)),
+            weights=conductance.ravel(),
+            minlength=len(batch) * n,
+        ).reshape(len(batch), n)
+        diagonal += to_source + to_sink + 1e-9
+        laplacian[:, np.arange(n), np.arange(n)] = diagonal
+
+        # Source at voltage 1 and sink grounded, the current gives the resistance
+        voltage = np.linalg.solve(laplacian, to_source[:, :, None])[:, :, 0]
+        current = (to_source * (1 - voltage)).sum(axis=1)
+        result[start : start + len(batch)] = np.minimum(
+            1 / np.maximum(current, 1 / MAX_RESISTANCE), MAX_RESISTANCE
+        )
+    return result
+
+
+def resistance_evaluation(boards: np.ndarray, size: int, player: int) -> np.ndarray:
+    """Score boards for player by the ratio of the resistances of both circuits.
+
+    Args:
+        boards (np.ndarray): Boards of shape (batch, size * size)
+        size (int): Size of the board
+        player (int): Player from whose view the boards are scored
+
+    Returns:
+        np.ndarray: Score per board, positive if player is better connected
+    """
+    return np.log(resistance(boards, size, opponent(player))) - np.log(
+        resistance(boards, size, player)
+    )
+
+
+def two_distance(
+    boards: np.ndarray, size: int, player: int, from_start: bool
+) -> np.ndarray:
+    """Two-distance of every cell to one edge of player.
+
+    Empty cells are one further away than their second closest neighbour, own stones
+    are as close as their closest neighbour and opponent stones are unreachable.
+
+    Args:
+        boards (np.ndarray): Boards of shape (batch, size * size)
+        size (int): Size of the board
+        player (int): Player whose distance is computed
+        from_start (bool): True for the first edge (north or west), False for the second
+
+    Returns:
+        np.ndarray: Distances of shape (batch, size * size), inf if unreachable
+    """
+    boards = np.atleast_2d(boards)
+    n = size * size
+    table = neighbour_table(size)
+    edge = _edges(player, size)[0 if from_start else 1]
+    own = boards == player
+    blocked = boards == opponent(player)
+
+    distance = np.full((len(boards), n + 1), np.inf)
+    distance[:, :n] = np.where(edge & ~blocked, np.where(own, 0.0, 1.0), np.inf)
+    while True:
+        neighbours = distance[:, table]
+        closest = np.partition(neighbours, 1, axis=2)
+        updated = np.where(own, closest[:, :, 0], closest[:, :, 1] + 1)
+        updated = np.where(blocked, np.inf, np.minimum(distance[:, :n], updated))
+        if np.array_equal(updated, distance[:, :n]):
+            return updated
+        distance[:, :n] = updated
+
+
+def potential(boards: np.ndarray, size: int, player: int) -> np.ndarray:
+    """Smallest sum of the two-distances to both edges of player.
+
+    Args:
+        boards (np.ndarray): Boards of shape (batch, size * size)
+        size (int): Size of the board
+        player (int): Player whose potential is computed
+
+    Returns:
+        np.ndarray: Potential per board, lower is better
+    """
+    boards = np.atleast_2d(boards)
+    total = two_distance(boards, size, player, True) + two_distance(
+        boards, size, player, False
+    )
+    total = np.where(boards == EMPTY, total, np.inf)
+    best = total.min(axis=1)
+    # Having several cells on the shortest path is better than a single one
+    count = (total == best[:, None]).sum(axis=1)
+    return np.where(
+        np.isfinite(best), best - count / (size * size + 1), 4.0 * size * size
+    )
+
+
+def two_distance_evaluation(boards: np.ndarray, size: int, player: int) -> np.ndarray:
+    """Score boards for player by the difference of both potentials.
+
+    Args:
+        boards (np.ndarray): Boards of shape (batch, size * size)
+        size (int): Size of the board
+        player (int): Player from whose view the boards are scored
+
+    Returns:
+        np.ndarray: Score per board, positive if player is closer to connecting
+    """
+    return potential(boards, size, opponent(player)) - potential(boards, size, player)
+
+
+EVALUATORS: dict[str, Evaluator] = {
+    "resistance": resistance_evaluation,
+    "twodistance": two_distance_evaluation,
+}
+
+
+class AlphaBetaSearch:
+    """Depth limited negamax search with alpha-beta pruning
+
+    Moves are ordered by the static evaluation of the position after them and only the
+    best `width` moves of every node are searched, which keeps the number of evaluated
+    positions at about width ** depth. If the opponent threatens to win with their next
+    move, only the moves which block it are searched, the others lose at once.
+
+    Attributes:
+        cells (np.ndarray): Position at the root
+        size (int): Size of the board
+        to_move (int): Player to move at the root
+        depth (int): Maximum search depth in moves
+        width (int): Number of moves searched per node
+        nodes (int): Number of positions evaluated so far
+        searched_depth (int): Deepest completed search, a further run continues after it
+    """
+
+    def __init__(
+        self,
+        cells: np.ndarray,
+        size: int,
+        to_move: int,
+        evaluator: str = "resistance",
+        depth: int = 2,
+        width: int = 8,
+    ) -> None:
+        """Create a search for a position.
+
+        Args:
+            cells (np.ndarray): Position at the root
+            size (int): Size of the board
+            to_move (int): Player to move at the root
+            evaluator (str, optional): Name of the evaluator in EVALUATORS. Defaults to "resistance".
+            depth (int, optional): Maximum search depth in moves. Defaults to 2.
+            width (int, optional): Number of moves searched per node. Defaults to 8.
+        """
+        if evaluator not in EVALUATORS:
+            raise ValueError(f"Unknown evaluator: {evaluator}")
+        self.cells = np.array(cells, dtype=np.int8)
+        self.size = size
+        self.to_move = to_move
+        self.depth = depth
+        self.width = width
+        self.nodes = 0
+        self.searched_depth = 0
+        self._evaluate = EVALUATORS[evaluator]
+        self._table: dict[bytes, tuple[int, float, int, int]] = {}
+        self._best: int | None = None
+        self._score = 0.0
+
+    @property
+    def score(self) -> float:
+        """Score of the best move found, from the view of the player to move."""
+        return self._score
+
+    def _winning_cells(self, cells: np.ndarray, player: int) -> np.ndarray:
+        """Empty cells with which player connects their edges at once."""
+        empty = np.flatnonzero(cells == EMPTY)
+        boards = np.repeat(cells[None, :], len(empty), axis=0)
+        boards[np.arange(len(empty)), empty] = player
+        return empty[connected(boards, self.size, player)]
+
+    def _ordered_children(
+        self, cells: np.ndarray, player: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Create, score and sort the positions after the moves which are searched.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: Moves, boards and static scores for player, best first
+        """
+        moves = unique_moves(cells, self.size, player)
+        children = np.repeat(cells[None, :], len(moves), axis=0)
+        children[np.arange(len(moves)), moves] = player
+        wins = connected(children, self.size, player)
+        if not wins.any():
+            blocks = np.isin(moves, self._winning_cells(cells, opponent(player)))
+            if blocks.any():
+                moves, children, wins = moves[blocks], children[blocks], wins[blocks]
+        scores = self._evaluate(children, self.size, player)
+        scores[wins] = WIN
+        self.nodes += len(moves)
+
+        order = np.argsort(-scores, kind="stable")[: self.width]
+        return moves[order], children[order], scores[order]
+
+    def _negamax(
+        self,
+        cells: np.ndarray,
+        player: int,
+        depth: int,
+        alpha: float,
+        beta: float,
+        stop: threading.Event | None,
+    ) -> tuple[float, int | None]:
+        """Negamax value of a position for the player to move.
+
+        Positions are stored in the transposition table by their canonical key, the best
+        move is stored as move of the canonical position. Only completed nodes are
+        stored, so the table stays valid when the search is interrupted.
+
+        Returns:
+            tuple[float, int | None]: Value and best move, None if there are no moves
+
+        Raises:
+            _Interrupted: If the stop event is set
+        """
+        if stop is not None and stop.is_set():
+            raise _Interrupted
+        key, symmetry = canonical(cells, self.size, player)
+        stored = self._table.get(key)
+        if stored is not None and stored[0] >= depth:
+            _, value, best, kind = stored
+            if (
+                kind == EXACT
+                or (kind == LOWER and value >= beta)
+                or (kind == UPPER and value <= alpha)
+            ):
+                return value, transform_move(best, self.size, symmetry)
+        alpha_start = alpha
+
+        moves, children, scores = self._ordered_children(cells, player)
+        if not len(moves):
+            return 0.0, None
+
+        if depth == 1 or scores[0] >= WIN:
+            value, best = float(scores[0]), int(moves[0])
+        else:
+            value, best = -np.inf, int(moves[0])
+            for move, child in zip(moves, children):
+                child_value, _ = self._negamax(
+                    child, opponent(player), depth - 1, -beta, -alpha, stop
+                )
+                if -child_value > value:
+                    value, best = -child_value, int(move)
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    break
+
+        if value >= beta:
+            kind = LOWER
+        elif value <= alpha_start:
+            kind = UPPER
+        else:
+            kind = EXACT
+        self._table[key] = (
+            depth,
+            value,
+            transform_move(best, self.size, symmetry),
+            kind,
+        )
+        return value, best
+
+    def run(
+        self, time_limit: float | None = None, stop: threading.Event | None = None
+    ) -> int:
+        """Search with iterative deepening up to the maximum depth.
+
+        Deepening continues after the deepest completed search, so an interrupted search
+        can be resumed by running it again. The first depth is always completed, so
+        there is a best move.
+
+        Args:
+            time_limit (float, optional): Seconds after which no further depth is started. Defaults to None.
+            stop (threading.Event, optional): Event which interrupts the search when set, the unfinished depth is dropped. Defaults to None.
+
+        Returns:
+            int: Cell index of the best move
+        """
+        start = time.perf_counter()
+        for depth in range(self.searched_depth + 1, self.depth + 1):
+            try:
+                self._score, self._best = self._negamax(
+                    self.cells,
+                    self.to_move,
+                    depth,
+                    -np.inf,
+                    np.inf,
+                    stop if self.searched_depth else None,
+                )
+            except _Interrupted:
+                break
+            self.searched_depth = depth
+            if time_limit is not None and time.perf_counter() - start > time_limit:
+                break
+        return self.best_move()
+
+    def best_move(self) -> int:
+        """Get the best move of the last completed search depth.
+
+        Returns:
+            int: Cell index of the move
+        """
+        if self._best is None:
+            self.run()
+        return int(self._best)
@@ -0,0 +1,195 @@
+"""
+Fixed capacity storage for the nodes of a search tree.
+
+Nodes are not Python objects but rows in preallocated numpy arrays (structure of
+arrays). The children of a node are stored next to each other, so a node only needs
+the index of its first child and the number of children. Creating nodes moves a fill
+pointer, and once the pool is full the subtree of the current root is compacted to the
+front of the arrays, which frees every node that can't be reached anymore.
+"""
+
+import numpy as np
+
+NO_NODE = -1
+DEFAULT_CAPACITY = 1_000_000
+
+_FIELDS = (
+    ("visits", np.int32),
+    ("wins", np.float32),
+    ("prior", np.float32),
+    ("move", np.int16),
+    ("parent", np.int32),
+    ("first_child", np.int32),
+    ("n_children", np.int16),
+)
+
+
+class NodePool:
+    """Structure of arrays with a fixed number of search nodes
+
+    Wins of a node are counted for the player who made the move leading to it.
+
+    Attributes:
+        capacity (int): Maximum number of nodes
+        used (int): Number of nodes handed out since the last compaction
+        visits (np.ndarray): Number of playouts through every node
+        wins (np.ndarray): Number of those playouts won by the player who moved into the node
+        prior (np.ndarray): Prior probability of the move of every node
+        move (np.ndarray): Cell of the move leading to the node, -1 for a root
+        parent (np.ndarray): Index of the parent node, NO_NODE for a root
+        first_child (np.ndarray): Index of the first child, NO_NODE if the node is not expanded
+        n_children (np.ndarray): Number of children
+    """
+
+    NODE_BYTES = sum(np.dtype(dtype).itemsize for _, dtype in _FIELDS)
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        """Preallocate the arrays for all nodes.
+
+        Args:
+            capacity (int, optional): Maximum number of nodes. Defaults to DEFAULT_CAPACITY.
+        """
+        self.capacity = capacity
+        self.used = 0
+        for name, dtype in _FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    @classmethod
+    def for_memory(cls, n_bytes: int) -> "NodePool":
+        """Create the largest pool which fits into the given memory.
+
+        Args:
+            n_bytes (int): Memory budget in bytes
+
+        Returns:
+            NodePool: New pool
+        """
+        return cls(max(1, n_bytes // cls.NODE_BYTES))
+
+    @property
+    def free(self) -> int:
+        """Number of nodes which can still be allocated without a compaction."""
+        return self.capacity - self.used
+
+    def allocate(self, count: int) -> int:
+        """Reserve a block of new nodes in their initial state.
+
+        Args:
+            count (int): Number of nodes
+
+        Returns:
+            int: Index of the first node of the block, NO_NODE if the pool is full
+        """
+        if count > self.free:
+            return NO_NODE
+        start = self.used
+        self.used += count
+        block = slice(start, self.used)
+        self.visits[block] = 0
+        self.wins[block] = 0
+        self.prior[block] = 0
+        self.move[block] = -1
+        self.parent[block] = NO_NODE
+        self.first_child[block] = NO_NODE
+        self.n_children[block] = 0
+        return start
+
+    def new_root(self) -> int:
+        """Allocate a node without parent.
+
+        Returns:
+            int: Index of the node, NO_NODE if the pool is full
+        """
+        return self.allocate(1)
+
+    def expand(self, node: int, moves: np.ndarray, priors: np.ndarray) -> bool:
+        """Create the children of a node.
+
+        Args:
+            node (int): Node which is expanded
+            moves (np.ndarray): Cells of the moves of the children
+            priors (np.ndarray): Prior probability of every move
+
+        Returns:
+            bool: False if there was not enough space in the pool
+        """
+        start = self.allocate(len(moves))
+        if start == NO_NODE:
+            return False
+        block = slice(start, start + len(moves))
+        self.move[block] = moves
+        self.prior[block] = priors
+        self.parent[block] = node
+        self.first_child[node] = start
+        self.n_children[node] = len(moves)
+        return True
+
+    def children(self, node: int) -> slice:
+        """Get the block of children of a node.
+
+        Args:
+            node (int): Index of the node
+
+        Returns:
+            slice: Slice of the children in the arrays of the pool
+        """
+        start = self.first_child[node]
+        return (
+            slice(start, start + self.n_children[node])
+            if start != NO_NODE
+            else slice(0, 0)
+        )
+
+    def subtree(self, root: int) -> np.ndarray:
+        """Indices of all nodes below root in breadth first order.
+
+        Children of the same node stay next to each other in the order.
+
+        Args:
+            root (int): Index of the root of the subtree
+
+        Returns:
+            np.ndarray: Node indices, starting with root
+        """
+        levels = [np.array([root], dtype=np.int64)]
+        frontier = levels[0]
+        while True:
+            starts = self.first_child[frontier].astype(np.int64)
+            counts = self.n_children[frontier].astype(np.int64)
+            expanded = starts != NO_NODE
+            starts, counts = starts[expanded], counts[expanded]
+            if not len(starts):
+                break
+            offsets = np.arange(counts.sum()) - np.repeat(
+                np.cumsum(counts) - counts, counts
+            )
+            frontier = np.repeat(starts, counts) + offsets
+            levels.append(frontier)
+        return np.concatenate(levels)
+
+    def collect(self, root: int) -> int:
+        """Compact the subtree of root to the front of the pool and free everything else.
+
+        Args:
+            root (int): Index of the node which stays the root
+
+        Returns:
+            int: New index of the root, always 0
+        """
+        order = self.subtree(root)
+        kept = len(order)
+        new_index = np.full(self.used, NO_NODE, dtype=np.int64)
+        new_index[order] = np.arange(kept)
+
+        for name in ("visits", "wins", "prior", "move", "n_children"):
+            array = getattr(self, name)
+            array[:kept] = array[order]
+
+        for name in ("first_child", "parent"):
+            array = getattr(self, name)
+            old = array[order]
+            array[:kept] = np.where(old != NO_NODE, new_index[old], NO_NODE)
+
+        self.parent[0] = NO_NODE
+        self.used = kept
+        return 0
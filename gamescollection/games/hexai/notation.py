@@ -0,0 +1,155 @@
+"""
+Text and binary notation of Hex positions.
+
+Text: `<size>:<rows>:<to move>`, rows are separated by `/` and use the symbols of the
+game, `X` for WHITE, `O` for BLACK and `.` for empty cells. Example for a 3x3 board
+with one stone of each player and WHITE to move: `3:X../.O./...:X`. If the player to
+move is left out, WHITE moves when both players have the same number of stones.
+
+Binary: one byte board size, one byte player to move, then the cells with two bits
+each, four cells per byte with the first cell in the lowest bits. A record of a board
+is therefore always `2 + ceil(size * size / 4)` bytes long.
+"""
+
+from typing import BinaryIO, Iterator
+
+import numpy as np
+
+from games.hexai.board import BLACK, EMPTY, WHITE
+
+SYMBOLS = {WHITE: "X", BLACK: "O", EMPTY: "."}
+_VALUES = {symbol: value for value, symbol in SYMBOLS.items()}
+
+
+class NotationError(ValueError):
+    """Raised if a position can't be parsed"""
+
+    pass
+
+
+def to_text(cells: np.ndarray, size: int, to_move: int) -> str:
+    """Write a position in text notation.
+
+    Args:
+        cells (np.ndarray): Position
+        size (int): Size of the board
+        to_move (int): Player to move
+
+    Returns:
+        str: Position in text notation
+    """
+    rows = (
+        "".join(SYMBOLS[int(value)] for value in cells[row * size : (row + 1) * size])
+        for row in range(size)
+    )
+    return f"{size}:{'/'.join(rows)}:{SYMBOLS[to_move]}"
+
+
+def from_text(text: str) -> tuple[np.ndarray, int, int]:
+    """Parse a position in text notation.
+
+    Args:
+        text (str): Position in text notation
+
+    Returns:
+        tuple[np.ndarray, int, int]: Position, size of the board and player to move
+
+    Raises:
+        NotationError: If the text is not a valid position
+    """
+    parts = text.strip().split(":")
+    if len(parts) not in (2, 3) or not parts[0].isdigit():
+        raise NotationError(f"Invalid position: {text.strip()}")
+
+    size = int(parts[0])
+    rows = parts[1].split("/")
+    if size < 1 or len(rows) != size or any(len(row) != size for row in rows):
+        raise NotationError(f"Board does not have size {size}: {parts[1]}")
+    try:
+        cells = np.array(
+            [_VALUES[symbol] for row in rows for symbol in row.upper()], dtype=np.int8
+        )
+    except KeyError as e:
+        raise NotationError(f"Invalid cell {e} in position: {parts[1]}")
+
+    if len(parts) == 3 and parts[2].upper() in ("X", "O"):
+        to_move = _VALUES[parts[2].upper()]
+    elif len(parts) == 2:
+        to_move = WHITE if (cells == WHITE).sum() == (cells == BLACK).sum() else BLACK
+    else:
+        raise NotationError(f"Invalid player to move: {parts[2]}")
+    return cells, size, to_move
+
+
+def record_length(size: int) -> int:
+    """Number of bytes of a position of the given size in binary notation."""
+    return 2 + (size * size + 3) // 4
+
+
+def to_binary(cells: np.ndarray, size: int, to_move: int) -> bytes:
+    """Write a position in binary notation.
+
+    Args:
+        cells (np.ndarray): Position
+        size (int): Size of the board
+        to_move (int): Player to move
+
+    Returns:
+        bytes: Position in binary notation
+    """
+    padded = np.zeros((size * size + 3) // 4 * 4, dtype=np.uint8)
+    padded[: size * size] = cells
+    packed = padded.reshape(-1, 4) << np.array([0, 2, 4, 6], dtype=np.uint8)
+    return bytes([size, to_move]) + np.bitwise_or.reduce(packed, axis=1).tobytes()
+
+
+def from_binary(data: bytes) -> tuple[np.ndarray, int, int]:
+    """Parse a position in binary notation.
+
+    Args:
+        data (bytes): Position in binary notation
+
+    Returns:
+        tuple[np.ndarray, int, int]: Position, size of the board and player to move
+
+    Raises:
+        NotationError: If the data is not a valid position
+    """
+    if (
+        len(data) < 2
+        or data[0] < 1
+        or len(data) != record_length(data[0])
+        or data[1] > BLACK
+    ):
+        raise NotationError("Invalid binary position")
+    size, to_move = data[0], data[1]
+    packed = np.frombuffer(data, dtype=np.uint8, offset=2)
+    cells = (packed[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 0b11
+    cells = cells.ravel()[: size * size].astype(np.int8)
+    if (cells > EMPTY).any():
+        raise NotationError("Invalid cell in binary position")
+    return cells, size, to_move
+
+
+def read_binary(stream: BinaryIO) -> Iterator[bytes]:
+    """Split a stream of binary positions into single positions without reading it at once.
+
+    Args:
+        stream (BinaryIO): Stream of concatenated binary positions
+
+    Yields:
+        bytes: One position in binary notation
+
+    Raises:
+        NotationError: If the stream ends within a position
+    """
+    while True:
+        header = stream.read(2)
+        if not header:
+            return
+        if len(header) < 2:
+            raise NotationError("Truncated binary position")
+        body = stream.read(record_length(header[0]) - 2)
+        if len(body) != record_length(header[0]) - 2:
+            raise NotationError("Truncated binary position")
+        yield header + body
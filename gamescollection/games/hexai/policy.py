@@ -0,0 +1,390 @@
+"""
+Pattern based rollout policy for the Hex AI.
+
+Every empty cell is described by the stones on its 6 neighbours, or optionally on the
+12 cells within bridge distance. Each of these cells is own, opponent or empty from the
+view of the player to move, cells outside the board belong to the player who owns that
+edge. A weight table maps every pattern to a log-weight, and a playout picks moves with
+a probability proportional to exp(weight). With all weights zero this is a uniform
+random playout.
+
+The weights are fitted offline from the moves of the winners of self-play or recorded
+games by maximising the likelihood of their moves.
+"""
+
+import argparse
+import sys
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from games.hexai.board import (
+    BLACK,
+    EMPTY,
+    NEIGHBOUR_OFFSETS,
+    WHITE,
+    connected,
+    opponent,
+)
+from games.hexai.search import FlatMonteCarlo
+from games.tablecache import load_table
+
+# Offsets of the second ring, the cells which form a bridge with (x, y)
+BRIDGE_OFFSETS = ((-1, -1), (-2, 1), (-1, 2), (1, 1), (2, -1), (1, -2))
+
+# State of a cell in a pattern, seen from the player to move
+OWN = 0
+OTHER = 1
+FREE = 2
+
+
+def _offsets(radius: int) -> tuple[tuple[int, int], ...]:
+    """Offsets of the cells which make up a pattern of the given radius."""
+    if radius == 1:
+        return NEIGHBOUR_OFFSETS
+    elif radius == 2:
+        return NEIGHBOUR_OFFSETS + BRIDGE_OFFSETS
+    else:
+        raise ValueError("Patterns are only available for radius 1 and 2")
+
+
+def pattern_tables(size: int, radius: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    """Tables of the pattern cells of every cell of a board.
+
+    Pattern cells outside the board point to two virtual cells behind the real ones,
+    `size * size` for the white edges and `size * size + 1` for the black edges.
+
+    Args:
+        size (int): Size of the board
+        radius (int, optional): 1 for 6 neighbours, 2 for 12 neighbours. Defaults to 1.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Table of pattern cells of shape (size * size, k),
+            and the inverse table, entry (c, slot) is the cell which has c in its slot,
+            size * size if there is none.
+    """
+    tables = load_table(
+        f"hex-patterns-{size}-{radius}", lambda: _build_pattern_tables(size, radius)
+    )
+    return tables[0], tables[1]
+
+
+def _build_pattern_tables(size: int, radius: int) -> np.ndarray:
+    """Build the tables of pattern_tables, stacked into one array."""
+    offsets = _offsets(radius)
+    n = size * size
+    table = np.empty((n, len(offsets)), dtype=np.intp)
+    inverse = np.full((n, len(offsets)), n, dtype=np.intp)
+    for x in range(size):
+        for y in range(size):
+            for slot, (dx, dy) in enumerate(offsets):
+                px, py = x + dx, y + dy
+                if 0 <= py < size and 0 <= px < size:
+                    table[x * size + y, slot] = px * size + py
+                    inverse[px * size + py, slot] = x * size + y
+                elif not 0 <= px < size:
+                    table[x * size + y, slot] = n
+                else:
+                    table[x * size + y, slot] = n + 1
+    return np.stack([table, inverse])
+
+
+def pattern_ids(
+    boards: np.ndarray, size: int, player: int, radius: int = 1
+) -> np.ndarray:
+    """Pattern of every cell of a batch of boards seen from player.
+
+    Args:
+        boards (np.ndarray): Boards of shape (batch, size * size)
+        size (int): Size of the board
+        player (int): Player from whose view the patterns are built
+        radius (int, optional): 1 for 6 neighbours, 2 for 12 neighbours. Defaults to 1.
+
+    Returns:
+        np.ndarray: Pattern ids of shape (batch, size * size)
+    """
+    boards = np.atleast_2d(boards)
+    table, _ = pattern_tables(size, radius)
+    extended = np.empty((len(boards), size * size + 2), dtype=np.int8)
+    extended[:, :-2] = boards
+    extended[:, -2] = WHITE
+    extended[:, -1] = BLACK
+
+    states = np.empty(3, dtype=np.int64)
+    states[player] = OWN
+    states[opponent(player)] = OTHER
+    states[EMPTY] = FREE
+    powers = 3 ** np.arange(table.shape[1], dtype=np.int64)
+    return states[extended[:, table]] @ powers
+
+
+class PatternPolicy:
+    """Rollout policy which picks moves by the weight of their local pattern
+
+    Instances are callable with the signature of `board.random_rollout`, so they can be
+    passed as rollout to the searches.
+
+    Attributes:
+        radius (int): 1 for 6 neighbours, 2 for 12 neighbours
+        weights (np.ndarray): Log-weight of every pattern
+    """
+
+    def __init__(self, radius: int = 1, weights: np.ndarray | None = None) -> None:
+        """Create a policy, without weights all moves are equally likely.
+
+        Args:
+            radius (int, optional): 1 for 6 neighbours, 2 for 12 neighbours. Defaults to 1.
+            weights (np.ndarray, optional): Log-weight of every pattern. Defaults to None.
+        """
+        n_patterns = 3 ** len(_offsets(radius))
+        self.radius = radius
+        self.weights = (
+            np.zeros(n_patterns, dtype=np.float64)
+            if weights is None
+            else np.asarray(weights, dtype=np.float64)
+        )
+        if self.weights.shape != (n_patterns,):
+            raise ValueError(f"Radius {radius} needs {n_patterns} weights")
+
+    @classmethod
+    def load(cls, file_path: str) -> "PatternPolicy":
+        """Load a policy saved with save().
+
+        Args:
+            file_path (str): Path of the .npy file
+
+        Returns:
+            PatternPolicy: Loaded policy
+        """
+        weights = np.load(file_path)
+        radius = 1 if len(weights) == 3 ** len(NEIGHBOUR_OFFSETS) else 2
+        return cls(radius, weights)
+
+    def save(self, file_path: str) -> None:
+        """Save the weights of the policy as .npy file.
+
+        Args:
+            file_path (str): Path of the .npy file
+        """
+        np.save(file_path, self.weights)
+
+    def __call__(
+        self, boards: np.ndarray, size: int, to_move: int, rng: np.random.Generator
+    ) -> np.ndarray:
+        """Play a batch of boards to the end with the policy.
+
+        All boards are played in lockstep. After every move only the patterns of the
+        cells around the new stone are updated.
+
+        Args:
+            boards (np.ndarray): Boards of shape (batch, size * size), all with the same number of empty cells. Modified in place.
+            size (int): Size of the board
+            to_move (int): Player who makes the next move on every board
+            rng (np.random.Generator): Random generator for the playouts
+
+        Returns:
+            np.ndarray: Winner of every board
+        """
+        self.play(boards, size, to_move, rng)
+        return np.where(connected(boards, size, WHITE), WHITE, BLACK).astype(np.int8)
+
+    def play(
+        self,
+        boards: np.ndarray,
+        size: int,
+        to_move: int,
+        rng: np.random.Generator,
+        moves: int | None = None,
+    ) -> np.ndarray:
+        """Make moves with the policy on a batch of boards.
+
+        Args:
+            boards (np.ndarray): Boards of shape (batch, size * size), all with the same number of empty cells. Modified in place.
+            size (int): Size of the board
+            to_move (int): Player who makes the next move on every board
+            rng (np.random.Generator): Random generator for the moves
+            moves (int, optional): Number of moves to make. Defaults to None, which fills the boards.
+
+        Returns:
+            np.ndarray: Cells of the moves in order, shape (batch, moves)
+        """
+        n = size * size
+        n_empty = int(np.count_nonzero(boards[0] == EMPTY)) if len(boards) else 0
+        moves = n_empty if moves is None else min(moves, n_empty)
+        _, inverse = pattern_tables(size, self.radius)
+        powers = 3 ** np.arange(inverse.shape[1], dtype=np.int64)
+        rows = np.arange(len(boards))[:, None]
+
+        # Pattern ids from the view of both players, with a padding column which
+        # absorbs updates of cells outside the board
+        ids = np.zeros((2, len(boards), n + 1), dtype=np.int64)
+        ids[WHITE, :, :n] = pattern_ids(boards, size, WHITE, self.radius)
+        ids[BLACK, :, :n] = pattern_ids(boards, size, BLACK, self.radius)
+
+        played = np.empty((len(boards), moves), dtype=np.intp)
+        player = to_move
+        for step in range(moves):
+            scores = self.weights[ids[player, :, :n]]
+            scores += rng.gumbel(size=scores.shape)
+            scores[boards != EMPTY] = -np.inf
+            choice = np.argmax(scores, axis=1)
+            boards[rows[:, 0], choice] = player
+            played[:, step] = choice
+
+            # The new stone turns FREE into OWN or OTHER in the patterns around it
+            changed = inverse[choice]
+            ids[player, rows, changed] += (OWN - FREE) * powers
+            ids[opponent(player), rows, changed] += (OTHER - FREE) * powers
+            player = opponent(player)
+
+        return played
+
+
+def self_play(
+    size: int,
+    games: int,
+    policy: PatternPolicy | None = None,
+    simulations: int = 0,
+    rng: np.random.Generator | None = None,
+) -> Iterator[tuple[int, np.ndarray, int]]:
+    """Generate games of the AI against itself.
+
+    Args:
+        size (int): Size of the board
+        games (int): Number of games
+        policy (PatternPolicy, optional): Policy for moves and playouts. Defaults to None, which plays uniformly random.
+        simulations (int, optional): Playouts per candidate of a flat Monte Carlo search for every move, 0 plays the policy directly. Defaults to 0.
+        rng (np.random.Generator, optional): Random generator. Defaults to None.
+
+    Yields:
+        tuple[int, np.ndarray, int]: Size, moves in order and winner of every game
+    """
+    policy = policy if policy is not None else PatternPolicy()
+    rng = rng if rng is not None else np.random.default_rng()
+
+    if simulations == 0:
+        boards = np.full((games, size * size), EMPTY, dtype=np.int8)
+        moves = policy.play(boards, size, WHITE, rng)
+        won = np.where(connected(boards, size, WHITE), WHITE, BLACK)
+        for game in range(games):
+            yield size, moves[game], int(won[game])
+        return
+
+    for _ in range(games):
+        cells = np.full(size * size, EMPTY, dtype=np.int8)
+        moves = []
+        player = WHITE
+        while not connected(cells, size, opponent(player))[0]:
+            search = FlatMonteCarlo(cells, size, player, rollout=policy, rng=rng)
+            search.run(simulations)
+            move = search.best_move()
+            cells[move] = player
+            moves.append(move)
+            player = opponent(player)
+        yield size, np.array(moves), opponent(player)
+
+
+def records_games(reader) -> Iterator[tuple[int, np.ndarray, int]]:
+    """Get the Hex games of a record log in the format used by train().
+
+    Args:
+        reader (GameRecordReader): Reader of the log
+
+    Yields:
+        tuple[int, np.ndarray, int]: Size, moves in order and winner of every game
+    """
+    from games.gamerecords import GameKind
+
+    for index in reader.select(GameKind.HEX):
+        record = reader[index]
+        if record["outcome"] in (WHITE, BLACK):
+            yield int(record["size"]), reader.moves(index), int(record["outcome"])
+
+
+def train(
+    games: Iterable[tuple[int, np.ndarray, int]],
+    radius: int = 1,
+    epochs: int = 20,
+    learning_rate: float = 1.0,
+    regularization: float = 1e-3,
+    policy: PatternPolicy | None = None,
+) -> PatternPolicy:
+    """Fit the weights of a policy to the moves of the winners of games.
+
+    Every move of the winner is a sample of a softmax over the patterns of all empty
+    cells. The weights are fitted by full-batch gradient ascent on the log likelihood,
+    so all positions of the winners are kept in memory. A position only keeps the
+    distinct patterns of its empty cells and how often each of them occurs.
+
+    Args:
+        games (Iterable[tuple[int, np.ndarray, int]]): Size, moves in order and winner of every game
+        radius (int, optional): 1 for 6 neighbours, 2 for 12 neighbours. Defaults to 1.
+        epochs (int, optional): Number of gradient steps. Defaults to 20.
+        learning_rate (float, optional): Step size. Defaults to 1.0.
+        regularization (float, optional): L2 penalty, keeps rare patterns near zero. Defaults to 1e-3.
+        policy (PatternPolicy, optional): Policy to continue training. Defaults to None.
+
+    Returns:
+        PatternPolicy: Trained policy
+    """
+    policy = policy if policy is not None else PatternPolicy(radius)
+    n_patterns = len(policy.weights)
+
+    # Every position: which patterns were on the board how often and which one was chosen
+    positions: list[np.ndarray] = []
+    occurrences: list[np.ndarray] = []
+    chosen: list[int] = []
+    for size, moves, winner in games:
+        cells = np.full(size * size, EMPTY, dtype=np.int8)
+        player = WHITE
+        for move in moves:
+            if player == winner:
+                ids = pattern_ids(cells, size, player, policy.radius)[0]
+                patterns, counts = np.unique(ids[cells == EMPTY], return_counts=True)
+                positions.append(patterns)
+                occurrences.append(counts)
+                chosen.append(int(ids[move]))
+            cells[move] = player
+            player = opponent(player)
+
+    if not positions:
+        return policy
+
+    chosen_counts = np.bincount(chosen, minlength=n_patterns)
+    lengths = np.array([len(ids) for ids in positions])
+    flat_ids = np.concatenate(positions)
+    flat_counts = np.concatenate(occurrences)
+    position_of = np.repeat(np.arange(len(positions)), lengths)
+
+    for _ in range(epochs):
+        scores = flat_counts * np.exp(policy.weights[flat_ids])
+        totals = np.bincount(position_of, weights=scores)
+        expected = np.bincount(
+            flat_ids, weights=scores / totals[position_of], minlength=n_patterns
+        )
+        gradient = (chosen_counts - expected) / len(positions)
+        policy.weights += learning_rate * (gradient - regularization * policy.weights)
+
+    return policy
+
+
+def command(args: argparse.Namespace) -> None:
+    """Train a policy with the arguments of the train command and save it."""
+    from games.gamerecords import GameRecordReader, RecordFormatError
+
+    try:
+        policy = PatternPolicy.load(args.policy) if args.policy is not None else None
+        if args.records is not None:
+            games = records_games(GameRecordReader(args.records))
+        else:
+            games = self_play(
+                args.size,
+                args.games,
+                policy,
+                args.simulations,
+                np.random.default_rng(args.seed),
+            )
+        policy = train(games, args.radius, args.epochs, policy=policy)
+    except (OSError, RecordFormatError, ValueError) as e:
+        sys.exit(str(e))
+    policy.save(args.output)
@@ -0,0 +1,211 @@
+"""
+Pondering for the Hex AI.
+
+While the human is thinking, a background thread searches the AI replies to the human
+moves it expects. Once the human has moved, the search for that move is kept and the
+rest is thrown away. The AI then only needs to top up the kept search to its normal
+budget instead of starting from zero.
+
+A tree search does not need a prediction of the human move, its tree already contains
+the replies. It just continues to grow in the background and is re-rooted at the move
+the human made.
+
+With a scheduler the pondering is submitted as a session of its own with a low
+priority, so it only gets the workers which the searches of the games leave over.
+Without one it runs in its own thread.
+"""
+
+import threading
+
+import numpy as np
+
+from games.hexai.board import EMPTY, opponent, random_rollout
+from games.hexai.scheduler import SearchScheduler, SearchTicket
+from games.hexai.search import FlatMonteCarlo, Rollout
+from games.hexai.symmetry import ROTATION, permutations, rotation_twin, transform
+from games.hexai.tree import TreeSearch
+
+# Weight of a pondering session compared to the default 1.0 of a game
+PONDER_PRIORITY = 0.25
+
+
+class _Background:
+    """Resumable search which runs on a scheduler or in its own thread"""
+
+    def __init__(self, scheduler: SearchScheduler | None) -> None:
+        self._scheduler = scheduler
+        self._ticket: SearchTicket | None = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._search, args=(self._stop,), daemon=True
+        )
+
+    def _search(self, stop: threading.Event) -> bool:
+        """Search until done or stop is set, return True once done."""
+        raise NotImplementedError
+
+    def start(self) -> None:
+        """Start pondering on the scheduler or in a background thread."""
+        if self._scheduler is not None:
+            self._ticket = self._scheduler.submit(
+                ("ponder", id(self)), self._search, priority=PONDER_PRIORITY
+            )
+        else:
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop pondering and wait until the search is interrupted."""
+        if self._ticket is not None:
+            self._scheduler.cancel(self._ticket)
+            self._ticket.wait()
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+class Ponderer(_Background):
+    """Background search of the AI replies to the likely human moves
+
+    Attributes:
+        cells (np.ndarray): Position in which the human has to move
+        size (int): Size of the board
+        human (int): Player the human plays
+        simulations (int): Budget per candidate of a single AI search
+        width (int): Number of human moves which are pondered at the same time
+    """
+
+    def __init__(
+        self,
+        cells: np.ndarray,
+        size: int,
+        human: int,
+        simulations: int,
+        width: int = 4,
+        rollout: Rollout = random_rollout,
+        scheduler: SearchScheduler | None = None,
+    ) -> None:
+        """Prepare pondering for a position, the search starts with start().
+
+        Args:
+            cells (np.ndarray): Position in which the human has to move
+            size (int): Size of the board
+            human (int): Player the human plays
+            simulations (int): Budget per candidate of a single AI search
+            width (int, optional): Number of human moves which are pondered at the same time. Defaults to 4.
+            rollout (Rollout, optional): Policy to play out the boards. Defaults to random_rollout.
+            scheduler (SearchScheduler, optional): Scheduler which runs the pondering at a low priority. Defaults to None, which ponders in a thread.
+        """
+        super().__init__(scheduler)
+        self.cells = np.array(cells, dtype=np.int8)
+        self.size = size
+        self.human = human
+        self.simulations = simulations
+        self.width = width
+        self._rollout = rollout
+        self._searches: dict[int, FlatMonteCarlo] = {}
+        self._prediction = FlatMonteCarlo(
+            self.cells, self.size, self.human, rollout=self._rollout
+        )
+
+    def take(self, move: int) -> FlatMonteCarlo | None:
+        """Stop pondering and get the search for the move the human made.
+
+        A move which was dropped as the rotation of another move gets the search of
+        that move, rotated back to the position on the board.
+
+        Args:
+            move (int): Cell index of the human move
+
+        Returns:
+            FlatMonteCarlo | None: Search of the position after the move, None if it was not pondered
+        """
+        self.stop()
+        search = self._searches.get(move)
+        if search is None:
+            twin = rotation_twin(self.cells, self.size, self.human, move)
+            search = self._searches.get(twin)
+            if search is not None:
+                search.cells, _ = transform(
+                    search.cells, self.size, search.to_move, ROTATION
+                )
+                search.moves = permutations(self.size)[ROTATION][search.moves]
+        self._searches.clear()
+        return search
+
+    def _search(self, stop: threading.Event) -> bool:
+        """Rank the human moves and search the replies to the best ones first.
+
+        The searches only add the missing playouts, so a resumed call quickly skips
+        the work which is already done.
+        """
+        # Short search from the view of the human to guess their move
+        prediction = self._prediction
+        if not prediction.run(max(1, self.simulations // 8), stop=stop):
+            return False
+        expected = prediction.moves[np.argsort(-prediction.win_rates(), kind="stable")]
+
+        # Deepen the searches of a group of moves together, so that a human move
+        # which is among the expected ones always has a part of the budget
+        for start in range(0, len(expected), self.width):
+            group = expected[start : start + self.width]
+            for fraction in (8, 4, 2, 1):
+                for move in group.tolist():
+                    if move not in self._searches:
+                        cells = self.cells.copy()
+                        cells[move] = self.human
+                        if not (cells == EMPTY).any():
+                            continue
+                        self._searches[move] = FlatMonteCarlo(
+                            cells,
+                            self.size,
+                            opponent(self.human),
+                            rollout=self._rollout,
+                        )
+                    if not self._searches[move].run(
+                        max(1, self.simulations // fraction), stop=stop
+                    ):
+                        return False
+        return True
+
+
+class TreePonderer(_Background):
+    """Background continuation of a tree search while the human is thinking
+
+    Attributes:
+        tree (TreeSearch): Search rooted at the position in which the human has to move
+        playouts (int): Maximum number of playouts at the root
+    """
+
+    def __init__(
+        self,
+        tree: TreeSearch,
+        playouts: int,
+        scheduler: SearchScheduler | None = None,
+    ) -> None:
+        """Prepare pondering for a tree, the search starts with start().
+
+        Args:
+            tree (TreeSearch): Search rooted at the position in which the human has to move
+            playouts (int): Maximum number of playouts at the root
+            scheduler (SearchScheduler, optional): Scheduler which runs the pondering at a low priority. Defaults to None, which ponders in a thread.
+        """
+        super().__init__(scheduler)
+        self.tree = tree
+        self.playouts = playouts
+
+    def _search(self, stop: threading.Event) -> bool:
+        """Grow the tree until it has the maximum playouts or stop is set."""
+        return self.tree.run(self.playouts, stop=stop)
+
+    def take(self, move: int) -> TreeSearch:
+        """Stop pondering and re-root the tree at the move the human made.
+
+        Args:
+            move (int): Cell index of the human move
+
+        Returns:
+            TreeSearch: Search of the position after the move
+        """
+        self.stop()
+        self.tree.advance(move)
+        return self.tree
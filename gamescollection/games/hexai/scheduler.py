@@ -0,0 +1,363 @@
+"""
+Fair sharing of the AI compute between many concurrent games.
+
+Instead of searching on the thread of its game, every game submits its searches to one
+scheduler, which owns a fixed number of worker threads. A search is run in time slices:
+when its slice is over and other searches are waiting, it is interrupted through its
+stop event and put back into the queue. The next search is chosen by the policy:
+- fair: the session which has used the least compute time, weighted by its priority
+- deadline: the search with the earliest deadline, then the highest priority
+
+A search whose deadline has passed is not resumed, but every search gets at least one
+slice. The searches are anytime, so the game still gets the best move found so far.
+A search without a deadline, e.g. pondering, runs until it is done or cancelled.
+
+A job is a callable which gets the stop event, searches until it is done or the event
+is set and returns True once it is done. This is the signature of the resumable
+searches, e.g. `lambda stop: search.run(simulations, stop=stop)`.
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Hashable
+
+import numpy as np
+
+Job = Callable[[threading.Event], bool]
+
+POLICIES = ("fair", "deadline")
+
+
+class SearchTicket:
+    """Handle of a search submitted to the scheduler
+
+    All times are in seconds of time.monotonic().
+
+    Attributes:
+        session (Hashable): Session which submitted the search
+        priority (float): Weight of the session, a session with twice the priority gets twice the compute time
+        deadline (float | None): Time after which the search is not resumed
+        submitted (float): Time of the submission
+        started (float | None): Time the first slice started
+        finished (float | None): Time the search was done or expired
+        slices (int): Number of slices the search ran
+        compute_time (float): Seconds the search ran on a worker
+        expired (bool): True if the deadline ended the search before it was done
+        cancelled (bool): True if the search was cancelled before it was done
+        error (BaseException | None): Exception raised by the job
+    """
+
+    def __init__(
+        self,
+        session: Hashable,
+        job: Job,
+        priority: float,
+        deadline: float | None,
+        sequence: int,
+    ) -> None:
+        self.session = session
+        self.priority = priority
+        self.deadline = deadline
+        self.submitted = time.monotonic()
+        self.started: float | None = None
+        self.finished: float | None = None
+        self.slices = 0
+        self.compute_time = 0.0
+        self.expired = False
+        self.cancelled = False
+        self.error: BaseException | None = None
+        self._job = job
+        self._sequence = sequence
+        self._stop = threading.Event()
+        self._done = threading.Event()
+
+    def done(self) -> bool:
+        """True if the search is done or expired."""
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the search is done or expired.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait. Defaults to None.
+
+        Returns:
+            bool: True if the search is over, False if the timeout passed first
+
+        Raises:
+            BaseException: The exception raised by the job
+        """
+        if not self._done.wait(timeout):
+            return False
+        if self.error is not None:
+            raise self.error
+        return True
+
+
+class SearchScheduler:
+    """Worker threads which run the searches of all sessions in time slices
+
+    The queue is small compared to the work of a slice, so the next search is found
+    by a linear scan. This keeps the keys current while the usage of the sessions
+    changes. A session starts with the lowest usage of the waiting sessions, so
+    returning after a pause does not give it the workers for a long time.
+
+    Attributes:
+        workers (int): Number of worker threads
+        slice_time (float): Seconds a search runs before it can be interrupted
+        policy (str): "fair" or "deadline"
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        slice_time: float = 0.02,
+        policy: str = "fair",
+        history: int = 10_000,
+    ) -> None:
+        """Start the worker threads.
+
+        Args:
+            workers (int, optional): Number of worker threads. Defaults to None, which uses one per CPU.
+            slice_time (float, optional): Seconds a search runs before it can be interrupted. Defaults to 0.02.
+            policy (str, optional): "fair" share per session or earliest "deadline" first. Defaults to "fair".
+            history (int, optional): Number of recent wait times kept for the statistics. Defaults to 10_000.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy}")
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.slice_time = slice_time
+        self.policy = policy
+
+        self._condition = threading.Condition()
+        self._ready: list[SearchTicket] = []
+        self._running: dict[SearchTicket, float] = {}
+        self._usage: dict[Hashable, float] = {}
+        self._pending: dict[Hashable, int] = {}
+        self._sequence = itertools.count()
+        self._waits: deque[float] = deque(maxlen=history)
+        self._submitted = 0
+        self._completed = 0
+        self._expired = 0
+        self._closed = False
+
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(self.workers)
+        ]
+        self._threads.append(threading.Thread(target=self._preempt, daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self) -> "SearchScheduler":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def submit(
+        self,
+        session: Hashable,
+        job: Job,
+        deadline: float | None = None,
+        priority: float = 1.0,
+    ) -> SearchTicket:
+        """Queue a search.
+
+        Args:
+            session (Hashable): Session, e.g. the game, the compute time is shared between
+            job (Job): Search to run
+            deadline (float, optional): time.monotonic() after which the search is not resumed. Defaults to None.
+            priority (float, optional): Weight of the session. Defaults to 1.0.
+
+        Returns:
+            SearchTicket: Handle to wait for the search
+
+        Raises:
+            ValueError: If the priority is not positive
+            RuntimeError: If the scheduler is closed
+        """
+        if priority <= 0:
+            raise ValueError("Priority must be positive")
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Scheduler is closed")
+            ticket = SearchTicket(
+                session, job, priority, deadline, next(self._sequence)
+            )
+            if session not in self._usage:
+                self._usage[session] = min(
+                    (self._usage[other] for other in self._pending), default=0.0
+                )
+            self._pending[session] = self._pending.get(session, 0) + 1
+            self._ready.append(ticket)
+            self._submitted += 1
+            self._condition.notify_all()
+        return ticket
+
+    def run(
+        self,
+        session: Hashable,
+        job: Job,
+        deadline: float | None = None,
+        priority: float = 1.0,
+    ) -> SearchTicket:
+        """Submit a search and wait until it is done or expired.
+
+        Args:
+            session (Hashable): Session the compute time is shared between
+            job (Job): Search to run
+            deadline (float, optional): time.monotonic() after which the search is not resumed. Defaults to None.
+            priority (float, optional): Weight of the session. Defaults to 1.0.
+
+        Returns:
+            SearchTicket: Handle of the finished search
+        """
+        ticket = self.submit(session, job, deadline, priority)
+        ticket.wait()
+        return ticket
+
+    def cancel(self, ticket: SearchTicket) -> None:
+        """Stop a search, a running slice is interrupted and the search is not resumed.
+
+        Args:
+            ticket (SearchTicket): Handle of the search
+        """
+        with self._condition:
+            if ticket.done() or ticket.cancelled:
+                return
+            ticket.cancelled = True
+            ticket._stop.set()
+            if ticket in self._ready:
+                self._ready.remove(ticket)
+                self._finish(ticket, expired=False)
+
+    def _key(self, ticket: SearchTicket) -> tuple:
+        """Order of the waiting searches, the smallest runs next."""
+        if self.policy == "deadline":
+            deadline = ticket.deadline if ticket.deadline is not None else np.inf
+            return (deadline, -ticket.priority, ticket._sequence)
+        return (self._usage[ticket.session], ticket._sequence)
+
+    def _finish(self, ticket: SearchTicket, expired: bool) -> None:
+        """Mark a search as over, must be called with the lock held."""
+        ticket.finished = time.monotonic()
+        ticket.expired = expired
+        self._completed += 1
+        self._expired += expired
+        self._pending[ticket.session] -= 1
+        if not self._pending[ticket.session]:
+            del self._pending[ticket.session]
+            del self._usage[ticket.session]
+        ticket._done.set()
+
+    def _work(self) -> None:
+        """Run slices of the waiting searches until the scheduler is closed."""
+        while True:
+            with self._condition:
+                while not self._ready and not self._closed:
+                    self._condition.wait()
+                if not self._ready:
+                    return
+                ticket = min(self._ready, key=self._key)
+                self._ready.remove(ticket)
+
+                now = time.monotonic()
+                if ticket.started is None:
+                    ticket.started = now
+                    self._waits.append(now - ticket.submitted)
+                deadline = ticket.deadline
+                if ticket.slices and deadline is not None and now >= deadline:
+                    self._finish(ticket, expired=True)
+                    continue
+                ticket._stop.clear()
+                self._running[ticket] = now + self.slice_time
+                # Let the preemption thread time the new slice
+                self._condition.notify_all()
+
+            start = time.perf_counter()
+            try:
+                done = ticket._job(ticket._stop)
+            except BaseException as e:
+                ticket.error = e
+                done = True
+            elapsed = time.perf_counter() - start
+
+            with self._condition:
+                del self._running[ticket]
+                ticket.slices += 1
+                ticket.compute_time += elapsed
+                self._usage[ticket.session] += elapsed / ticket.priority
+                if done or ticket.cancelled:
+                    self._finish(ticket, expired=False)
+                elif (
+                    ticket.deadline is not None and time.monotonic() >= ticket.deadline
+                ):
+                    self._finish(ticket, expired=True)
+                else:
+                    self._ready.append(ticket)
+                self._condition.notify_all()
+
+    def _preempt(self) -> None:
+        """Interrupt searches whose slice is over while others wait or whose deadline passed.
+
+        The thread sleeps until the nearest slice end or deadline of the running searches
+        and without a timeout while nothing runs. Submissions and the start and end of
+        slices wake it up.
+        """
+        with self._condition:
+            while not self._closed or self._running or self._ready:
+                now = time.monotonic()
+                wake_up = np.inf
+                for ticket, slice_end in self._running.items():
+                    if ticket._stop.is_set():
+                        continue
+                    # The first slice is always run to its end
+                    expired = (
+                        ticket.deadline is not None
+                        and now >= ticket.deadline
+                        and (ticket.slices > 0 or now >= slice_end)
+                    )
+                    if expired or (self._ready and now >= slice_end):
+                        ticket._stop.set()
+                        continue
+                    if now < slice_end:
+                        wake_up = min(wake_up, slice_end)
+                    if ticket.deadline is not None and now < ticket.deadline:
+                        wake_up = min(wake_up, ticket.deadline)
+                self._condition.wait(wake_up - now if wake_up < np.inf else None)
+
+    def stats(self) -> dict[str, float]:
+        """Current queue depth and the wait times of the recent searches.
+
+        The wait time of a search is the time from its submission to its first slice.
+
+        Returns:
+            dict[str, float]: Statistics of the scheduler
+        """
+        with self._condition:
+            waits = np.array(self._waits)
+            stats = {
+                "queue_depth": len(self._ready),
+                "running": len(self._running),
+                "sessions": len(self._pending),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "expired": self._expired,
+            }
+        stats["wait_mean"] = float(waits.mean()) if len(waits) else 0.0
+        for name, percentile in (("wait_p50", 50), ("wait_p95", 95), ("wait_p99", 99)):
+            stats[name] = float(np.percentile(waits, percentile)) if len(waits) else 0.0
+        stats["wait_max"] = float(waits.max()) if len(waits) else 0.0
+        return stats
+
+    def close(self) -> None:
+        """Run the queued searches to their end and stop the worker threads."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
@@ -0,0 +1,236 @@
+"""
+Flat Monte Carlo search on array boards.
+
+Every candidate move is scored by the share of random playouts won after playing it.
+The search keeps its statistics between calls, so it can be run in several slices,
+interrupted and continued later with a bigger budget.
+
+The playouts are spread over the candidates by an allocator:
+- uniform: every candidate gets the same number of playouts
+- halving: sequential halving, the worse half of the candidates is dropped after every
+  round and the survivors share its budget. The search stops early once one move is
+  better than all others with high confidence.
+"""
+
+import math
+import threading
+from typing import Callable
+
+import numpy as np
+
+from games.hexai.board import opponent, random_rollout
+from games.hexai.symmetry import unique_moves
+
+Rollout = Callable[[np.ndarray, int, int, np.random.Generator], np.ndarray]
+
+
+class FlatMonteCarlo:
+    """Resumable flat Monte Carlo search for one position
+
+    Attributes:
+        cells (np.ndarray): Position which is searched
+        size (int): Size of the board
+        to_move (int): Player for whom the best move is searched
+        moves (np.ndarray): Candidate cells
+        visits (np.ndarray): Number of playouts per candidate
+        wins (np.ndarray): Number of playouts won by to_move per candidate
+    """
+
+    def __init__(
+        self,
+        cells: np.ndarray,
+        size: int,
+        to_move: int,
+        moves: np.ndarray | None = None,
+        rollout: Rollout = random_rollout,
+        rng: np.random.Generator | None = None,
+    ) -> None:
+        """Create a search for a position.
+
+        Args:
+            cells (np.ndarray): Position which is searched
+            size (int): Size of the board
+            to_move (int): Player for whom the best move is searched
+            moves (np.ndarray, optional): Candidate cells. Defaults to None, which uses all empty cells without symmetric duplicates.
+            rollout (Rollout, optional): Policy to play out the boards. Defaults to random_rollout.
+            rng (np.random.Generator, optional): Random generator. Defaults to None, which creates a new one.
+        """
+        self.cells = np.array(cells, dtype=np.int8)
+        self.size = size
+        self.to_move = to_move
+        self.moves = (
+            unique_moves(self.cells, size, to_move)
+            if moves is None
+            else np.asarray(moves, dtype=np.intp)
+        )
+        self.visits = np.zeros(len(self.moves), dtype=np.int64)
+        self.wins = np.zeros(len(self.moves), dtype=np.int64)
+        self._rollout = rollout
+        self._rng = rng if rng is not None else np.random.default_rng()
+
+    @property
+    def playouts(self) -> int:
+        """Total number of playouts done by the search."""
+        return int(self.visits.sum())
+
+    def simulate(self, candidates: np.ndarray) -> None:
+        """Run one playout for every entry of candidates.
+
+        Args:
+            candidates (np.ndarray): Indices into moves, may contain duplicates
+        """
+        if len(candidates) == 0:
+            return
+        boards = np.repeat(self.cells[None, :], len(candidates), axis=0)
+        boards[np.arange(len(candidates)), self.moves[candidates]] = self.to_move
+        won = self._rollout(boards, self.size, opponent(self.to_move), self._rng)
+        np.add.at(self.visits, candidates, 1)
+        np.add.at(self.wins, candidates, won == self.to_move)
+
+    def run(
+        self,
+        simulations: int,
+        batch_size: int = 2048,
+        stop: threading.Event | None = None,
+    ) -> bool:
+        """Run playouts until every candidate has at least the given number of visits.
+
+        Visits are added in rounds over all candidates, so an interrupted search has
+        an even sample of every move.
+
+        Args:
+            simulations (int): Number of playouts every candidate should have
+            batch_size (int, optional): Maximum number of playouts per batch. Defaults to 2048.
+            stop (threading.Event, optional): Event which interrupts the search when set. Defaults to None.
+
+        Returns:
+            bool: True if the budget was reached, False if the search was interrupted
+        """
+        if len(self.moves) == 0:
+            return True
+        per_round = max(1, batch_size // len(self.moves))
+        while True:
+            missing = np.clip(simulations - self.visits, 0, per_round)
+            if not missing.any():
+                return True
+            if stop is not None and stop.is_set():
+                return False
+            self.simulate(np.repeat(np.arange(len(self.moves)), missing))
+
+    def win_rates(self) -> np.ndarray:
+        """Share of won playouts per candidate, 0 for unvisited candidates."""
+        return self.wins / np.maximum(self.visits, 1)
+
+    def best_move(self) -> int:
+        """Get the candidate with the highest win rate.
+
+        Returns:
+            int: Cell index of the best move
+        """
+        return int(self.moves[np.argmax(self.win_rates())])
+
+
+class SequentialHalving:
+    """Sequential halving of the candidates of a flat search
+
+    The total budget is split evenly over ceil(log2(candidates)) rounds. In every round
+    the surviving candidates get an equal share of the round budget and the worse half
+    of them is dropped. Playouts the search already has, e.g. from pondering, count
+    towards the budget. After every round the leader is compared with the other
+    survivors by Hoeffding confidence bounds, a leader which is better than all of them
+    ends the search early.
+
+    Attributes:
+        search (FlatMonteCarlo): Search whose playouts are allocated
+        survivors (np.ndarray): Indices into search.moves of the remaining candidates
+        confidence (float): Confidence of the bounds for the early stop
+    """
+
+    def __init__(self, search: FlatMonteCarlo, confidence: float = 0.99) -> None:
+        """Allocate the playouts of a search.
+
+        Args:
+            search (FlatMonteCarlo): Search whose playouts are allocated
+            confidence (float, optional): Confidence of the bounds for the early stop, 1 disables it. Defaults to 0.99.
+        """
+        self.search = search
+        self.survivors = np.arange(len(search.moves))
+        self.confidence = confidence
+
+    def _fill(
+        self,
+        target: int,
+        batch_size: int,
+        stop: threading.Event | None,
+    ) -> bool:
+        """Run playouts until every survivor has at least target visits."""
+        per_round = max(1, batch_size // len(self.survivors))
+        while True:
+            missing = np.clip(target - self.search.visits[self.survivors], 0, per_round)
+            if not missing.any():
+                return True
+            if stop is not None and stop.is_set():
+                return False
+            self.search.simulate(np.repeat(self.survivors, missing))
+
+    def _dominant(self) -> bool:
+        """True if the best survivor is better than all others with the confidence."""
+        if self.confidence >= 1 or len(self.survivors) < 2:
+            return len(self.survivors) < 2
+        visits = np.maximum(self.search.visits[self.survivors], 1)
+        rates = self.search.win_rates()[self.survivors]
+        # Union bound over all survivors
+        radius = np.sqrt(
+            math.log(2 * len(self.survivors) / (1 - self.confidence)) / (2 * visits)
+        )
+        leader = int(np.argmax(rates))
+        upper = np.delete(rates + radius, leader)
+        return bool(rates[leader] - radius[leader] > upper.max())
+
+    def run(
+        self,
+        budget: int,
+        batch_size: int = 2048,
+        stop: threading.Event | None = None,
+    ) -> bool:
+        """Spend up to budget playouts in total on the candidates.
+
+        A second call with a bigger budget starts again from all candidates, but only
+        adds the playouts which are missing to reach the new round targets.
+
+        Args:
+            budget (int): Total number of playouts over all candidates
+            batch_size (int, optional): Maximum number of playouts per batch. Defaults to 2048.
+            stop (threading.Event, optional): Event which interrupts the search when set. Defaults to None.
+
+        Returns:
+            bool: True if the search finished, False if it was interrupted
+        """
+        self.survivors = np.arange(len(self.search.moves))
+        if len(self.survivors) == 0:
+            return True
+        rounds = max(1, math.ceil(math.log2(len(self.survivors))))
+        target = 0
+        for _ in range(rounds):
+            target += max(1, budget // (len(self.survivors) * rounds))
+            if not self._fill(target, batch_size, stop):
+                return False
+            rates = self.search.win_rates()[self.survivors]
+            order = np.argsort(-rates, kind="stable")
+            if self._dominant():
+                self.survivors = self.survivors[order[:1]]
+                return True
+            self.survivors = self.survivors[order[: (len(order) + 1) // 2]]
+        return True
+
+    def best_move(self) -> int:
+        """Get the surviving candidate with the highest win rate.
+
+        Returns:
+            int: Cell index of the best move
+        """
+        rates = self.search.win_rates()[self.survivors]
+        return int(self.search.moves[self.survivors[np.argmax(rates)]])
+
+
+ALLOCATORS = ("uniform", "halving")
@@ -0,0 +1,67 @@
+"""
+Settings of the AI search of a game of Hex.
+
+The search settings are grouped in one object, so a game, the tactical suite and the
+command line share them instead of passing every option on its own.
+"""
+
+from dataclasses import dataclass
+
+from games.hexai.evaluation import EVALUATORS
+from games.hexai.nodepool import DEFAULT_CAPACITY
+from games.hexai.search import ALLOCATORS
+
+SEARCH_MODES = ("flat", "uct", *EVALUATORS)
+
+
+@dataclass(frozen=True)
+class SearchSettings:
+    """How the AI searches its moves
+
+    Attributes:
+        mode (str): "flat" Monte Carlo, "uct" tree search, or "resistance" and "twodistance" for alpha-beta search with that evaluator
+        allocator (str): "uniform" gives every move of the flat search the same playouts, "halving" drops bad moves early and spends half of the playouts
+        depth (int): Depth in moves of the alpha-beta search
+        node_capacity (int): Maximum number of nodes of the tree search, bounds its memory
+        move_time (float | None): Seconds after which a search is stopped and the best move found until then is played, None searches the full budget
+        ponder (bool): Let the AI search while the human is thinking
+    """
+
+    mode: str = "flat"
+    allocator: str = "uniform"
+    depth: int = 2
+    node_capacity: int = DEFAULT_CAPACITY
+    move_time: float | None = None
+    ponder: bool = False
+
+    def __post_init__(self) -> None:
+        """Validate the settings.
+
+        Raises:
+            ValueError: If the mode or allocator is unknown, or a number is out of range
+        """
+        if self.mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {self.mode}")
+        if self.allocator not in ALLOCATORS:
+            raise ValueError(f"Unknown allocator: {self.allocator}")
+        if self.depth < 1:
+            raise ValueError("Search depth must be at least 1")
+        if self.node_capacity < 1:
+            raise ValueError("Node capacity must be at least 1")
+        if self.move_time is not None and self.move_time < 0:
+            raise ValueError("Move time can't be negative")
+
+    def check_size(self, size: int) -> None:
+        """Check that the search can grow a tree on a board of this size.
+
+        Args:
+            size (int): Size of the board
+
+        Raises:
+            ValueError: If the tree search can't hold the root and its children
+        """
+        needed = size * size + 1
+        if self.mode == "uct" and self.node_capacity < needed:
+            raise ValueError(
+                f"A tree search of size {size} needs a node capacity of at least {needed}"
+            )
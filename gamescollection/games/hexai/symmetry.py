@@ -0,0 +1,225 @@
+"""
+Symmetries of Hex positions.
+
+A Hex board keeps its meaning under four transformations:
+- identity
+- rotation by 180 degrees
+- transposing the board while swapping the colours and the player to move
+- both of the above
+
+All four are their own inverse. A position is canonicalized by applying the
+transformation which gives the smallest key, so equivalent positions share one entry in
+transposition tables and opening books. Root move generation only uses the
+transformations which leave the position unchanged, these make some moves redundant.
+"""
+
+import numpy as np
+
+from games.hexai.board import BLACK, EMPTY, WHITE
+from games.tablecache import load_table
+
+IDENTITY = 0
+ROTATION = 1
+SWAP_TRANSPOSE = 2
+SWAP_TRANSPOSE_ROTATION = 3
+
+# Transformations which swap the colours
+SWAPS_COLOURS = (False, False, True, True)
+
+_COLOUR_SWAP = np.array([BLACK, WHITE, EMPTY], dtype=np.int8)
+
+
+def permutations(size: int) -> np.ndarray:
+    """Cell permutations of the four transformations.
+
+    Args:
+        size (int): Size of the board
+
+    Returns:
+        np.ndarray: Array of shape (4, size * size), entry (t, c) is the cell c is moved to by t
+    """
+    return load_table(f"hex-symmetries-{size}", lambda: _build_permutations(size))
+
+
+def _build_permutations(size: int) -> np.ndarray:
+    """Build the permutations of permutations."""
+    x, y = np.divmod(np.arange(size * size), size)
+    return np.stack(
+        [
+            x * size + y,
+            (size - 1 - x) * size + (size - 1 - y),
+            y * size + x,
+            (size - 1 - y) * size + (size - 1 - x),
+        ]
+    )
+
+
+def transform(
+    cells: np.ndarray, size: int, to_move: int, symmetry: int
+) -> tuple[np.ndarray, int]:
+    """Apply a transformation to a position.
+
+    Args:
+        cells (np.ndarray): Position
+        size (int): Size of the board
+        to_move (int): Player to move
+        symmetry (int): Transformation, one of IDENTITY, ROTATION, SWAP_TRANSPOSE and SWAP_TRANSPOSE_ROTATION
+
+    Returns:
+        tuple[np.ndarray, int]: Transformed position and player to move
+    """
+    result = np.empty_like(cells)
+    result[permutations(size)[symmetry]] = cells
+    if SWAPS_COLOURS[symmetry]:
+        return _COLOUR_SWAP[result], int(_COLOUR_SWAP[to_move])
+    return result, to_move
+
+
+def transform_move(move: int, size: int, symmetry: int) -> int:
+    """Map a move into the transformed position, also maps it back since every transformation is its own inverse.
+
+    Args:
+        move (int): Cell index of the move
+        size (int): Size of the board
+        symmetry (int): Transformation
+
+    Returns:
+        int: Cell index of the move after the transformation
+    """
+    return int(permutations(size)[symmetry][move])
+
+
+def canonical(cells: np.ndarray, size: int, to_move: int) -> tuple[bytes, int]:
+    """Canonical key of a position.
+
+    Args:
+        cells (np.ndarray): Position
+        size (int): Size of the board
+        to_move (int): Player to move
+
+    Returns:
+        tuple[bytes, int]: Key which is the same for all equivalent positions, and the
+            transformation which maps the position to the canonical one
+    """
+    keys = []
+    for symmetry in range(4):
+        transformed, player = transform(cells, size, to_move, symmetry)
+        keys.append(bytes([size, player]) + transformed.astype(np.int8).tobytes())
+    symmetry = min(range(4), key=keys.__getitem__)
+    return keys[symmetry], symmetry
+
+
+def unique_moves(cells: np.ndarray, size: int, to_move: int) -> np.ndarray:
+    """Legal moves without the ones which are equivalent to another legal move.
+
+    Only the rotation can leave a position unchanged, the transformations which swap the
+    colours also swap the player to move.
+
+    Args:
+        cells (np.ndarray): Position
+        size (int): Size of the board
+        to_move (int): Player to move
+
+    Returns:
+        np.ndarray: Cell indices of the moves, one of every class of equivalent moves
+    """
+    moves = np.flatnonzero(cells == EMPTY)
+    rotated, _ = transform(cells, size, to_move, ROTATION)
+    if not np.array_equal(rotated, cells):
+        return moves
+    partner = permutations(size)[ROTATION][moves]
+    return moves[moves <= partner]
+
+
+def rotation_twin(cells: np.ndarray, size: int, to_move: int, move: int) -> int | None:
+    """Move which unique_moves keeps in place of a move it drops.
+
+    Args:
+        cells (np.ndarray): Position before the move
+        size (int): Size of the board
+        to_move (int): Player to move
+        move (int): Cell index of the move
+
+    Returns:
+        int | None: Cell index of the equivalent move by the rotation, None if the
+            position is not symmetric under the rotation
+    """
+    rotated, _ = transform(cells, size, to_move, ROTATION)
+    if not np.array_equal(rotated, cells):
+        return None
+    return transform_move(move, size, ROTATION)
+
+
+class OpeningBook:
+    """Book of known best moves, stored once per class of equivalent positions
+
+    Attributes:
+        entries (dict[bytes, int]): Best move in the canonical position for every canonical key
+    """
+
+    def __init__(self) -> None:
+        self.entries: dict[bytes, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def store(self, cells: np.ndarray, size: int, to_move: int, move: int) -> None:
+        """Add the best move of a position.
+
+        Args:
+            cells (np.ndarray): Position
+            size (int): Size of the board
+            to_move (int): Player to move
+            move (int): Cell index of the best move
+        """
+        key, symmetry = canonical(cells, size, to_move)
+        self.entries[key] = transform_move(move, size, symmetry)
+
+    def lookup(self, cells: np.ndarray, size: int, to_move: int) -> int | None:
+        """Get the best move of a position or of an equivalent one.
+
+        Args:
+            cells (np.ndarray): Position
+            size (int): Size of the board
+            to_move (int): Player to move
+
+        Returns:
+            int | None: Cell index of the move in the given position, None if the position is unknown
+        """
+        key, symmetry = canonical(cells, size, to_move)
+        move = self.entries.get(key)
+        return None if move is None else transform_move(move, size, symmetry)
+
+    def save(self, file_path: str) -> None:
+        """Save the book as a .npz file with one array of keys and moves per board size.
+
+        Args:
+            file_path (str): Path of the file
+        """
+        arrays: dict[str, np.ndarray] = {}
+        for size in sorted({key[0] for key in self.entries}):
+            keys = [key for key in self.entries if key[0] == size]
+            arrays[f"keys_{size}"] = np.frombuffer(
+                b"".join(keys), dtype=np.int8
+            ).reshape(len(keys), -1)
+            arrays[f"moves_{size}"] = np.array([self.entries[key] for key in keys])
+        np.savez_compressed(file_path, **arrays)
+
+    @classmethod
+    def load(cls, file_path: str) -> "OpeningBook":
+        """Load a book saved with save().
+
+        Args:
+            file_path (str): Path of the file
+
+        Returns:
+            OpeningBook: Loaded book
+        """
+        book = cls()
+        with np.load(file_path) as data:
+            for name in data.files:
+                if name.startswith("keys_"):
+                    moves = data["moves_" + name[len("keys_") :]]
+                    for key, move in zip(data[name], moves):
+                        book.entries[key.tobytes()] = int(move)
+        return book
@@ -0,0 +1,943 @@
+"""
+Tactical test suite for the Hex AI.
+
+Speed alone does not show whether a faster search still finds the right move. The
+suite contains positions with a known set of winning moves, in the categories:
+- bridge: the opponent intruded into a bridge, the other carrier cell has to be taken
+- edge: the opponent intruded into an edge template, the other edge cell has to be taken
+- block: the opponent threatens to win with the next move and has to be stopped
+- forced: the player to move has a forced win which starts with this move
+- local: a larger board with many empty cells, on which one small region decides the game
+
+The positions come from self-play and random games and their winning moves were proven
+by the exhaustive search in this module, `verify_suite` repeats that proof. The local
+positions are proven within their region, the rest of their board is too large for an
+exhaustive search. Every position has one or two winning moves and no immediately
+winning one.
+
+The runner gives every AI configuration a doubling budget per position, starting from
+STARTING_BUDGET, and records the move after every step. A position counts as solved if the move after the largest budget
+wins, it settled at the first budget from which on every move won. The simulations and
+seconds until then are the quality-per-compute measure. Alpha-beta configurations count
+evaluated positions as simulations and deepen instead of doubling.
+"""
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Iterator, Sequence
+
+import numpy as np
+
+from games.hexai.board import EMPTY, WHITE, opponent
+from games.hexai.evaluation import EVALUATORS, AlphaBetaSearch
+from games.hexai.notation import from_text
+from games.hexai.search import FlatMonteCarlo, SequentialHalving
+from games.hexai.settings import SearchSettings
+from games.hexai.tree import TreeSearch
+
+CATEGORIES = ("bridge", "edge", "block", "forced", "local")
+
+# First budget of the playout searches, small enough that easy positions settle earlier
+# than hard ones
+STARTING_BUDGET = 8
+
+# Node capacity of the tree searches, the suite positions need far less than a game
+TREE_CAPACITY = 200_000
+
+# Search settings of the AI configurations, as Hex takes them
+CONFIGS: dict[str, SearchSettings] = {
+    "flat": SearchSettings(),
+    "halving": SearchSettings(allocator="halving"),
+    "uct": SearchSettings(mode="uct", node_capacity=TREE_CAPACITY),
+    "resistance": SearchSettings(mode="resistance", depth=3),
+    "twodistance": SearchSettings(mode="twodistance", depth=3),
+}
+
+
+@dataclass(frozen=True)
+class TacticalPosition:
+    """Position of the suite
+
+    Attributes:
+        name (str): Unique name
+        category (str): One of CATEGORIES
+        position (str): Position in text notation, including the player to move
+        solutions (tuple[tuple[int, int], ...]): All winning moves as (x, y)
+        region (tuple[tuple[int, int], ...] | None): Cells as (x, y) in which the position is decided, None for the whole board
+    """
+
+    name: str
+    category: str
+    position: str
+    solutions: tuple[tuple[int, int], ...]
+    region: tuple[tuple[int, int], ...] | None = None
+
+
+SUITE: tuple[TacticalPosition, ...] = (
+    TacticalPosition(
+        "bridge-4a",
+        "bridge",
+        "4:..../..../X.OX/OXOX:O",
+        ((1, 2), (2, 1)),
+    ),
+    TacticalPosition("bridge-4b", "bridge", "4:X..X/.XO./.O.O/XO..:X", ((2, 0),)),
+    TacticalPosition("edge-4a", "edge", "4:..../..OX/X.XO/O.X.:O", ((0, 3),)),
+    TacticalPosition("edge-4b", "edge", "4:...X/.XOO/.XOX/.O..:X", ((3, 0),)),
+    TacticalPosition("block-4a", "block", "4:...O/..X./..XO/O.XX:O", ((0, 2),)),
+    TacticalPosition("block-4b", "block", "4:...O/O.OX/XO../XX..:X", ((1, 1),)),
+    TacticalPosition(
+        "forced-4a",
+        "forced",
+        "4:...X/..OO/.XX./O.X.:O",
+        ((0, 1), (1, 1)),
+    ),
+    TacticalPosition(
+        "forced-4b",
+        "forced",
+        "4:...X/..OO/.X.O/XO.X:X",
+        ((1, 0), (1, 1)),
+    ),
+    TacticalPosition(
+        "bridge-5a",
+        "bridge",
+        "5:...XO/..OXO/..X.X/X.O../OO.X.:X",
+        ((2, 3),),
+    ),
+    TacticalPosition(
+        "bridge-5b",
+        "bridge",
+        "5:..X.X/O...X/.OXO./.XX../OOOX.:O",
+        ((3, 3),),
+    ),
+    TacticalPosition(
+        "bridge-5c",
+        "bridge",
+        "5:...../.XX.X/..OOX/OOX../XOXOO:X",
+        ((3, 3),),
+    ),
+    TacticalPosition("edge-5a", "edge", "5:....O/..X../..XXX/OOOOX/X..O.:X", ((4, 4),)),
+    TacticalPosition("edge-5b", "edge", "5:...X./.OXXX/.OXOX/.OO.X/...O.:O", ((4, 4),)),
+    TacticalPosition("edge-5c", "edge", "5:.O..O/OXOOX/XOX../XXO.X/.....:X", ((0, 2),)),
+    TacticalPosition(
+        "block-5a",
+        "block",
+        "5:...../O.X.X/OOOOX/XX.O./.X...:X",
+        ((3, 4),),
+    ),
+    TacticalPosition(
+        "block-5b",
+        "block",
+        "5:....X/..OX./OOX../XOXX./XOO..:O",
+        ((4, 3),),
+    ),
+    TacticalPosition(
+        "block-5c",
+        "block",
+        "5:...../O.OXO/X.OOX/.XXX./O.X.O:X",
+        ((1, 1),),
+    ),
+    TacticalPosition(
+        "forced-5a",
+        "forced",
+        "5:....X/..O.X/OX.OX/..XOO/.OX..:X",
+        ((1, 1), (2, 2)),
+    ),
+    TacticalPosition(
+        "forced-5b",
+        "forced",
+        "5:...X./.OXXX/.XOOX/OO.../X.O..:O",
+        ((3, 4), (4, 3)),
+    ),
+    TacticalPosition(
+        "forced-5c",
+        "forced",
+        "5:...OO/...XX/X..OX/OO.X./X.XOO:X",
+        ((1, 2),),
+    ),
+    TacticalPosition(
+        "bridge-6a",
+        "bridge",
+        "6:..X.OO/.XOOX./.XXXX./OOO.X./...OX./.X..O.:O",
+        ((5, 3),),
+    ),
+    TacticalPosition(
+        "bridge-6b",
+        "bridge",
+        "6:X..X../..X.X./.X..OO/X.OXOO/OOX.../XXOOO.:X",
+        ((2, 3),),
+    ),
+    TacticalPosition(
+        "edge-6a",
+        "edge",
+        "6:XOX.XX/.OOOOX/XXO.X./XO.X../XOOO../X..O..:O",
+        ((1, 0),),
+    ),
+    TacticalPosition(
+        "block-6a",
+        "block",
+        "6:...X../...X../..OXX./OOOOX./XOXXX./XOOO..:O",
+        ((5, 4),),
+    ),
+    TacticalPosition(
+        "block-6b",
+        "block",
+        "6:.O...X/OXO.X./XXXOXO/XOOOO./..X.../...O.X:X",
+        ((4, 0),),
+    ),
+    TacticalPosition(
+        "forced-6a",
+        "forced",
+        "6:...XOX/OOXOXO/X.XOO./..XOX./..OXX./...O..:X",
+        ((4, 1),),
+    ),
+    TacticalPosition(
+        "forced-6b",
+        "forced",
+        "6:..XXXO/XOOOX./..X.../.OO.O./O.XO../OX.XX.:X",
+        ((3, 3),),
+    ),
+    TacticalPosition(
+        "local-7a",
+        "local",
+        "7:..O..X./....XOO/O.O..O./....XXX/......X/.O....X/......X:O",
+        ((2, 4),),
+        (
+            (2, 1),
+            (2, 3),
+            (2, 4),
+            (3, 0),
+            (3, 1),
+            (3, 2),
+            (3, 3),
+            (4, 0),
+            (4, 1),
+            (4, 2),
+            (5, 0),
+        ),
+    ),
+    TacticalPosition(
+        "local-7b",
+        "local",
+        "7:.OOO..O/O....../.....X./OO.XX../....X../...XX../....X..:X",
+        ((0, 5), (1, 4)),
+        (
+            (0, 4),
+            (0, 5),
+            (1, 3),
+            (1, 4),
+            (1, 5),
+            (2, 2),
+            (2, 3),
+            (2, 4),
+            (3, 2),
+            (4, 1),
+            (4, 2),
+        ),
+    ),
+    TacticalPosition(
+        "local-7c",
+        "local",
+        "7:.....X./....X../..OOOOO/......./X....../X....../X......:X",
+        ((2, 1),),
+        (
+            (0, 0),
+            (0, 1),
+            (0, 3),
+            (1, 0),
+            (1, 1),
+            (1, 2),
+            (1, 3),
+            (2, 0),
+            (2, 1),
+            (3, 0),
+            (3, 1),
+        ),
+    ),
+    TacticalPosition(
+        "local-7d",
+        "local",
+        "7:O.X...X/..X...X/..X..XO/OO...O./....O../...O.../.X.....:X",
+        ((4, 2),),
+        (
+            (2, 3),
+            (3, 2),
+            (3, 3),
+            (3, 4),
+            (4, 1),
+            (4, 2),
+            (4, 3),
+            (5, 0),
+            (5, 1),
+            (5, 2),
+            (6, 0),
+        ),
+    ),
+    TacticalPosition(
+        "local-7e",
+        "local",
+        "7:.....X./....X../....XXO/OOOO.../......./..XOO../..X.X..:X",
+        ((3, 5), (4, 3)),
+        (
+            (3, 4),
+            (3, 5),
+            (3, 6),
+            (4, 3),
+            (4, 4),
+            (4, 5),
+            (4, 6),
+            (5, 5),
+            (5, 6),
+            (6, 5),
+            (6, 6),
+        ),
+    ),
+    TacticalPosition(
+        "local-7f",
+        "local",
+        "7:.X...../.X...../.X...../.XXXX.O/OO...../OOOO.../O..X...:X",
+        ((4, 5),),
+        (
+            (2, 5),
+            (2, 6),
+            (3, 5),
+            (4, 4),
+            (4, 5),
+            (4, 6),
+            (5, 4),
+            (5, 5),
+            (5, 6),
+            (6, 4),
+            (6, 5),
+        ),
+    ),
+    TacticalPosition(
+        "local-7g",
+        "local",
+        "7:OO.XO../..O..../OOO.O.X/.XX...X/XO.O..X/XXX..X./..XOXO.:O",
+        ((1, 5),),
+        (
+            (0, 5),
+            (0, 6),
+            (1, 3),
+            (1, 4),
+            (1, 5),
+            (1, 6),
+            (2, 3),
+            (2, 5),
+            (3, 3),
+            (3, 5),
+            (4, 2),
+        ),
+    ),
+    TacticalPosition(
+        "local-7h",
+        "local",
+        "7:......X/X....XX/OOOXX../...X.../....O.O/O....O./.X.....:O",
+        ((5, 2),),
+        (
+            (3, 2),
+            (4, 1),
+            (4, 2),
+            (4, 3),
+            (4, 5),
+            (5, 1),
+            (5, 2),
+            (5, 3),
+            (5, 4),
+            (6, 2),
+            (6, 3),
+        ),
+    ),
+    TacticalPosition(
+        "local-7i",
+        "local",
+        "7:.X..X../.XOO.../.O.X.../OXOOX../OO..X../.X..XOO/...X...:X",
+        ((1, 5), (2, 4)),
+        (
+            (0, 5),
+            (0, 6),
+            (1, 4),
+            (1, 5),
+            (1, 6),
+            (2, 4),
+            (2, 5),
+            (2, 6),
+            (3, 5),
+            (3, 6),
+            (4, 5),
+        ),
+    ),
+    TacticalPosition(
+        "local-7j",
+        "local",
+        "7:....XOO/...X..X/...X.../..OO.../OO..X.X/..O.X../.O..X..:X",
+        ((2, 4),),
+        (
+            (1, 4),
+            (1, 5),
+            (2, 4),
+            (2, 5),
+            (2, 6),
+            (3, 4),
+            (3, 5),
+            (3, 6),
+            (4, 5),
+            (5, 5),
+            (6, 5),
+        ),
+    ),
+    TacticalPosition(
+        "local-8a",
+        "local",
+        "8:.X....XX/.......X/..OO..X./OOXO.X../...OOXOO/....O.../..X...../......X.:X",
+        ((5, 5),),
+        (
+            (5, 5),
+            (5, 6),
+            (5, 7),
+            (6, 4),
+            (6, 5),
+            (6, 6),
+            (6, 7),
+            (7, 2),
+            (7, 3),
+            (7, 4),
+            (7, 5),
+        ),
+    ),
+    TacticalPosition(
+        "local-8b",
+        "local",
+        "8:......OO/OOO...../.....X../X..O.X.X/...O.X../..XO.X../...O.XX./OOO..XXX:X",
+        ((1, 4),),
+        (
+            (0, 3),
+            (0, 4),
+            (0, 5),
+            (1, 3),
+            (1, 4),
+            (1, 5),
+            (1, 6),
+            (2, 3),
+            (2, 4),
+            (3, 4),
+            (4, 4),
+        ),
+    ),
+    TacticalPosition(
+        "local-8c",
+        "local",
+        "8:...X...O/...X..O./...X.O../..X.O.../.X.O..../.XXO..../......../O....X..:O",
+        ((6, 2),),
+        (
+            (5, 4),
+            (6, 0),
+            (6, 1),
+            (6, 2),
+            (6, 3),
+            (6, 4),
+            (6, 5),
+            (7, 1),
+            (7, 2),
+            (7, 3),
+            (7, 4),
+        ),
+    ),
+    TacticalPosition(
+        "local-8d",
+        "local",
+        "8:.OOO..../O..OOO../.O.....O/......X./..X..OXX/..X....X/.X....X./.X....X.:X",
+        ((1, 6),),
+        (
+            (0, 6),
+            (0, 7),
+            (1, 6),
+            (1, 7),
+            (2, 5),
+            (2, 6),
+            (3, 3),
+            (3, 4),
+            (3, 5),
+            (4, 3),
+            (4, 4),
+        ),
+    ),
+    TacticalPosition(
+        "local-8e",
+        "local",
+        "8:..XOOO../OXO..OO./X..X..OO/...X..../X.OXX.../..X.X.../...X..../...XO...:O",
+        ((3, 1),),
+        (
+            (2, 1),
+            (2, 2),
+            (3, 0),
+            (3, 1),
+            (3, 2),
+            (4, 1),
+            (5, 0),
+            (5, 1),
+            (6, 0),
+            (6, 1),
+            (7, 0),
+        ),
+    ),
+    TacticalPosition(
+        "local-9a",
+        "local",
+        "9:.X.O...XO/OXX...X.O/..XXX..O./.OOO..OO./OO....XXX/O.O.....X/OOX..XXX./..XXXO..O/..XO....O:X",
+        ((3, 5), (4, 4)),
+        (
+            (2, 5),
+            (2, 6),
+            (3, 4),
+            (3, 5),
+            (4, 3),
+            (4, 4),
+            (4, 5),
+            (5, 3),
+            (5, 4),
+            (5, 5),
+            (6, 4),
+        ),
+    ),
+    TacticalPosition(
+        "local-9b",
+        "local",
+        "9:.X..X..../..XX....O/.X.....O./.X..OOO../.X.O...../.X.OX..../X.OO...../X..O...../.........:O",
+        ((8, 0),),
+        (
+            (6, 5),
+            (6, 6),
+            (7, 1),
+            (7, 2),
+            (7, 4),
+            (7, 5),
+            (8, 0),
+            (8, 1),
+            (8, 2),
+            (8, 3),
+            (8, 4),
+        ),
+    ),
+    TacticalPosition(
+        "local-9c",
+        "local",
+        "9:......X../...OOOX../..O..O.OO/.O..O..../.O.....X./O..X..X../..X..X.../.X...X.../.X..X....:X",
+        ((2, 6),),
+        (
+            (2, 6),
+            (3, 5),
+            (3, 6),
+            (3, 7),
+            (3, 8),
+            (4, 4),
+            (4, 5),
+            (4, 6),
+            (5, 4),
+            (5, 5),
+            (6, 3),
+        ),
+    ),
+    TacticalPosition(
+        "local-9d",
+        "local",
+        "9:.....X.X./....X.XO./....X.X.O/....X.XO./.O..X..X./.......X./...O..X../.OOX.O.../O....OOOO:X",
+        ((6, 4), (6, 5)),
+        (
+            (4, 5),
+            (4, 6),
+            (5, 4),
+            (5, 5),
+            (5, 6),
+            (6, 4),
+            (6, 5),
+            (7, 4),
+            (8, 1),
+            (8, 2),
+            (8, 3),
+        ),
+    ),
+)
+
+
+class _Solver:
+    """Exhaustive search on bitboards, one Python int per player
+
+    Cells are bits at index x * size + y. Known results are kept per position, and a
+    player facing two immediate threats is lost, facing one has to block it.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.full = (1 << size * size) - 1
+        first_column = sum(1 << x * size for x in range(size))
+        self._not_first = self.full & ~first_column
+        self._not_last = self.full & ~(first_column << size - 1)
+        north = (1 << size) - 1
+        west = first_column
+        self._edges = {
+            WHITE: (north, north << size * (size - 1)),
+            opponent(WHITE): (west, west << size - 1),
+        }
+        self._known: dict[tuple[int, int, int], bool] = {}
+
+    def _grow(self, stones: int) -> int:
+        """Add the neighbours of all stones."""
+        size = self.size
+        return self.full & (
+            stones
+            | (stones << 1) & self._not_first
+            | (stones >> 1) & self._not_last
+            | stones << size
+            | stones >> size
+            | (stones >> size - 1) & self._not_first
+            | (stones << size - 1) & self._not_last
+        )
+
+    def connected(self, stones: int, player: int) -> bool:
+        """True if the stones connect both edges of player."""
+        start, end = self._edges[player]
+        reached = stones & start
+        while not reached & end:
+            grown = self._grow(reached) & stones
+            if grown == reached:
+                return False
+            reached = grown
+        return True
+
+    def wins(self, own: int, other: int, player: int) -> bool:
+        """True if player, who owns the stones own, wins with the move."""
+        key = (own, other, player)
+        if key in self._known:
+            return self._known[key]
+
+        empty = self.full & ~own & ~other
+        result = False
+        if self.connected(own | empty, player):
+            moves = []
+            while empty:
+                move = empty & -empty
+                empty ^= move
+                moves.append(move)
+            if any(self.connected(own | move, player) for move in moves):
+                result = True
+            else:
+                threats = [
+                    move
+                    for move in moves
+                    if self.connected(other | move, opponent(player))
+                ]
+                if len(threats) < 2:
+                    result = any(
+                        not self.wins(other, own | move, opponent(player))
+                        for move in threats or moves
+                    )
+        self._known[key] = result
+        return result
+
+
+def _bits(cells: np.ndarray) -> int:
+    """Bitboard of the cell indices."""
+    return sum(1 << int(cell) for cell in cells)
+
+
+def winning_moves(
+    cells: np.ndarray, size: int, to_move: int, region: np.ndarray | None = None
+) -> np.ndarray:
+    """All moves with which the player to move wins, by exhaustive search.
+
+    The search is exponential in the number of empty cells it plays. With a region
+    only its empty cells are played: a move wins if it still wins when the opponent
+    owns all other empty cells, and loses if it still loses when the player to move
+    owns them. Extra stones never hurt their owner in Hex, so both are proofs for the
+    real position.
+
+    Args:
+        cells (np.ndarray): Position
+        size (int): Size of the board
+        to_move (int): Player to move
+        region (np.ndarray, optional): Cell indices in which the position is decided. Defaults to None, which plays the whole board.
+
+    Returns:
+        np.ndarray: Cell indices of the winning moves
+
+    Raises:
+        ValueError: If a move neither wins nor loses independent of the cells outside the region
+    """
+    solver = _Solver(size)
+    own = _bits(np.flatnonzero(cells == to_move))
+    other = _bits(np.flatnonzero(cells == opponent(to_move)))
+    empty = np.flatnonzero(cells == EMPTY)
+    outside = 0 if region is None else _bits(np.setdiff1d(empty, region))
+
+    winning = []
+    for cell in empty:
+        move = 1 << int(cell)
+        rest = outside & ~move
+        # The cells outside the region can already connect the opponent
+        if solver.connected(own | move, to_move) or not (
+            solver.connected(other | rest, opponent(to_move))
+            or solver.wins(other | rest, own | move, opponent(to_move))
+        ):
+            winning.append(cell)
+        elif not solver.wins(other, own | move | rest, opponent(to_move)):
+            raise ValueError(
+                f"Move {divmod(int(cell), size)} is not decided in the region"
+            )
+    return np.array(winning, dtype=np.intp)
+
+
+def verify_suite(
+    positions: Sequence[TacticalPosition] = SUITE,
+) -> list[str]:
+    """Prove the solutions of the positions again.
+
+    Args:
+        positions (Sequence[TacticalPosition], optional): Positions to check. Defaults to SUITE.
+
+    Returns:
+        list[str]: Names of the positions whose solutions are wrong
+    """
+    wrong = []
+    for entry in positions:
+        cells, size, to_move = from_text(entry.position)
+        solutions = sorted(x * size + y for x, y in entry.solutions)
+        region = (
+            np.array([x * size + y for x, y in entry.region])
+            if entry.region is not None
+            else None
+        )
+        try:
+            proven = winning_moves(cells, size, to_move, region).tolist()
+        except ValueError:
+            proven = None
+        if solutions != proven:
+            wrong.append(entry.name)
+    return wrong
+
+
+def _steps(
+    config: SearchSettings,
+    cells: np.ndarray,
+    size: int,
+    to_move: int,
+    max_simulations: int,
+    rng: np.random.Generator,
+) -> Iterator[tuple[int, int]]:
+    """Run a configuration with growing budgets.
+
+    Yields:
+        tuple[int, int]: Best move and the simulations so far after every step
+    """
+    if config.mode in EVALUATORS:
+        search = AlphaBetaSearch(cells, size, to_move, evaluator=config.mode)
+        # Deeper searches reuse the transposition table of the shallower ones
+        for depth in range(1, config.depth + 1):
+            search.depth = depth
+            yield search.run(), search.nodes
+        return
+
+    budgets = []
+    budget = STARTING_BUDGET
+    while budget < max_simulations:
+        budgets.append(budget)
+        budget *= 2
+    budgets.append(max_simulations)
+
+    if config.mode == "uct":
+        tree = TreeSearch(cells, size, to_move, capacity=config.node_capacity, rng=rng)
+        for budget in budgets:
+            tree.run(budget)
+            yield tree.best_move(), tree.playouts
+        return
+
+    search = FlatMonteCarlo(cells, size, to_move, rng=rng)
+    allocation = SequentialHalving(search) if config.allocator == "halving" else None
+    for budget in budgets:
+        if allocation is not None:
+            allocation.run(budget)
+            yield allocation.best_move(), search.playouts
+        else:
+            search.run(max(1, budget // len(search.moves)))
+            yield search.best_move(), search.playouts
+
+
+@dataclass
+class TacticResult:
+    """Result of one AI configuration on one position
+
+    Attributes:
+        name (str): Name of the position
+        category (str): Category of the position
+        size (int): Size of the board
+        config (str): Name of the AI configuration
+        solved (bool): True if the final move wins
+        move (tuple[int, int]): Final move as (x, y)
+        simulations (int): Simulations of the whole run
+        seconds (float): Seconds of the whole run
+        settled_simulations (int | None): Simulations until the move stayed correct, None if not solved
+        settled_seconds (float | None): Seconds until the move stayed correct, None if not solved
+    """
+
+    name: str
+    category: str
+    size: int
+    config: str
+    solved: bool
+    move: tuple[int, int]
+    simulations: int
+    seconds: float
+    settled_simulations: int | None
+    settled_seconds: float | None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Result as dictionary, e.g. to write it as JSON."""
+        return asdict(self)
+
+
+def solve_position(
+    entry: TacticalPosition,
+    config: str,
+    max_simulations: int = 16_384,
+    rng: np.random.Generator | None = None,
+) -> TacticResult:
+    """Let one AI configuration solve one position.
+
+    Args:
+        entry (TacticalPosition): Position of the suite
+        config (str): Name of the configuration in CONFIGS
+        max_simulations (int, optional): Largest budget of the playout searches. Defaults to 16_384.
+        rng (np.random.Generator, optional): Random generator of the searches. Defaults to None.
+
+    Returns:
+        TacticResult: Whether and how fast the position was solved
+    """
+    cells, size, to_move = from_text(entry.position)
+    solutions = {x * size + y for x, y in entry.solutions}
+    rng = rng if rng is not None else np.random.default_rng()
+
+    history: list[tuple[int, int, float]] = []
+    start = time.perf_counter()
+    for move, simulations in _steps(
+        CONFIGS[config], cells, size, to_move, max_simulations, rng
+    ):
+        history.append((move, simulations, time.perf_counter() - start))
+
+    settled: tuple[int, int, float] | None = None
+    for step in reversed(history):
+        if step[0] not in solutions:
+            break
+        settled = step
+    move, simulations, seconds = history[-1]
+    return TacticResult(
+        name=entry.name,
+        category=entry.category,
+        size=size,
+        config=config,
+        solved=move in solutions,
+        move=divmod(move, size),
+        simulations=simulations,
+        seconds=seconds,
+        settled_simulations=settled[1] if settled is not None else None,
+        settled_seconds=settled[2] if settled is not None else None,
+    )
+
+
+def run_suite(
+    configs: Sequence[str] | None = None,
+    positions: Sequence[TacticalPosition] = SUITE,
+    max_simulations: int = 16_384,
+    repeats: int = 1,
+    seed: int | None = None,
+) -> list[TacticResult]:
+    """Run AI configurations on the positions of the suite.
+
+    Args:
+        configs (Sequence[str], optional): Names of the configurations in CONFIGS. Defaults to None, which runs all.
+        positions (Sequence[TacticalPosition], optional): Positions to solve. Defaults to SUITE.
+        max_simulations (int, optional): Largest budget of the playout searches. Defaults to 16_384.
+        repeats (int, optional): Runs per configuration and position, the searches are random. Defaults to 1.
+        seed (int, optional): Seed of the searches. Defaults to None.
+
+    Returns:
+        list[TacticResult]: One result per configuration, position and repeat
+
+    Raises:
+        ValueError: If a configuration is unknown
+    """
+    configs = list(configs) if configs is not None else list(CONFIGS)
+    for config in configs:
+        if config not in CONFIGS:
+            raise ValueError(f"Unknown configuration: {config}")
+
+    rng = np.random.default_rng(seed)
+    return [
+        solve_position(entry, config, max_simulations, rng)
+        for config in configs
+        for entry in positions
+        for _ in range(repeats)
+    ]
+
+
+def summarize(results: Sequence[TacticResult]) -> dict[str, dict[str, Any]]:
+    """Aggregate results per configuration.
+
+    Args:
+        results (Sequence[TacticResult]): Results of run_suite
+
+    Returns:
+        dict[str, dict[str, Any]]: Share of solved runs overall and per category, and the
+            mean simulations and seconds until the solved runs settled
+    """
+    summary: dict[str, dict[str, Any]] = {}
+    for config in dict.fromkeys(result.config for result in results):
+        own = [result for result in results if result.config == config]
+        solved = [result for result in own if result.solved]
+        summary[config] = {
+            "runs": len(own),
+            "solved": len(solved) / len(own),
+            "categories": {
+                category: float(
+                    np.mean([r.solved for r in own if r.category == category])
+                )
+                for category in CATEGORIES
+                if any(r.category == category for r in own)
+            },
+            "settled_simulations": (
+                float(np.mean([r.settled_simulations for r in solved]))
+                if solved
+                else None
+            ),
+            "settled_seconds": (
+                float(np.mean([r.settled_seconds for r in solved])) if solved else None
+            ),
+            "seconds": float(np.mean([r.seconds for r in own])),
+        }
+    return summary
+
+
+def command(args: argparse.Namespace) -> None:
+    """Run the suite with the arguments of the tactics command and print a JSON report."""
+    if args.verify:
+        wrong = verify_suite()
+        print(json.dumps({"wrong": wrong}, indent=2))
+        if wrong:
+            sys.exit(1)
+        return
+
+    try:
+        results = run_suite(
+            args.config,
+            max_simulations=args.max_simulations,
+            repeats=args.repeats,
+            seed=args.seed,
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+    report: dict[str, Any] = {"summary": summarize(results)}
+    if args.details:
+        report["results"] = [result.to_dict() for result in results]
+    print(json.dumps(report, indent=2))
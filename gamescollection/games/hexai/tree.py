@@ -0,0 +1,206 @@
+"""
+Monte Carlo tree search for Hex on top of a NodePool.
+
+The tree is stored in a fixed capacity pool, so the memory of a search does not grow
+with the thinking time. After a move the tree is re-rooted at the matching child and the
+rest is freed lazily once the pool runs out of space. If the live tree fills the whole
+pool, the search keeps running playouts from the existing leaves without growing.
+"""
+
+import math
+import threading
+
+import numpy as np
+
+from games.hexai.board import EMPTY, opponent, random_rollout
+from games.hexai.nodepool import DEFAULT_CAPACITY, NO_NODE, NodePool
+from games.hexai.policy import pattern_ids
+from games.hexai.search import Rollout
+from games.hexai.symmetry import ROTATION, permutations, rotation_twin, unique_moves
+
+
+class TreeSearch:
+    """Resumable UCT search with a memory bounded tree
+
+    Attributes:
+        cells (np.ndarray): Position at the root
+        size (int): Size of the board
+        to_move (int): Player to move at the root
+        pool (NodePool): Storage of the nodes
+        root (int): Index of the root node in the pool
+    """
+
+    def __init__(
+        self,
+        cells: np.ndarray,
+        size: int,
+        to_move: int,
+        capacity: int = DEFAULT_CAPACITY,
+        rollout: Rollout = random_rollout,
+        exploration: float = 0.7,
+        leaf_batch: int = 8,
+        rng: np.random.Generator | None = None,
+    ) -> None:
+        """Create a search for a position.
+
+        Args:
+            cells (np.ndarray): Position at the root
+            size (int): Size of the board
+            to_move (int): Player to move at the root
+            capacity (int, optional): Maximum number of nodes. Defaults to DEFAULT_CAPACITY.
+            rollout (Rollout, optional): Policy to play out the boards. Defaults to random_rollout.
+            exploration (float, optional): Exploration constant of UCB1. Defaults to 0.7.
+            leaf_batch (int, optional): Number of playouts per selected leaf. Defaults to 8.
+            rng (np.random.Generator, optional): Random generator. Defaults to None.
+        """
+        self.cells = np.array(cells, dtype=np.int8)
+        self.size = size
+        self.to_move = to_move
+        self.pool = NodePool(capacity)
+        self.root = self.pool.new_root()
+        self._rollout = rollout
+        self._exploration = exploration
+        self._leaf_batch = leaf_batch
+        self._rng = rng if rng is not None else np.random.default_rng()
+        self._garbage = False
+
+    @property
+    def playouts(self) -> int:
+        """Number of playouts through the current root."""
+        return int(self.pool.visits[self.root])
+
+    def _priors(self, cells: np.ndarray, moves: np.ndarray, player: int) -> np.ndarray:
+        """Prior probabilities of the moves, taken from the rollout policy if it has weights."""
+        weights = getattr(self._rollout, "weights", None)
+        if weights is None:
+            return np.full(len(moves), 1 / len(moves), dtype=np.float32)
+        ids = pattern_ids(cells, self.size, player, self._rollout.radius)[0]
+        scores = np.exp(weights[ids[moves]])
+        return (scores / scores.sum()).astype(np.float32)
+
+    def _select(self) -> tuple[list[int], np.ndarray, int]:
+        """Walk down the tree with UCB1 until a leaf is reached.
+
+        Returns:
+            tuple[list[int], np.ndarray, int]: Nodes on the path, position and player to move at the leaf
+        """
+        pool = self.pool
+        node = self.root
+        cells = self.cells.copy()
+        player = self.to_move
+        path = [node]
+        while pool.first_child[node] != NO_NODE:
+            block = pool.children(node)
+            visits = pool.visits[block]
+            explore = np.sqrt(
+                math.log(max(pool.visits[node], 1)) / np.maximum(visits, 1)
+            )
+            scores = pool.wins[block] / np.maximum(visits, 1)
+            scores += self._exploration * explore
+            # Unvisited children first, the most likely one by prior
+            scores = np.where(visits == 0, 1e9 + pool.prior[block], scores)
+            node = block.start + int(np.argmax(scores))
+            cells[pool.move[node]] = player
+            player = opponent(player)
+            path.append(node)
+        return path, cells, player
+
+    def _make_space(self) -> bool:
+        """Free unreachable nodes if the pool can't hold another expansion.
+
+        Returns:
+            bool: True if a full expansion fits into the pool
+        """
+        needed = self.size * self.size
+        if self.pool.free < needed and self._garbage:
+            self.root = self.pool.collect(self.root)
+            self._garbage = False
+        return self.pool.free >= needed
+
+    def run(self, playouts: int, stop: threading.Event | None = None) -> bool:
+        """Run playouts until the root has the given number of visits.
+
+        Args:
+            playouts (int): Number of playouts the root should have
+            stop (threading.Event, optional): Event which interrupts the search when set. Defaults to None.
+
+        Returns:
+            bool: True if the budget was reached, False if the search was interrupted
+        """
+        pool = self.pool
+        if not (self.cells == EMPTY).any():
+            return True
+
+        while pool.visits[self.root] < playouts:
+            if stop is not None and stop.is_set():
+                return False
+
+            can_expand = self._make_space()
+            path, cells, player = self._select()
+            leaf = path[-1]
+
+            if can_expand and pool.visits[leaf] > 0:
+                moves = unique_moves(cells, self.size, player)
+                if len(moves):
+                    pool.expand(leaf, moves, self._priors(cells, moves, player))
+
+            boards = np.repeat(cells[None, :], self._leaf_batch, axis=0)
+            won = self._rollout(boards, self.size, player, self._rng)
+
+            # Every node counts the wins of the player who moved into it
+            path = np.array(path)
+            movers = np.resize(
+                np.array([opponent(self.to_move), self.to_move]), len(path)
+            )
+            pool.visits[path] += self._leaf_batch
+            pool.wins[path] += (won[None, :] == movers[:, None]).sum(axis=1)
+
+        return True
+
+    def best_move(self) -> int:
+        """Get the most visited move at the root.
+
+        Returns:
+            int: Cell index of the move
+        """
+        block = self.pool.children(self.root)
+        if block.stop == block.start:
+            return int(self._rng.choice(np.flatnonzero(self.cells == EMPTY)))
+        return int(self.pool.move[block.start + np.argmax(self.pool.visits[block])])
+
+    def advance(self, move: int) -> None:
+        """Play a move at the root and keep the subtree below it.
+
+        The root only has one of two moves which are equivalent by the rotation. If the
+        move is the other one, the subtree of its twin is kept with its moves rotated.
+
+        Args:
+            move (int): Cell index of the move
+        """
+        pool = self.pool
+        block = pool.children(self.root)
+        matches = np.flatnonzero(pool.move[block] == move)
+        rotated = False
+        if not len(matches):
+            twin = rotation_twin(self.cells, self.size, self.to_move, move)
+            if twin is not None:
+                matches = np.flatnonzero(pool.move[block] == twin)
+                rotated = len(matches) > 0
+
+        self.cells[move] = self.to_move
+        self.to_move = opponent(self.to_move)
+
+        if len(matches):
+            self.root = block.start + int(matches[0])
+            pool.parent[self.root] = NO_NODE
+            self._garbage = True
+            if rotated:
+                nodes = pool.subtree(self.root)
+                pool.move[nodes[1:]] = permutations(self.size)[ROTATION][
+                    pool.move[nodes[1:]]
+                ]
+                pool.move[self.root] = move
+        else:
+            pool.used = 0
+            self.root = pool.new_root()
+            self._garbage = False
@@ -0,0 +1,409 @@
+"""
+Load testing of the games with simulated players.
+
+Every simulated player is a thread which plays a number of games, or plays for a given
+time, with random or scripted answers. The games talk to it through an IO_Interface,
+either directly in the same process or over a local socket with one JSON line per
+message, as a stand-in for a game server.
+
+The latency of a move is the time from sending the answer until the game asks for
+the next one, for Hex this contains the reply of the AI. The report contains the
+throughput, the latency percentiles and the resident memory sampled during the run,
+so leaks show up as growth over time.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+from custom_io.classes import IO_Interface, Socket_Interface
+from games.colourgame import ColorGame, Colour
+from games.gameofhex import Hex
+from games.hexai.scheduler import SearchScheduler
+
+TRANSPORTS = ("inprocess", "socket")
+
+DEFAULT_SETTINGS: dict[str, dict[str, int]] = {
+    "hex": {"size": 5, "simulations": 50},
+    "colour": {"fields": 4, "number_colours": 6, "tries": 10},
+}
+
+
+class HexBot:
+    """Answers the prompts of Hex, first from a script and then randomly
+
+    Random moves are drawn from a shuffled list of all cells, an occupied cell is
+    rejected by the game and the next one is tried.
+    """
+
+    def __init__(
+        self, size: int, rng: np.random.Generator, script: Sequence[str] = ()
+    ) -> None:
+        self._rng = rng
+        self._script = list(script)
+        self._moves = [
+            f"{cell // size} {cell % size}" for cell in rng.permutation(size * size)
+        ]
+
+    def __call__(self, prompt: str) -> str:
+        if self._script:
+            return self._script.pop(0)
+        if "X or O" in prompt:
+            return str(self._rng.choice(["x", "o"]))
+        if "y or n" in prompt or "(y/n)" in prompt:
+            return str(self._rng.choice(["y", "n"]))
+        return self._moves.pop()
+
+
+class ColourBot:
+    """Answers the prompts of MasterCode, first from a script and then with random guesses"""
+
+    def __init__(
+        self,
+        fields: int,
+        number_colours: int,
+        rng: np.random.Generator,
+        script: Sequence[str] = (),
+    ) -> None:
+        self._fields = fields
+        self._names = [colour.name for colour in list(Colour)[:number_colours]]
+        self._rng = rng
+        self._script = list(script)
+
+    def __call__(self, prompt: str) -> str:
+        if self._script:
+            return self._script.pop(0)
+        return ",".join(self._rng.choice(self._names, self._fields))
+
+
+class SimulatedPlayer(IO_Interface):
+    """In process interface which answers with a bot and times the replies of the game
+
+    The game prints its prompt with out() before it calls inp(), so the bot answers the
+    last message.
+    """
+
+    def __init__(
+        self,
+        bot: Callable[[str], str],
+        latencies: list[float],
+        think_time: float = 0.0,
+    ) -> None:
+        self._bot = bot
+        self._latencies = latencies
+        self._think_time = think_time
+        self._last_message = ""
+        self._answered: float | None = None
+        self.moves = 0
+
+    def out(self, message: str):
+        self._last_message = message
+
+    def inp(self, message: str | None = None, filter: Callable = None):
+        if self._answered is not None:
+            self._latencies.append(time.perf_counter() - self._answered)
+        if self._think_time:
+            time.sleep(self._think_time)
+        answer = self._bot(message if message is not None else self._last_message)
+        self.moves += 1
+        self._answered = time.perf_counter()
+        return filter(answer) if filter else answer
+
+    def finish(self) -> None:
+        """Time the reply to the last answer once the game is over."""
+        if self._answered is not None:
+            self._latencies.append(time.perf_counter() - self._answered)
+            self._answered = None
+
+
+def _play_over_socket(
+    connection: socket.socket, player: SimulatedPlayer, errors: list[str]
+) -> None:
+    """Client end of a socket game, passes the messages of the game to the player.
+
+    If the player fails its error is added to errors and the connection is closed,
+    the game then fails on its side.
+    """
+    stream = connection.makefile("rw", encoding="utf-8", newline="\n")
+    with connection, stream:
+        try:
+            for line in stream:
+                message = json.loads(line)
+                if "out" in message:
+                    player.out(message["out"])
+                else:
+                    stream.write(player.inp(message["inp"]) + "\n")
+                    stream.flush()
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            return
+    player.finish()
+
+
+def _memory() -> int:
+    """Resident memory of the process in bytes, the peak where the current one is unknown."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@dataclass
+class LoadTestReport:
+    """Result of a load test
+
+    Attributes:
+        game (str): Name of the game
+        players (int): Number of simulated players
+        transport (str): "inprocess" or "socket"
+        wall_time (float): Seconds of the whole run
+        games (int): Number of finished games
+        errors (int): Number of games which ended with an exception
+        moves (int): Number of answers of all players
+        moves_per_second (float): Answers per second over all players
+        games_per_second (float): Finished games per second
+        latency_p50 (float): Median seconds of the game to reply to an answer
+        latency_p95 (float): 95th percentile of the reply time
+        latency_p99 (float): 99th percentile of the reply time
+        latency_max (float): Largest reply time
+        memory_start (float): Resident memory in MB at the start
+        memory_end (float): Resident memory in MB at the end
+        memory_growth (float): Growth of the resident memory in MB per minute, fitted over all samples
+        memory_samples (list[tuple[float, float]]): Seconds since the start and resident memory in MB
+        error_messages (list[str]): Distinct messages of the errors
+        scheduler (dict[str, float]): Statistics of the AI scheduler, empty without one
+    """
+
+    game: str
+    players: int
+    transport: str
+    wall_time: float
+    games: int
+    errors: int
+    moves: int
+    moves_per_second: float
+    games_per_second: float
+    latency_p50: float
+    latency_p95: float
+    latency_p99: float
+    latency_max: float
+    memory_start: float
+    memory_end: float
+    memory_growth: float
+    memory_samples: list[tuple[float, float]] = field(default_factory=list)
+    error_messages: list[str] = field(default_factory=list)
+    scheduler: dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Report as dictionary, e.g. to write it as JSON."""
+        return asdict(self)
+
+
+def run_load_test(
+    game: str,
+    players: int,
+    games_per_player: int = 1,
+    duration: float | None = None,
+    transport: str = "inprocess",
+    settings: dict[str, int] | None = None,
+    script: Sequence[str] = (),
+    think_time: float = 0.0,
+    scheduler_workers: int | None = None,
+    sample_interval: float = 0.5,
+    seed: int | None = None,
+    quiet: bool = True,
+) -> LoadTestReport:
+    """Let simulated players play concurrent games and measure the load.
+
+    Args:
+        game (str): "hex" or "colour"
+        players (int): Number of simulated players playing at the same time
+        games_per_player (int, optional): Games every player plays. Defaults to 1.
+        duration (float, optional): Seconds after which no new games are started, replaces games_per_player. Defaults to None.
+        transport (str, optional): "inprocess" or over a local "socket". Defaults to "inprocess".
+        settings (dict[str, int], optional): Arguments of the game, missing ones are taken from DEFAULT_SETTINGS. Defaults to None.
+        script (Sequence[str], optional): Answers every game starts with before the random ones. Defaults to ().
+        think_time (float, optional): Seconds a player waits before every answer. Defaults to 0.0.
+        scheduler_workers (int, optional): Run the Hex AI on a shared scheduler with that many workers. Defaults to None, which searches on the game threads.
+        sample_interval (float, optional): Seconds between two memory samples. Defaults to 0.5.
+        seed (int, optional): Seed of the random answers. Defaults to None.
+        quiet (bool, optional): Discard what the games print to stdout. Defaults to True.
+
+    Returns:
+        LoadTestReport: Throughput, latencies and memory of the run
+
+    Raises:
+        ValueError: If the game or transport is unknown
+    """
+    if game not in DEFAULT_SETTINGS:
+        raise ValueError(f"Unknown game: {game}")
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown transport: {transport}")
+    kwargs = {**DEFAULT_SETTINGS[game], **(settings or {})}
+
+    scheduler = (
+        SearchScheduler(scheduler_workers)
+        if scheduler_workers is not None and game == "hex"
+        else None
+    )
+    if scheduler is not None:
+        kwargs["scheduler"] = scheduler
+
+    def create_bot(rng: np.random.Generator) -> Callable[[str], str]:
+        if game == "hex":
+            return HexBot(kwargs["size"], rng, script)
+        return ColourBot(kwargs["fields"], kwargs["number_colours"], rng, script)
+
+    def play_game(interface: IO_Interface) -> None:
+        if game == "hex":
+            Hex(in_interface=interface, out_interface=interface, **kwargs)
+        else:
+            ColorGame(in_interface=interface, out_interface=interface, **kwargs)
+
+    lock = threading.Lock()
+    latencies: list[float] = []
+    counts = {"games": 0, "errors": 0, "moves": 0}
+    error_messages: set[str] = set()
+    seeds = np.random.SeedSequence(seed).spawn(players)
+    start = time.perf_counter()
+
+    def play(index: int) -> None:
+        rng = np.random.default_rng(seeds[index])
+        played = 0
+        while (
+            time.perf_counter() - start < duration
+            if duration is not None
+            else played < games_per_player
+        ):
+            own_latencies: list[float] = []
+            player = SimulatedPlayer(create_bot(rng), own_latencies, think_time)
+            error = None
+            client_errors: list[str] = []
+            try:
+                if transport == "inprocess":
+                    play_game(player)
+                    player.finish()
+                else:
+                    server, client = socket.socketpair()
+                    client_thread = threading.Thread(
+                        target=_play_over_socket, args=(client, player, client_errors)
+                    )
+                    client_thread.start()
+                    interface = Socket_Interface(server)
+                    try:
+                        play_game(interface)
+                    finally:
+                        interface.close()
+                        client_thread.join()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                # The failure of the client is the cause of the closed connection
+                if client_errors:
+                    error = client_errors[0]
+            played += 1
+            with lock:
+                latencies.extend(own_latencies)
+                counts["moves"] += player.moves
+                if error is None:
+                    counts["games"] += 1
+                else:
+                    counts["errors"] += 1
+                    error_messages.add(error)
+
+    samples: list[tuple[float, float]] = []
+    finished = threading.Event()
+
+    def sample_memory() -> None:
+        while True:
+            samples.append((time.perf_counter() - start, _memory() / 2**20))
+            if finished.wait(sample_interval):
+                return
+
+    sampler = threading.Thread(target=sample_memory, daemon=True)
+    threads = [threading.Thread(target=play, args=(index,)) for index in range(players)]
+    with contextlib.ExitStack() as stack:
+        if quiet:
+            devnull = stack.enter_context(open(os.devnull, "w"))
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+        sampler.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    wall_time = time.perf_counter() - start
+    finished.set()
+    sampler.join()
+    samples.append((wall_time, _memory() / 2**20))
+
+    scheduler_stats: dict[str, float] = {}
+    if scheduler is not None:
+        scheduler_stats = scheduler.stats()
+        scheduler.close()
+
+    times = np.array(latencies)
+    memory = np.array(samples)
+    growth = (
+        float(np.polyfit(memory[:, 0], memory[:, 1], 1)[0] * 60)
+        if len(memory) > 2 and np.ptp(memory[:, 0]) > 0
+        else 0.0
+    )
+    percentiles = np.percentile(times, [50, 95, 99]) if len(times) else np.zeros(3)
+    return LoadTestReport(
+        game=game,
+        players=players,
+        transport=transport,
+        wall_time=wall_time,
+        games=counts["games"],
+        errors=counts["errors"],
+        moves=counts["moves"],
+        moves_per_second=counts["moves"] / wall_time,
+        games_per_second=counts["games"] / wall_time,
+        latency_p50=float(percentiles[0]),
+        latency_p95=float(percentiles[1]),
+        latency_p99=float(percentiles[2]),
+        latency_max=float(times.max()) if len(times) else 0.0,
+        memory_start=float(memory[0, 1]),
+        memory_end=float(memory[-1, 1]),
+        memory_growth=growth,
+        memory_samples=[(round(t, 3), round(m, 2)) for t, m in samples],
+        error_messages=sorted(error_messages),
+        scheduler=scheduler_stats,
+    )
+
+
+def command(args: argparse.Namespace) -> None:
+    """Run a load test with the arguments of the loadtest command and print the report."""
+    try:
+        settings = {
+            name: int(value)
+            for name, value in (setting.split("=", 1) for setting in args.setting)
+        }
+        report = run_load_test(
+            args.target,
+            args.players,
+            games_per_player=args.games,
+            duration=args.duration,
+            transport=args.transport,
+            settings=settings,
+            think_time=args.think_time,
+            scheduler_workers=args.scheduler_workers,
+            seed=args.seed,
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+    print(json.dumps(report.to_dict(), indent=2))
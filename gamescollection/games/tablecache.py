@@ -0,0 +1,118 @@
+"""
+# Table Cache
+Versioned on-disk cache of tables which only depend on the game configuration.
+
+Tables like the neighbours of a Hex board or the feedback of all MasterCode codes are
+built once and written as `.npy` files, every process then maps them read-only. This
+saves the build at the start of every process, and the pages of a mapped table are
+shared by all processes of a pool instead of being copied into each of them.
+
+The directory is taken from the environment variable `GAMESCOLLECTION_CACHE`, else
+`$XDG_CACHE_HOME/gamescollection` or `~/.cache/gamescollection`. Tables are stored in
+a subdirectory per `CACHE_VERSION`, so changing a builder only needs a new version.
+Setting the variable to `off` builds the tables in memory without touching the disk.
+
+Files are written to a temporary file and renamed, so processes which build the same
+table at the same time never read a partial file. If the directory can't be written
+the built table is used in memory.
+"""
+
+import os
+import tempfile
+from os import path as ospath
+from typing import Callable
+
+import numpy as np
+
+CACHE_VERSION = 1
+ENVIRONMENT_VARIABLE = "GAMESCOLLECTION_CACHE"
+
+_tables: dict[str, np.ndarray] = {}
+
+
+def cache_directory() -> str | None:
+    """Directory of the tables of the current version.
+
+    Returns:
+        str | None: Path of the directory, None if the disk cache is switched off
+    """
+    base = os.environ.get(ENVIRONMENT_VARIABLE)
+    if not base:
+        xdg = os.environ.get("XDG_CACHE_HOME") or ospath.join(
+            ospath.expanduser("~"), ".cache"
+        )
+        base = ospath.join(xdg, "gamescollection")
+    elif base.lower() == "off":
+        return None
+    return ospath.join(base, f"v{CACHE_VERSION}")
+
+
+def _build(build: Callable[[], np.ndarray]) -> np.ndarray:
+    """Build a table in memory and make it read-only."""
+    table = np.ascontiguousarray(build())
+    table.flags.writeable = False
+    return table
+
+
+def _write(file_path: str, table: np.ndarray) -> None:
+    """Write a table atomically, the temporary file is removed on failure."""
+    directory = ospath.dirname(file_path)
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as file:
+            np.save(file, table, allow_pickle=False)
+        # Temporary files are private, the table is read by other users' processes too
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, file_path)
+    except BaseException:
+        if ospath.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def load_table(name: str, build: Callable[[], np.ndarray]) -> np.ndarray:
+    """Get a table from the cache, building and storing it if it is missing.
+
+    Tables are kept per process, so a table is mapped only once.
+
+    Args:
+        name (str): Unique file name of the table, contains all parameters of the build
+        build (Callable[[], np.ndarray]): Builds the table, must always give the same result for the name
+
+    Returns:
+        np.ndarray: Read-only table, memory-mapped if the disk cache is used
+    """
+    if name in _tables:
+        return _tables[name]
+
+    directory = cache_directory()
+    if directory is None:
+        table = _build(build)
+    else:
+        file_path = ospath.join(directory, f"{name}.npy")
+        try:
+            table = np.load(file_path, mmap_mode="r", allow_pickle=False)
+        except (OSError, ValueError):
+            # Missing or damaged, replaced by a fresh build
+            table = _build(build)
+            try:
+                _write(file_path, table)
+                table = np.load(file_path, mmap_mode="r", allow_pickle=False)
+            except OSError:
+                pass
+        table = table.view(np.ndarray)
+
+    _tables[name] = table
+    return table
+
+
+def clear_cache() -> None:
+    """Delete all stored tables of the current version and forget the mapped ones."""
+    _tables.clear()
+    directory = cache_directory()
+    if directory is None or not ospath.isdir(directory):
+        return
+    for file_name in os.listdir(directory):
+        if file_name.endswith((".npy", ".tmp")):
+            os.remove(ospath.join(directory, file_name))
@@ -1,129 +1,662 @@
-# Add parent directory to the path
-from sys import path as syspath
+"""
+Entry point of the gamescollection package.
+
+Games and interfaces are looked up by name in a registry and their modules are only
+imported once they are selected, so starting the collection does not pay for numpy or
+any game that is not played.
+
+Run without arguments for the interactive menus, or launch a game directly:
+
+    python main.py hex --size 11 --simulations 200
+    python main.py hex --size 9 --search-mode uct --move-time 2.5 --ponder
+    python main.py colour --fields 4 --colours 6 --tries 10 --input cli --output cli
+
+Hex positions can be analysed in bulk, results are written as JSON lines:
+
+    python main.py analyse positions.txt --workers 8 --budget 2000 > results.jsonl
+
+MasterCode strategies are evaluated headless against all secret codes:
+
+    python main.py evaluate knuth --fields 4 --colours 6
+
+Simulated players put the games under load, the report contains throughput, latency
+percentiles and memory growth:
+
+    python main.py loadtest hex --players 100 --games 3 --setting size=7
+
+The tactical suite measures whether and how fast AI configurations find winning moves:
+
+    python main.py tactics --config flat --config halving --repeats 5
+
+The rollout policy of the Hex AI is trained on self-play or a record log and loaded
+by the game:
+
+    python main.py train policy.npy --size 7 --games 1000
+    python main.py hex --size 7 --rollout-policy policy.npy
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass, field
+from importlib import import_module
 from os import path as ospath
+from typing import Any, Callable
 
+# Add parent directory to the path
 current_dir = ospath.dirname(ospath.abspath(__file__))
-syspath.append(current_dir)
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
 
-# Custom imports
-import games
-import games.gameofhex
-from custom_io import classes
 
+class SettingError(ValueError):
+    """Raised if a game can't be launched with the given settings"""
 
-def main():
-    input_interface: classes.IO_Interface | None = None
-    output_interface: classes.IO_Interface | None = None
+    pass
 
-    print(f"Welcome to the gamescollection package!")
-    print(f"Please specify the input interface you want to use:")
-    print(f"1. Command Line Interface")
-    print(f"2. REST Interface")
-    print(f"3. Exit")
 
-    while True:
-        choice = input("Enter your choice: ")
-        if choice == "1":
-            print("You have selected Command Line Interface")
-            input_interface = classes.CL_Interface()
-            break
-        elif choice == "2":
-            print("You have selected REST Interface")
-            input_interface = classes.REST_Interface()
-            break
-        elif choice == "3":
-            print("Exiting...")
-            exit()
-        else:
-            print("Invalid choice. Please try again.")
+@dataclass(frozen=True)
+class Setting:
+    """Setting of a game which is asked for interactively or given as argument
+
+    Attributes:
+        name (str): Name of the keyword argument passed to the game, or to its group
+        flag (str): Command line flag of the setting
+        prompt (str | None): Prompt shown in the interactive menu, None if the setting is only available as argument
+        minimum (float): Smallest valid value of a number
+        maximum (float | None): Largest valid value of a number, None if there is no upper bound
+        default (Any): Value used if the flag is not given, None if it is required
+        type (type): int, float, str or bool, a bool setting is a flag without value
+        choices (tuple | None): Valid values, None if every value of the type is valid
+        optional (bool): True if the setting can be left out, the game then uses its own default
+        group (str | None): Keyword argument of the game which gets the setting in a settings object, see Entry.groups
+        help (str | None): Help text of the command line flag
+    """
+
+    name: str
+    flag: str
+    prompt: str | None = None
+    minimum: float = 1
+    maximum: float | None = None
+    default: Any = None
+    type: type = int
+    choices: tuple | None = None
+    optional: bool = False
+    group: str | None = None
+    help: str | None = None
+
+    def is_valid(self, value: Any) -> bool:
+        """Check if a value is valid for the setting."""
+        if value is None:
+            return self.optional
+        if self.choices is not None:
+            return value in self.choices
+        if self.type in (str, bool):
+            return isinstance(value, self.type)
+        return value >= self.minimum and (self.maximum is None or value <= self.maximum)
+
+
+@dataclass(frozen=True)
+class Entry:
+    """Registry entry which points to a class without importing it
+
+    Attributes:
+        name (str): Name used on the command line
+        title (str): Human readable name used in the menus
+        target (str): Location of the class as "module:attribute"
+        settings (tuple[Setting, ...]): Settings which are passed to the class as keyword arguments
+        groups (dict[str, str]): Location of the class as "module:attribute" per group of settings, which is created from them and passed as one keyword argument
+    """
+
+    name: str
+    title: str
+    target: str
+    settings: tuple[Setting, ...] = field(default_factory=tuple)
+    groups: dict[str, str] = field(default_factory=dict)
+
+    def load(self) -> Callable[..., Any]:
+        """Import the module of the entry and return the registered class."""
+        return _load(self.target)
+
+
+def _load(target: str) -> Any:
+    """Import the module of a "module:attribute" location and return the attribute."""
+    module_name, attribute = target.split(":")
+    return getattr(import_module(module_name), attribute)
+
+
+@dataclass(frozen=True)
+class Tool:
+    """Registry entry of a command line tool which points to its function without importing it
+
+    Attributes:
+        name (str): Name of the sub command
+        title (str): Help text of the sub command
+        target (str): Location of the function as "module:attribute", it gets the parsed arguments
+        arguments (Callable[[argparse.ArgumentParser], None]): Adds the arguments of the tool to its sub command parser
+    """
+
+    name: str
+    title: str
+    target: str
+    arguments: Callable[[argparse.ArgumentParser], None]
+
+    def load(self) -> Callable[[argparse.Namespace], None]:
+        """Import the module of the tool and return its function."""
+        return _load(self.target)
+
+
+GAMES: dict[str, Entry] = {}
+INTERFACES: dict[str, Entry] = {}
+TOOLS: dict[str, Tool] = {}
+
+
+def register_game(entry: Entry) -> None:
+    """Add a game to the registry.
+
+    Args:
+        entry (Entry): Entry of the game, the class needs to accept in_interface and out_interface
+    """
+    GAMES[entry.name] = entry
+
+
+def register_interface(entry: Entry) -> None:
+    """Add an input/output interface to the registry.
+
+    Args:
+        entry (Entry): Entry of the interface, the class needs to be constructable without arguments
+    """
+    INTERFACES[entry.name] = entry
+
+
+def register_tool(tool: Tool) -> None:
+    """Add a command line tool to the registry.
+
+    Args:
+        tool (Tool): Entry of the tool, the function needs to accept the parsed arguments
+    """
+    TOOLS[tool.name] = tool
 
-    print(f"Please specify the output interface you want to use:")
-    print(f"1. Command Line Interface")
-    print(f"2. REST Interface")
-    print(f"3. Exit")
+
+register_interface(
+    Entry("cli", "Command Line Interface", "custom_io.classes:CL_Interface")
+)
+register_interface(Entry("rest", "REST Interface", "custom_io.classes:REST_Interface"))
+
+register_game(
+    Entry(
+        "colour",
+        "Master Code",
+        "games.colourgame:ColorGame",
+        (
+            Setting(
+                "number_colours",
+                "--colours",
+                "Enter the number of colours (max. 7): ",
+                maximum=7,
+            ),
+            Setting("tries", "--tries", "Enter the number of tries: "),
+            Setting("fields", "--fields", "Enter the length of the code: "),
+        ),
+    )
+)
+register_game(
+    Entry(
+        "hex",
+        "Game of Hex",
+        "games.gameofhex:Hex",
+        (
+            Setting("size", "--size", "Enter the size: "),
+            Setting(
+                "simulations",
+                "--simulations",
+                "Enter the number of AI simulations per move: ",
+                default=200,
+            ),
+            Setting(
+                "mode",
+                "--search-mode",
+                type=str,
+                # Copy of SEARCH_MODES in games.hexai.settings, which is not imported
+                # before a game starts, tests/test_main.py keeps them in sync
+                choices=("flat", "uct", "resistance", "twodistance"),
+                optional=True,
+                group="search",
+                help="Flat Monte Carlo, UCT tree search or alpha-beta with an evaluator",
+            ),
+            Setting(
+                "allocator",
+                "--allocator",
+                type=str,
+                # Copy of ALLOCATORS in games.hexai.search, kept in sync like the modes
+                choices=("uniform", "halving"),
+                optional=True,
+                group="search",
+                help="Playouts per move of the flat search",
+            ),
+            Setting(
+                "depth",
+                "--search-depth",
+                optional=True,
+                group="search",
+                help="Depth of the alpha-beta search",
+            ),
+            Setting(
+                "node_capacity",
+                "--node-capacity",
+                optional=True,
+                group="search",
+                help="Maximum number of nodes of the tree search",
+            ),
+            Setting(
+                "move_time",
+                "--move-time",
+                minimum=0,
+                type=float,
+                optional=True,
+                group="search",
+                help="Seconds after which the AI plays its best move so far",
+            ),
+            Setting(
+                "ponder",
+                "--ponder",
+                type=bool,
+                optional=True,
+                group="search",
+                help="Search while the human is thinking",
+            ),
+            Setting(
+                "rollout_policy",
+                "--rollout-policy",
+                type=str,
+                optional=True,
+                help="Policy file saved by the train command for the AI playouts",
+            ),
+        ),
+        {"search": "games.hexai.settings:SearchSettings"},
+    )
+)
+
+
+def _analyse_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the analyse command."""
+    parser.add_argument(
+        "positions", nargs="?", default="-", help="File with positions, - for stdin"
+    )
+    parser.add_argument(
+        "--binary", action="store_true", help="Positions are in binary notation"
+    )
+    parser.add_argument(
+        "--output", default="-", help="File for the results, - for stdout"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes, 1 for none"
+    )
+    parser.add_argument(
+        "--budget", type=int, default=2000, help="Playouts per position"
+    )
+    parser.add_argument(
+        "--time-limit", type=float, default=None, help="Seconds per position"
+    )
+
+
+def _evaluate_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the evaluate command."""
+    parser.add_argument(
+        "strategy", help="Name of the strategy, e.g. first, random, knuth or mostparts"
+    )
+    parser.add_argument("--fields", type=int, default=4)
+    parser.add_argument("--colours", type=int, default=6)
+    parser.add_argument(
+        "--sample", type=int, default=None, help="Random secrets instead of all"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes, 1 for none"
+    )
+    parser.add_argument("--max-guesses", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def _loadtest_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the loadtest command."""
+    parser.add_argument("target", metavar="game", help="hex or colour")
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--games", type=int, default=1, help="Games per player")
+    parser.add_argument(
+        "--duration", type=float, default=None, help="Seconds instead of --games"
+    )
+    parser.add_argument(
+        "--transport", choices=("inprocess", "socket"), default="inprocess"
+    )
+    parser.add_argument(
+        "--setting",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Argument of the game, e.g. size=7",
+    )
+    parser.add_argument(
+        "--think-time", type=float, default=0.0, help="Seconds before every answer"
+    )
+    parser.add_argument(
+        "--scheduler-workers", type=int, default=None, help="Share the Hex AI workers"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def _train_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the train command."""
+    parser.add_argument("output", help="File for the weights of the policy")
+    parser.add_argument(
+        "--records", default=None, help="Train on this record log instead of self-play"
+    )
+    parser.add_argument("--size", type=int, default=7, help="Size of self-play games")
+    parser.add_argument("--games", type=int, default=1000, help="Self-play games")
+    parser.add_argument(
+        "--simulations",
+        type=int,
+        default=0,
+        help="Playouts per candidate of self-play moves, 0 plays the policy",
+    )
+    parser.add_argument("--radius", type=int, choices=(1, 2), default=1)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument(
+        "--policy", default=None, help="Policy file to continue training"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def _tactics_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the arguments of the tactics command."""
+    parser.add_argument(
+        "--config",
+        action="append",
+        default=None,
+        help="AI configuration, e.g. flat, halving, uct or resistance, default all",
+    )
+    parser.add_argument(
+        "--max-simulations", type=int, default=16_384, help="Largest playout budget"
+    )
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--details", action="store_true", help="Include the result of every run"
+    )
+    parser.add_argument(
+        "--verify", action="store_true", help="Prove the solutions of the suite"
+    )
+
+
+register_tool(
+    Tool(
+        "analyse",
+        "Analyse Hex positions and write the results as JSON lines",
+        "games.hexai.analysis:command",
+        _analyse_arguments,
+    )
+)
+register_tool(
+    Tool(
+        "evaluate",
+        "Evaluate a MasterCode strategy and print a JSON report",
+        "games.colourharness:command",
+        _evaluate_arguments,
+    )
+)
+register_tool(
+    Tool(
+        "loadtest",
+        "Play concurrent games with simulated players",
+        "games.loadtest:command",
+        _loadtest_arguments,
+    )
+)
+register_tool(
+    Tool(
+        "tactics",
+        "Run AI configurations on the tactical Hex suite",
+        "games.hexai.tactics:command",
+        _tactics_arguments,
+    )
+)
+register_tool(
+    Tool(
+        "train",
+        "Train the rollout policy of the Hex AI on self-play or recorded games",
+        "games.hexai.policy:command",
+        _train_arguments,
+    )
+)
+
+
+def _choose(kind: str, registry: dict[str, Entry]) -> Entry:
+    """Interactive menu to select an entry from a registry.
+
+    Args:
+        kind (str): Description of what is selected, shown in the menu
+        registry (dict[str, Entry]): Registry to choose from
+
+    Returns:
+        Entry: Selected entry
+    """
+    entries = list(registry.values())
+    print(f"Please select the {kind} you want to use:")
+    for number, entry in enumerate(entries, start=1):
+        print(f"{number}. {entry.title}")
+    print(f"{len(entries) + 1}. Exit")
 
     while True:
         choice = input("Enter your choice: ")
-        if choice == "1":
-            print("You have selected Command Line Interface")
-            output_interface = classes.CL_Interface()
-            break
-        elif choice == "2":
-            print("You have selected REST Interface")
-            output_interface = classes.REST_Interface()
-            break
-        elif choice == "3":
+        if choice == str(len(entries) + 1):
             print("Exiting...")
-            exit()
+            sys.exit()
+        elif choice.isdigit() and 1 <= int(choice) <= len(entries):
+            entry = entries[int(choice) - 1]
+            print(f"You have selected {entry.title}")
+            return entry
         else:
             print("Invalid choice. Please try again.")
 
-    assert (
-        input_interface is not None and output_interface is not None
-    ), "Input and Output interfaces must be selected."
 
-    print(f"Input Interface: {input_interface}")
-    print(f"Output Interface: {output_interface}")
+def _ask_setting(setting: Setting) -> Any:
+    """Ask the user for a setting until a valid value is entered.
 
-    print("Please select the Game you want to play:")
+    Settings without a prompt are not asked, they get their default.
 
-    print("1. Master Code")
-    print("2. Game of Hex")
-    print("3. Exit")
+    Args:
+        setting (Setting): Setting which should be asked for
 
+    Returns:
+        Any: Valid value of the setting
+    """
+    if setting.prompt is None:
+        return setting.default
     while True:
-        choice = input("Enter your choice: ")
-        if choice == "1":
-
-            print("You have selected Master Code")
-
-            print("Please enter the number of colours (max. 7):")
-            number_colours = int(input("Enter the number of colours: "))
-            while number_colours > 7 or number_colours < 1:
-                print("Invalid number of colours. Please try again.")
-                number_colours = int(input("Enter the number of colours: "))
-
-            print("Please enter the number of tries:")
-            tries = int(input("Enter the number of tries: "))
-            while tries < 1:
-                print("Invalid number of tries. Please try again.")
-                tries = int(input("Enter the number of tries: "))
-
-            print("Please enter the length of the code:")
-            code_length = int(input("Enter the length of the code: "))
-            while code_length < 1:
-                print("Invalid code length. Please try again.")
-                code_length = int(input("Enter the length of the code: "))
-
-            game = games.colourgame.ColorGame(
-                code_length,
-                number_colours,
-                tries,
-                in_interface=input_interface,
-                out_interface=output_interface,
-            )
-            exit()
-        elif choice == "2":
+        answer = input(setting.prompt)
+        if not answer and (setting.default is not None or setting.optional):
+            return setting.default
+        try:
+            value = setting.type(answer)
+        except ValueError:
+            print("Invalid number. Please try again.")
+            continue
+        if setting.is_valid(value):
+            return value
+        print("Invalid value. Please try again.")
 
-            print("You have selected Game of Hex")
 
-            print("Please enter the size of the board:")
-            size = int(input("Enter the size: "))
-            while size < 1:
-                print("Invalid board size. Please try again.")
-                size = int(input("Enter the size: "))
+def _build_parser() -> argparse.ArgumentParser:
+    """Create the argument parser with one sub command per registered game and tool."""
+    parser = argparse.ArgumentParser(
+        description="Play a game of the gamescollection package."
+    )
+    parser.add_argument(
+        "--list",
+        action="store_true",
+        help="List all games, tools and interfaces and exit",
+    )
+    subparsers = parser.add_subparsers(dest="game")
 
-            game = games.gameofhex.Hex(
-                size,
-                input_interface,
-                output_interface,
+    for entry in GAMES.values():
+        game_parser = subparsers.add_parser(entry.name, help=entry.title)
+        for setting in entry.settings:
+            if setting.type is bool:
+                game_parser.add_argument(
+                    setting.flag,
+                    dest=setting.name,
+                    action="store_true",
+                    default=setting.default,
+                    help=setting.help,
+                )
+                continue
+            game_parser.add_argument(
+                setting.flag,
+                dest=setting.name,
+                type=setting.type,
+                choices=setting.choices,
+                default=setting.default,
+                required=setting.default is None and not setting.optional,
+                help=setting.help,
             )
-            break
-        elif choice == "3":
-            print("Exiting...")
-            exit()
+        game_parser.add_argument("--input", choices=INTERFACES, default="cli")
+        game_parser.add_argument("--output", choices=INTERFACES, default="cli")
+        game_parser.add_argument(
+            "--record-log", help="Append the finished game to this record log"
+        )
+
+    for tool in TOOLS.values():
+        tool.arguments(subparsers.add_parser(tool.name, help=tool.title))
+
+    return parser
+
+
+def _arguments(entry: Entry, settings: dict[str, Any]) -> dict[str, Any]:
+    """Validate the settings of a game and turn them into its keyword arguments.
+
+    Optional settings which are None are left out, grouped settings are passed in the
+    object of their group.
+
+    Raises:
+        SettingError: If a setting is invalid
+    """
+    kwargs: dict[str, Any] = {}
+    groups: dict[str, dict[str, Any]] = {group: {} for group in entry.groups}
+    for setting in entry.settings:
+        value = settings.get(setting.name)
+        if not setting.is_valid(value):
+            raise SettingError(f"Invalid value for {setting.flag[2:]}")
+        if value is None:
+            continue
+        if setting.group is not None:
+            groups[setting.group][setting.name] = value
         else:
-            print("Invalid choice. Please try again.")
+            kwargs[setting.name] = value
+
+    for group, values in groups.items():
+        try:
+            kwargs[group] = _load(entry.groups[group])(**values)
+        except ValueError as e:
+            raise SettingError(str(e)) from e
+    return kwargs
+
+
+def launch(
+    game: str,
+    settings: dict[str, Any],
+    input_interface: str = "cli",
+    output_interface: str = "cli",
+    record_log: str | None = None,
+) -> Any:
+    """Launch a registered game with the given settings.
+
+    Only the modules of the selected game and interfaces are imported. The settings
+    are validated before the game is created.
+
+    Args:
+        game (str): Name of the game in the registry
+        settings (dict[str, Any]): Values for the settings of the game, optional settings can be left out
+        input_interface (str, optional): Name of the input interface. Defaults to "cli".
+        output_interface (str, optional): Name of the output interface. Defaults to "cli".
+        record_log (str, optional): Path of a record log for the finished game. Defaults to None.
+
+    Returns:
+        Any: The finished game
+
+    Raises:
+        SettingError: If a setting is invalid, the rollout policy can't be loaded, or the record log can't store the games of the settings
+    """
+    entry = GAMES[game]
+    kwargs = _arguments(entry, settings)
+    if "search" in kwargs:
+        try:
+            kwargs["search"].check_size(settings["size"])
+        except ValueError as e:
+            raise SettingError(str(e)) from e
+    if "rollout_policy" in kwargs:
+        from games.hexai.policy import PatternPolicy
+
+        try:
+            kwargs["rollout_policy"] = PatternPolicy.load(kwargs["rollout_policy"])
+        except (OSError, ValueError) as e:
+            raise SettingError(f"Can't load the rollout policy: {e}") from e
+    kwargs["in_interface"] = INTERFACES[input_interface].load()()
+    kwargs["out_interface"] = INTERFACES[output_interface].load()()
+
+    if record_log is None:
+        return entry.load()(**kwargs)
+
+    from games.gamerecords import (
+        DEFAULT_MAX_MOVES,
+        MAX_SLOTS,
+        GameRecordLog,
+        RecordCapacityError,
+    )
+
+    # A new log gets enough slots for the longest game of the settings, the games
+    # reject settings an existing log can't store before they start
+    max_moves = max(
+        DEFAULT_MAX_MOVES, settings.get("size", 0) ** 2, settings.get("tries", 0)
+    )
+    game_class = entry.load()
+    with GameRecordLog(record_log, max_moves=min(max_moves, MAX_SLOTS)) as log:
+        try:
+            return game_class(**kwargs, record_log=log)
+        except RecordCapacityError as e:
+            raise SettingError(str(e)) from e
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _build_parser().parse_args(argv)
+
+    if args.list:
+        print("Games: " + ", ".join(GAMES))
+        print("Tools: " + ", ".join(TOOLS))
+        print("Interfaces: " + ", ".join(INTERFACES))
+        return
+
+    if args.game in TOOLS:
+        TOOLS[args.game].load()(args)
+        return
+
+    if args.game is not None:
+        settings = {
+            setting.name: getattr(args, setting.name)
+            for setting in GAMES[args.game].settings
+        }
+        try:
+            launch(args.game, settings, args.input, args.output, args.record_log)
+        except SettingError as e:
+            sys.exit(str(e))
+        return
+
+    print(f"Welcome to the gamescollection package!")
+    input_entry = _choose("input interface", INTERFACES)
+    output_entry = _choose("output interface", INTERFACES)
+    print(f"Input Interface: {input_entry.title}")
+    print(f"Output Interface: {output_entry.title}")
+
+    game_entry = _choose("Game", GAMES)
+    settings = {setting.name: _ask_setting(setting) for setting in game_entry.settings}
+    launch(game_entry.name, settings, input_entry.name, output_entry.name)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,14 @@
+import os
+import sys
+from os import path as ospath
+
+# The package is imported as in main.py, with gamescollection on the path
+sys.path.insert(
+    0,
+    ospath.join(
+        ospath.dirname(ospath.dirname(ospath.abspath(__file__))), "gamescollection"
+    ),
+)
+
+# Build the lookup tables in memory instead of writing them to the user cache
+os.environ.setdefault("GAMESCOLLECTION_CACHE", "off")
@@ -0,0 +1,25 @@
+import time
+
+from games.hexai.analysis import analyse_position, analyse_stream
+
+
+def test_time_limit_stops_the_search():
+    empty = "9:" + "/".join(["." * 9] * 9) + ":X"
+    start = time.perf_counter()
+    result = analyse_position(empty, budget=10**7, time_limit=0.1)
+    assert time.perf_counter() - start < 2
+    assert 81 <= result["playouts"] < 10**7
+    assert result["best_move"] is not None
+
+
+def test_proven_win_in_one():
+    result = analyse_position("3:XO./XO./...:X")
+    assert result["proven"] == "X"
+    assert result["best_move"] == [2, 0]
+
+
+def test_invalid_positions_give_errors():
+    results = list(analyse_stream([b"\x00\x00", "3:.../...", "2:../..:O"], workers=1))
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert "error" in results[0] and "error" in results[1]
+    assert results[2]["best_move"] is not None
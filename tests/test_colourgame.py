@@ -0,0 +1,31 @@
+from games.colourgame import ColorGame
+from games.gamerecords import GameKind, GameRecordLog, GameRecordReader
+
+
+class _Script:
+    """Interface which answers with a fixed list of inputs and collects the output."""
+
+    def __init__(self, answers: list[str]) -> None:
+        self.answers = list(answers)
+        self.output: list[str] = []
+
+    def inp(self, filter=None):
+        answer = self.answers.pop(0)
+        return filter(answer) if filter is not None else answer
+
+    def out(self, message) -> None:
+        self.output.append(str(message))
+
+
+def test_colours_outside_the_game_are_rejected(tmp_path):
+    path = str(tmp_path / "games.log")
+    script = _Script(["Purple,Purple", "Yellow,Red"])
+    with GameRecordLog(path, max_moves=4) as log:
+        ColorGame(2, 2, 1, script, script, record_log=log)
+
+    assert script.answers == []
+    assert any("not part of this game" in line for line in script.output)
+    reader = GameRecordReader(path)
+    assert reader[0]["game"] == GameKind.COLOUR.value
+    # Yellow, Red in base 2 with the first field as least significant digit
+    assert reader.moves(0).tolist() == [2]
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from games.colourgame import score_guess
+from games.colourharness import CodeSpace
+
+
+def _expected(space: CodeSpace, guess: int, targets: np.ndarray) -> list[int]:
+    feedback = []
+    for target in targets:
+        exact, misplaced = score_guess(space.codes[guess], space.codes[target])
+        feedback.append(exact * (space.fields + 1) + misplaced)
+    return feedback
+
+
+@pytest.mark.parametrize("fields, number_colours", [(1, 3), (2, 2), (3, 4), (4, 6)])
+def test_feedback_matches_score_guess(fields, number_colours):
+    space = CodeSpace(fields, number_colours)
+    rng = np.random.default_rng(fields)
+    targets = np.arange(len(space))
+    for guess in rng.choice(len(space), min(len(space), 20), replace=False):
+        assert space.feedback(int(guess), targets).tolist() == _expected(
+            space, guess, targets
+        )
+
+
+@pytest.mark.parametrize("fields, number_colours", [(3, 4), (4, 6)])
+def test_table_matches_computed_feedback(fields, number_colours):
+    space = CodeSpace(fields, number_colours)
+    assert space.table is not None
+    guesses = np.arange(0, len(space), 7)
+    targets = np.arange(len(space))[::-3]
+    assert np.array_equal(
+        space.feedback(guesses, targets), space._compute(guesses, targets)
+    )
+
+
+def test_solved_feedback():
+    space = CodeSpace(4, 6)
+    codes = np.arange(len(space))
+    assert (space.feedback(codes, codes).diagonal() == space.solved).all()
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from games.hexai.board import BLACK, EMPTY, WHITE
+from games.hexai.evaluation import EVALUATORS, AlphaBetaSearch
+
+
+def _position(white: list[int], black: list[int]) -> np.ndarray:
+    cells = np.full(16, EMPTY, dtype=np.int8)
+    cells[white] = WHITE
+    cells[black] = BLACK
+    return cells
+
+
+# White owns the first column down to (2, 0), only (3, 0) completes it
+WHITE_CHAIN = [0, 4, 8]
+BLACK_STONES = [3, 7]
+
+
+@pytest.mark.parametrize("evaluator", EVALUATORS)
+@pytest.mark.parametrize("depth", (1, 2, 3))
+def test_plays_the_winning_move(evaluator, depth):
+    cells = _position(WHITE_CHAIN, BLACK_STONES + [15])
+    search = AlphaBetaSearch(cells, 4, WHITE, evaluator=evaluator, depth=depth)
+    assert search.run() == 12
+
+
+@pytest.mark.parametrize("evaluator", EVALUATORS)
+@pytest.mark.parametrize("depth", (2, 3))
+def test_blocks_the_winning_move_of_the_opponent(evaluator, depth):
+    cells = _position(WHITE_CHAIN, BLACK_STONES)
+    search = AlphaBetaSearch(cells, 4, BLACK, evaluator=evaluator, depth=depth)
+    assert search.run() == 12
+
+
+def test_transposition_table_answers_a_repeated_search():
+    cells = _position(WHITE_CHAIN, BLACK_STONES)
+    search = AlphaBetaSearch(cells, 4, BLACK, depth=3)
+    move = search.run()
+    nodes = search.nodes
+    assert search._table
+
+    value, best = search._negamax(cells, BLACK, 3, -np.inf, np.inf, None)
+    assert (best, search.nodes) == (move, nodes)
+    assert value == search.score
+
+
+def test_deepening_continues_after_the_completed_depth():
+    cells = _position(WHITE_CHAIN, BLACK_STONES)
+    search = AlphaBetaSearch(cells, 4, BLACK, depth=2)
+    search.run()
+    assert search.searched_depth == 2
+
+    search.depth = 3
+    assert search.run() == 12
+    assert search.searched_depth == 3
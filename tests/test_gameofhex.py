@@ -0,0 +1,44 @@
+import pytest
+
+from games.gameofhex import graph_table
+
+
+def _hex_neighbours(size: int, x: int, y: int) -> set[int]:
+    """Neighbours of (x, y) on a rhombus board, in the orientation of Hex._board."""
+    offsets = [(0, -1), (0, 1), (-1, 0), (-1, 1), (1, 0), (1, -1)]
+    return {
+        (x + dx) * size + (y + dy)
+        for dx, dy in offsets
+        if 0 <= x + dx < size and 0 <= y + dy < size
+    }
+
+
+@pytest.mark.parametrize("size", [2, 3, 5, 11])
+def test_graph_lists_every_neighbour_once(size):
+    table = graph_table(size)
+    n = size * size
+    for cell in range(n):
+        cells = [int(other) for other in table[cell] if other < n]
+        assert len(cells) == len(set(cells))
+        assert set(cells) == _hex_neighbours(size, *divmod(cell, size))
+
+
+@pytest.mark.parametrize("size", [3, 5])
+def test_graph_edges(size):
+    table = graph_table(size)
+    n = size * size
+    north, south, west, east = n, n + 1, n + 2, n + 3
+    for cell in range(n):
+        x, y = divmod(cell, size)
+        edges = {int(other) for other in table[cell] if n <= other < n + 4}
+        expected = {
+            edge
+            for edge, touches in [
+                (north, x == 0),
+                (south, x == size - 1),
+                (west, y == 0),
+                (east, y == size - 1),
+            ]
+            if touches
+        }
+        assert edges == expected
@@ -0,0 +1,151 @@
+import threading
+
+import pytest
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from games.gamerecords import (
+    HEADER_DTYPE,
+    GameKind,
+    GameRecordLog,
+    GameRecordReader,
+    RecordCapacityError,
+)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "games.log")
+    with GameRecordLog(path, max_moves=25) as log:
+        log.append_hex(5, [12, 0, 24, 3], winner=1, human=0)
+        log.append_colour(4, 6, [7, 1200, 42], solved=True)
+        log.append_hex(3, list(range(9)), winner=0)
+
+    reader = GameRecordReader(path)
+    assert len(reader) == 3
+    assert reader.max_moves == 25
+    assert reader[0]["game"] == GameKind.HEX.value
+    assert reader[0]["size"] == 5
+    assert reader[0]["outcome"] == 1
+    assert reader.moves(0).tolist() == [12, 0, 24, 3]
+    assert reader[1]["colours"] == 6
+    assert reader.moves(1).tolist() == [7, 1200, 42]
+    assert reader.moves(2).tolist() == list(range(9))
+    assert reader.select(game=GameKind.HEX).tolist() == [0, 2]
+    assert reader.select(game=GameKind.COLOUR, outcome=1).tolist() == [1]
+
+
+def test_append_to_existing_log(tmp_path):
+    path = str(tmp_path / "games.log")
+    with GameRecordLog(path, max_moves=9) as log:
+        log.append_hex(3, [4], winner=0)
+    # An existing log keeps its own number of slots
+    with GameRecordLog(path, max_moves=100) as log:
+        assert log.max_moves == 9
+        log.append_hex(3, [0, 8], winner=1)
+
+    reader = GameRecordReader(path)
+    assert [reader.moves(i).tolist() for i in range(len(reader))] == [[4], [0, 8]]
+
+
+def test_partial_record_is_cut_off(tmp_path):
+    path = str(tmp_path / "games.log")
+    with GameRecordLog(path, max_moves=9) as log:
+        log.append_hex(3, [4, 0], winner=0)
+    with open(path, "ab") as file:
+        file.write(b"\x01\x02\x03")
+
+    with GameRecordLog(path) as log:
+        log.append_hex(3, [8], winner=1)
+
+    reader = GameRecordReader(path)
+    assert len(reader) == 2
+    assert reader.moves(1).tolist() == [8]
+    assert (
+        tmp_path.joinpath("games.log").stat().st_size
+        == HEADER_DTYPE.itemsize + 2 * reader.records.dtype.itemsize
+    )
+
+
+@pytest.mark.skipif(fcntl is None, reason="File locks are not available")
+def test_record_in_progress_is_not_cut_off(tmp_path):
+    path = str(tmp_path / "games.log")
+    with GameRecordLog(path, max_moves=9) as log:
+        log.append_hex(3, [4, 0], winner=0)
+    record = GameRecordReader(path).records[0].tobytes()
+
+    # Another writer is in the middle of a record while the log is opened
+    opened = []
+    with open(path, "ab") as other:
+        fcntl.flock(other.fileno(), fcntl.LOCK_EX)
+        other.write(record[:5])
+        other.flush()
+        thread = threading.Thread(target=lambda: opened.append(GameRecordLog(path)))
+        thread.start()
+        thread.join(timeout=0.2)
+        assert not opened
+        other.write(record[5:])
+        other.flush()
+        fcntl.flock(other.fileno(), fcntl.LOCK_UN)
+    thread.join(timeout=5)
+    opened[0].close()
+
+    reader = GameRecordReader(path)
+    assert [reader.moves(i).tolist() for i in range(len(reader))] == [[4, 0], [4, 0]]
+
+
+def test_capacity_is_checked_before_play(tmp_path):
+    with GameRecordLog(str(tmp_path / "games.log"), max_moves=20) as log:
+        log.check_hex(4)
+        with pytest.raises(RecordCapacityError):
+            log.check_hex(5)
+        with pytest.raises(RecordCapacityError):
+            log.check_colour(4, 6, 21)
+
+
+def test_invalid_slot_count(tmp_path):
+    with pytest.raises(ValueError):
+        GameRecordLog(str(tmp_path / "games.log"), max_moves=0)
+
+
+class _FullDisk:
+    """File which fails every write like a full disk."""
+
+    def __init__(self, file) -> None:
+        self._file = file
+
+    def write(self, data: bytes) -> int:
+        raise OSError(28, "No space left on device")
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def test_write_error_is_raised_to_the_game(tmp_path):
+    log = GameRecordLog(str(tmp_path / "games.log"), max_moves=9)
+    log._file = _FullDisk(log._file)
+    log.append_hex(3, [4], winner=0)
+
+    # flush must not wait forever for the record which was not written
+    flushed = threading.Event()
+
+    def flush() -> None:
+        with pytest.raises(OSError):
+            log.flush()
+        flushed.set()
+
+    threading.Thread(target=flush, daemon=True).start()
+    assert flushed.wait(timeout=5)
+
+    with pytest.raises(OSError):
+        log.append_hex(3, [4], winner=0)
+    with pytest.raises(OSError):
+        log.close()
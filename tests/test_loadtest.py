@@ -0,0 +1,38 @@
+import pytest
+
+from games.loadtest import run_load_test
+
+
+def test_colour_players_finish_their_games():
+    report = run_load_test("colour", players=3, games_per_player=2, seed=0)
+    assert (report.games, report.errors) == (6, 0)
+    assert report.moves >= 6
+    assert report.latency_p50 <= report.latency_p95 <= report.latency_max
+    assert report.memory_samples
+
+
+def test_hex_over_sockets_on_a_shared_scheduler():
+    report = run_load_test(
+        "hex",
+        players=2,
+        transport="socket",
+        settings={"size": 3, "simulations": 5},
+        scheduler_workers=2,
+        seed=0,
+    )
+    assert (report.games, report.errors) == (2, 0), report.error_messages
+    assert report.scheduler["completed"] == report.scheduler["submitted"] > 0
+
+
+def test_game_errors_are_counted_not_raised():
+    report = run_load_test("colour", players=1, settings={"board": 3}, seed=0)
+    assert report.games == 0 and report.errors == 1
+    assert report.error_messages[0].startswith("TypeError")
+
+
+@pytest.mark.parametrize(
+    "game, transport", (("chess", "inprocess"), ("hex", "carrier pigeon"))
+)
+def test_unknown_game_or_transport(game, transport):
+    with pytest.raises(ValueError):
+        run_load_test(game, players=1, transport=transport)
@@ -0,0 +1,37 @@
+import pytest
+
+import main
+from games.hexai.search import ALLOCATORS
+from games.hexai.settings import SEARCH_MODES, SearchSettings
+
+
+def _hex_setting(name: str) -> main.Setting:
+    return next(
+        setting for setting in main.GAMES["hex"].settings if setting.name == name
+    )
+
+
+def test_search_choices_match_the_settings():
+    assert _hex_setting("mode").choices == SEARCH_MODES
+    assert _hex_setting("allocator").choices == ALLOCATORS
+
+
+def test_search_settings_are_grouped():
+    kwargs = main._arguments(
+        main.GAMES["hex"], {"size": 5, "simulations": 10, "mode": "uct"}
+    )
+    assert kwargs["search"] == SearchSettings(mode="uct")
+    with pytest.raises(main.SettingError):
+        main._arguments(main.GAMES["hex"], {"size": 5, "mode": "minimax"})
+
+
+def test_launch_rejects_a_tree_without_room_for_the_root_moves():
+    settings = {"size": 5, "simulations": 10, "mode": "uct", "node_capacity": 25}
+    with pytest.raises(main.SettingError, match="at least 26"):
+        main.launch("hex", settings, "cli", "cli")
+
+
+@pytest.mark.parametrize("capacity", (0, -1))
+def test_node_capacity_must_be_positive(capacity):
+    with pytest.raises(ValueError):
+        SearchSettings(node_capacity=capacity)
@@ -0,0 +1,75 @@
+import numpy as np
+
+from games.hexai.nodepool import NO_NODE, NodePool
+
+
+def _grow(pool: NodePool, rng: np.random.Generator, nodes: int) -> int:
+    """Expand random leaves until the pool has about the given number of nodes."""
+    root = pool.new_root()
+    leaves = [root]
+    while pool.used < nodes:
+        leaf = leaves.pop(rng.integers(len(leaves)))
+        count = int(rng.integers(1, 5))
+        moves = rng.permutation(50)[:count]
+        assert pool.expand(leaf, moves, np.full(count, 1 / count))
+        pool.visits[pool.children(leaf)] = rng.integers(1, 100, count)
+        leaves.extend(range(pool.first_child[leaf], pool.first_child[leaf] + count))
+    return root
+
+
+def _shape(pool: NodePool, node: int) -> tuple:
+    """Moves, visits and children of a subtree, independent of the node indices."""
+    children = range(pool.children(node).start, pool.children(node).stop)
+    return (
+        int(pool.move[node]),
+        int(pool.visits[node]),
+        tuple(_shape(pool, child) for child in children),
+    )
+
+
+def _check_links(pool: NodePool, root: int) -> None:
+    assert pool.parent[root] == NO_NODE
+    for node in range(pool.used):
+        block = pool.children(node)
+        assert (pool.parent[block] == node).all()
+        if pool.first_child[node] == NO_NODE:
+            assert pool.n_children[node] == 0
+        else:
+            assert block.stop <= pool.used
+    # Every node except the root is the child of its parent
+    for node in range(pool.used):
+        if node != root:
+            block = pool.children(pool.parent[node])
+            assert block.start <= node < block.stop
+
+
+def test_collect_keeps_the_subtree():
+    rng = np.random.default_rng(3)
+    pool = NodePool(2_000)
+    root = _grow(pool, rng, 1_500)
+    _check_links(pool, root)
+
+    for _ in range(3):
+        children = pool.children(root)
+        new_root = int(children.start + np.argmax(pool.visits[children]))
+        shape = _shape(pool, new_root)
+        size = len(pool.subtree(new_root))
+
+        root = pool.collect(new_root)
+        assert root == 0
+        assert pool.used == size
+        assert _shape(pool, root) == shape
+        _check_links(pool, root)
+
+
+def test_collect_frees_the_space():
+    rng = np.random.default_rng(5)
+    pool = NodePool(500)
+    root = _grow(pool, rng, 400)
+    child = pool.children(root).start
+
+    root = pool.collect(child)
+    assert pool.free == pool.capacity - len(pool.subtree(root))
+    leaf = int(pool.subtree(root)[-1])
+    assert pool.expand(leaf, np.array([1, 2]), np.array([0.5, 0.5]))
+    _check_links(pool, root)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from games.hexai.board import BLACK, EMPTY, WHITE
+from games.hexai.notation import (
+    NotationError,
+    from_binary,
+    from_text,
+    record_length,
+    to_binary,
+    to_text,
+)
+
+
+def _positions():
+    rng = np.random.default_rng(7)
+    for size in (1, 2, 3, 4, 5, 8, 11, 19):
+        for to_move in (WHITE, BLACK):
+            cells = rng.choice(
+                np.array([WHITE, BLACK, EMPTY], dtype=np.int8), size * size
+            )
+            yield cells, size, to_move
+
+
+@pytest.mark.parametrize("cells, size, to_move", list(_positions()))
+def test_text_round_trip(cells, size, to_move):
+    parsed, parsed_size, parsed_to_move = from_text(to_text(cells, size, to_move))
+    assert np.array_equal(parsed, cells)
+    assert (parsed_size, parsed_to_move) == (size, to_move)
+
+
+@pytest.mark.parametrize("cells, size, to_move", list(_positions()))
+def test_binary_round_trip(cells, size, to_move):
+    data = to_binary(cells, size, to_move)
+    assert len(data) == record_length(size)
+    parsed, parsed_size, parsed_to_move = from_binary(data)
+    assert np.array_equal(parsed, cells)
+    assert (parsed_size, parsed_to_move) == (size, to_move)
+
+
+def test_text_example():
+    cells, size, to_move = from_text("3:X../.O./...:X")
+    assert size == 3
+    assert to_move == WHITE
+    assert cells.tolist() == [WHITE, EMPTY, EMPTY, EMPTY, BLACK] + [EMPTY] * 4
+    # Without the player to move WHITE moves after both players had the same turns
+    assert from_text("3:X../.O./...")[2] == WHITE
+    assert from_text("3:X../.../...")[2] == BLACK
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["", "3", "x:.../.../...", "3:../.../...", "3:.../.../..Z", "3:.../.../...:Q"],
+)
+def test_invalid_text(text):
+    with pytest.raises(NotationError):
+        from_text(text)
+
+
+def test_invalid_binary():
+    data = to_binary(np.full(9, EMPTY, dtype=np.int8), 3, WHITE)
+    with pytest.raises(NotationError):
+        from_binary(data[:-1])
+    with pytest.raises(NotationError):
+        from_binary(bytes([3, 2]) + data[2:])
+    with pytest.raises(NotationError):
+        from_binary(data[:2] + b"\xff" + data[3:])
+    with pytest.raises(NotationError):
+        from_binary(bytes([0, WHITE]))
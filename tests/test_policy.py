@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+import main
+from games.hexai.board import EMPTY, WHITE
+from games.hexai.policy import PatternPolicy, pattern_ids, self_play, train
+
+
+def test_train_prefers_the_patterns_of_the_winner():
+    # White always wins by filling the first column, one stone below the last one
+    size = 4
+    games = [(size, np.array([0, 1, 4, 2, 8, 3, 12]), WHITE)] * 5
+    policy = train(games, epochs=50)
+
+    cells = np.full(size * size, EMPTY, dtype=np.int8)
+    cells[0] = WHITE
+    ids = pattern_ids(cells, size, WHITE)[0]
+    empty = np.flatnonzero(cells == EMPTY)
+    best = empty[np.argmax(policy.weights[ids[empty]])]
+    assert best == 4
+
+
+def test_train_command_writes_a_policy_for_hex(tmp_path):
+    output = str(tmp_path / "policy.npy")
+    main.main(["train", output, "--size", "4", "--games", "20", "--seed", "1"])
+    assert PatternPolicy.load(output).weights.shape == (3**6,)
+
+    games = list(
+        self_play(4, 3, PatternPolicy.load(output), rng=np.random.default_rng(1))
+    )
+    assert all(winner in (0, 1) for _, _, winner in games)
+
+
+def test_launch_rejects_a_missing_rollout_policy(tmp_path):
+    settings = {"size": 3, "simulations": 1, "rollout_policy": str(tmp_path / "x.npy")}
+    with pytest.raises(main.SettingError, match="rollout policy"):
+        main.launch("hex", settings)
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from games.hexai.board import BLACK, EMPTY, WHITE
+from games.hexai.ponder import Ponderer, TreePonderer
+from games.hexai.scheduler import SearchScheduler
+from games.hexai.symmetry import ROTATION, transform_move
+from games.hexai.tree import TreeSearch
+
+
+def test_take_rotates_the_search_of_a_dropped_twin_move():
+    cells = np.full(9, EMPTY, dtype=np.int8)
+    ponderer = Ponderer(cells, 3, WHITE, simulations=8)
+    assert ponderer._search(threading.Event())
+    assert 0 in ponderer._searches and 8 not in ponderer._searches
+
+    search = ponderer.take(8)
+
+    expected = cells.copy()
+    expected[8] = WHITE
+    assert search is not None
+    np.testing.assert_array_equal(search.cells, expected)
+    assert sorted(search.moves.tolist()) == list(range(8))
+
+
+def test_advance_keeps_the_subtree_of_a_dropped_twin_move():
+    tree = TreeSearch(np.full(9, EMPTY), 3, WHITE, rng=np.random.default_rng(0))
+    tree.run(400)
+    twin = transform_move(8, 3, ROTATION)
+    block = tree.pool.children(tree.root)
+    kept = int(tree.pool.visits[block][tree.pool.move[block] == twin][0])
+
+    tree.advance(8)
+
+    assert tree.playouts == kept > 0
+    moves = tree.pool.move[tree.pool.children(tree.root)]
+    assert sorted(moves.tolist()) == list(range(8))
+
+
+def _position() -> np.ndarray:
+    cells = np.full(16, EMPTY, dtype=np.int8)
+    cells[[5, 10]] = [BLACK, WHITE]
+    return cells
+
+
+@pytest.mark.parametrize("workers", (None, 1))
+def test_take_keeps_the_search_of_the_human_move(workers):
+    scheduler = SearchScheduler(workers) if workers is not None else None
+    ponderer = Ponderer(_position(), 4, WHITE, simulations=16, scheduler=scheduler)
+    ponderer.start()
+    time.sleep(0.2)
+    ponderer.stop()
+    move = next(iter(ponderer._searches))
+
+    search = ponderer.take(move)
+
+    assert search.cells[move] == WHITE and search.to_move == BLACK
+    assert search.playouts > 0
+    assert not ponderer._thread.is_alive()
+    assert ponderer.take(move) is None
+    if scheduler is not None:
+        assert ponderer._ticket.done()
+        scheduler.close()
+
+
+def test_stop_interrupts_the_pondering():
+    ponderer = Ponderer(_position(), 4, WHITE, simulations=10**9)
+    ponderer.start()
+    time.sleep(0.05)
+    ponderer.stop()
+    assert not ponderer._thread.is_alive()
+
+    playouts = ponderer._prediction.playouts
+    assert playouts > 0
+    time.sleep(0.05)
+    assert ponderer._prediction.playouts == playouts
+
+
+def test_tree_ponderer_grows_the_tree_and_reroots_it():
+    tree = TreeSearch(_position(), 4, WHITE, rng=np.random.default_rng(0))
+    ponderer = TreePonderer(tree, playouts=2000)
+    ponderer.start()
+    ponderer._thread.join(timeout=10)
+    assert tree.playouts >= 2000
+
+    block = tree.pool.children(tree.root)
+    move = int(tree.pool.move[block][0])
+    kept = int(tree.pool.visits[block][0])
+    assert ponderer.take(move) is tree
+    assert tree.cells[move] == WHITE and tree.to_move == BLACK
+    assert tree.playouts == kept
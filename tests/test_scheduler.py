@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from games.hexai.scheduler import SearchScheduler
+
+
+def _endless(stop: threading.Event) -> bool:
+    while not stop.is_set():
+        time.sleep(0.001)
+    return False
+
+
+def _counting(calls: list[int], slices: int):
+    def job(stop: threading.Event) -> bool:
+        calls.append(1)
+        return len(calls) >= slices
+
+    return job
+
+
+@pytest.mark.parametrize("priorities", ((1.0, 1.0), (2.0, 1.0)))
+def test_sessions_share_the_worker_by_priority(priorities):
+    with SearchScheduler(workers=1, slice_time=0.01) as scheduler:
+        tickets = [
+            scheduler.submit(session, _endless, priority=priority)
+            for session, priority in enumerate(priorities)
+        ]
+        time.sleep(0.5)
+        for ticket in tickets:
+            scheduler.cancel(ticket)
+            assert ticket.wait(timeout=2)
+
+    share = tickets[0].compute_time / tickets[1].compute_time
+    assert share == pytest.approx(priorities[0] / priorities[1], rel=0.35)
+
+
+def test_deadline_ends_a_search_after_its_first_slice():
+    with SearchScheduler(workers=1, slice_time=0.01) as scheduler:
+        ticket = scheduler.submit("game", _endless, deadline=time.monotonic() + 0.05)
+        assert ticket.wait(timeout=2)
+    assert ticket.expired and not ticket.cancelled
+    assert ticket.slices >= 1
+
+
+def test_deadline_policy_runs_the_earliest_deadline_first():
+    order = []
+    with SearchScheduler(workers=1, policy="deadline") as scheduler:
+        blocker = scheduler.submit("blocker", _endless)
+        now = time.monotonic()
+        for name, delay in (("late", 10.0), ("early", 5.0)):
+            scheduler.submit(
+                name, lambda stop, name=name: order.append(name) or True, now + delay
+            )
+        time.sleep(0.05)
+        scheduler.cancel(blocker)
+    assert order == ["early", "late"]
+
+
+def test_cancel_stops_waiting_and_running_searches():
+    with SearchScheduler(workers=1, slice_time=10.0) as scheduler:
+        running = scheduler.submit("a", _endless)
+        waiting = scheduler.submit("b", _endless)
+        time.sleep(0.05)
+        scheduler.cancel(waiting)
+        scheduler.cancel(running)
+        assert waiting.wait(timeout=2) and running.wait(timeout=2)
+    assert running.cancelled and waiting.cancelled
+    assert waiting.slices == 0 and not running.expired
+
+
+def test_close_runs_the_queued_searches_to_their_end():
+    calls = [[] for _ in range(3)]
+    scheduler = SearchScheduler(workers=1)
+    tickets = [scheduler.submit(i, _counting(calls[i], 3)) for i in range(3)]
+    scheduler.close()
+
+    assert all(ticket.done() and not ticket.expired for ticket in tickets)
+    assert [len(c) for c in calls] == [3, 3, 3]
+    with pytest.raises(RuntimeError):
+        scheduler.submit("late", _endless)
+
+
+def test_wait_raises_the_error_of_the_job():
+    def job(stop):
+        raise KeyError("broken")
+
+    with SearchScheduler(workers=1) as scheduler:
+        ticket = scheduler.submit("game", job)
+        with pytest.raises(KeyError):
+            ticket.wait(timeout=2)
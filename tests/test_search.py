@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from games.hexai.board import BLACK, EMPTY, WHITE
+from games.hexai.search import FlatMonteCarlo, SequentialHalving
+
+BEST = 4
+
+
+def _biased_rollout(boards, size, to_move, rng):
+    # White wins 80% of the playouts with a stone on BEST and 40% of the others
+    chance = np.where(boards[:, BEST] == WHITE, 0.8, 0.4)
+    return np.where(rng.random(len(boards)) < chance, WHITE, BLACK).astype(np.int8)
+
+
+def _search(seed: int) -> FlatMonteCarlo:
+    cells = np.full(9, EMPTY, dtype=np.int8)
+    return FlatMonteCarlo(
+        cells,
+        3,
+        WHITE,
+        moves=np.arange(9),
+        rollout=_biased_rollout,
+        rng=np.random.default_rng(seed),
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("confidence", (0.99, 1.0))
+def test_sequential_halving_keeps_the_best_arm(seed, confidence):
+    search = _search(seed)
+    halving = SequentialHalving(search, confidence=confidence)
+    assert halving.run(2000)
+    assert halving.best_move() == BEST
+    assert search.playouts <= 2000
+
+
+def test_sequential_halving_spends_the_most_on_the_best_arm():
+    search = _search(0)
+    SequentialHalving(search, confidence=1.0).run(2000)
+    assert np.argmax(search.visits) == BEST
+    assert (search.visits > 0).all()
+
+
+def test_sequential_halving_reuses_earlier_playouts():
+    search = _search(0)
+    halving = SequentialHalving(search)
+    halving.run(500)
+    before = search.visits.copy()
+    halving.run(500)
+    np.testing.assert_array_equal(search.visits, before)
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from games.hexai.board import BLACK, EMPTY, WHITE, connected
+from games.hexai.symmetry import (
+    SWAPS_COLOURS,
+    canonical,
+    transform,
+    transform_move,
+)
+
+SIZES = (1, 2, 3, 4, 5, 7)
+
+
+def _random_positions(size: int, count: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.choice(
+        np.array([WHITE, BLACK, EMPTY], dtype=np.int8), (count, size * size)
+    )
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("symmetry", range(4))
+def test_transform_move_is_an_involution(size, symmetry):
+    moves = [transform_move(move, size, symmetry) for move in range(size * size)]
+    assert sorted(moves) == list(range(size * size))
+    assert [transform_move(move, size, symmetry) for move in moves] == list(
+        range(size * size)
+    )
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("symmetry", range(4))
+def test_transform_is_an_involution(size, symmetry):
+    for cells in _random_positions(size, 20, size):
+        transformed, player = transform(cells, size, WHITE, symmetry)
+        back, to_move = transform(transformed, size, player, symmetry)
+        assert np.array_equal(back, cells)
+        assert to_move == WHITE
+        # A stone moves to the cell its move is mapped to
+        for move in np.flatnonzero(cells != EMPTY):
+            stone = transformed[transform_move(int(move), size, symmetry)]
+            swapped = {WHITE: BLACK, BLACK: WHITE}[int(cells[move])]
+            assert stone == (swapped if SWAPS_COLOURS[symmetry] else cells[move])
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("symmetry", range(4))
+def test_connected_is_preserved(size, symmetry):
+    # Full boards always have exactly one winner
+    boards = _random_positions(size, 50, 100 + size)
+    boards[boards == EMPTY] = WHITE
+    transformed = np.array(
+        [transform(board, size, WHITE, symmetry)[0] for board in boards]
+    )
+    for player in (WHITE, BLACK):
+        mapped = (
+            (BLACK if player == WHITE else WHITE) if SWAPS_COLOURS[symmetry] else player
+        )
+        assert np.array_equal(
+            connected(boards, size, player), connected(transformed, size, mapped)
+        )
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_canonical_key_is_shared(size):
+    for cells in _random_positions(size, 20, 200 + size):
+        key, symmetry = canonical(cells, size, WHITE)
+        for other in range(4):
+            transformed, player = transform(cells, size, WHITE, other)
+            assert canonical(transformed, size, player)[0] == key
+        # The returned transformation maps the position to the canonical one
+        canonical_cells, player = transform(cells, size, WHITE, symmetry)
+        assert key == bytes([size, player]) + canonical_cells.tobytes()
@@ -0,0 +1,59 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from games.hexai.notation import from_text
+from games.hexai.tactics import (
+    CATEGORIES,
+    CONFIGS,
+    SUITE,
+    run_suite,
+    summarize,
+    verify_suite,
+    winning_moves,
+)
+
+
+def test_suite_solutions_are_proven():
+    assert verify_suite() == []
+
+
+def test_suite_entries_are_consistent():
+    assert len({entry.name for entry in SUITE}) == len(SUITE)
+    for entry in SUITE:
+        assert entry.category in CATEGORIES
+        assert 1 <= len(entry.solutions) <= 2
+
+
+def test_verify_suite_finds_a_wrong_solution():
+    entry = SUITE[0]
+    cells, size, _ = from_text(entry.position)
+    empty = [divmod(int(cell), size) for cell in np.flatnonzero(cells == 2)]
+    wrong = next(move for move in empty if move not in entry.solutions)
+    broken = dataclasses.replace(entry, name="broken", solutions=(wrong,))
+    assert verify_suite([entry, broken]) == ["broken"]
+
+
+def test_region_which_does_not_decide_the_position_is_rejected():
+    entry = next(entry for entry in SUITE if entry.region is not None)
+    cells, size, to_move = from_text(entry.position)
+    # Without any empty cell in the region, nothing is decided
+    with pytest.raises(ValueError):
+        winning_moves(cells, size, to_move, np.array([], dtype=np.intp))
+
+
+def test_run_suite_reports_every_configuration():
+    positions = [SUITE[0], next(e for e in SUITE if e.category == "local")]
+    results = run_suite(positions=positions, max_simulations=64, seed=0)
+    assert len(results) == len(CONFIGS) * len(positions)
+
+    summary = summarize(results)
+    assert set(summary) == set(CONFIGS)
+    for config in summary.values():
+        assert 0 <= config["solved"] <= 1 and config["runs"] == len(positions)
+
+
+def test_unknown_configuration():
+    with pytest.raises(ValueError):
+        run_suite(["minimax"])